@@ -1,74 +1,366 @@
-import pytesseract
-from pdf2image import convert_from_path
-import nltk
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import plotly.express as px
-import pandas as pd
-import torch
-from transformers import pipeline
+import os
 import re
-import email_validator
-import spacy
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+from import_timing import lazy_import, modules_available
+from skill_matcher import canonical_skill, get_skill_matcher
+from telemetry import traced
+
+# Heavy dependencies are imported on first use of the feature that needs them
+REQUIRED_MODULES = ['sklearn', 'transformers', 'torch', 'plotly', 'pytesseract', 'pdf2image', 'email_validator']
 
 # Optional import with fallback
-try:
-    import magic
-    MAGIC_AVAILABLE = True
-except ImportError:
-    MAGIC_AVAILABLE = False
+MAGIC_AVAILABLE = modules_available(['magic'])
+if not MAGIC_AVAILABLE:
     print("Warning: python-magic not available. File type detection will be limited.")
 
+# Rasterization resolution and pages rasterized at a time for OCR
+OCR_DPI = int(os.getenv("OCR_DPI", 200))
+OCR_BATCH_SIZE = int(os.getenv("OCR_BATCH_SIZE", 4))
+
+# Compliance classifier settings
+COMPLIANCE_MODEL = os.getenv("COMPLIANCE_MODEL") or None
+COMPLIANCE_BATCH_SIZE = int(os.getenv("COMPLIANCE_BATCH_SIZE", 16))
+COMPLIANCE_THREADS = int(os.getenv("COMPLIANCE_THREADS", min(4, os.cpu_count() or 1)))
+COMPLIANCE_QUANTIZE = os.getenv("COMPLIANCE_QUANTIZE", "").lower() in ('1', 'true', 'yes')
+APPROPRIATE_LABEL = 'APPROPRIATE'
+
+# Events the performance tracker counts
+PERFORMANCE_EVENTS = ('generated', 'opened', 'replied')
+
+def _event_time(value):
+    """
+    Epoch seconds and local calendar day of an event timestamp (datetime, pandas Timestamp, epoch or ISO string).
+
+    Naive datetimes, like pd.Timestamp.now(), are taken as local time.
+    """
+    if value is None:
+        value = time.time()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if hasattr(value, 'to_pydatetime'):
+        # pandas treats naive timestamps as UTC in timestamp(), datetime treats them as local time
+        value = value.to_pydatetime()
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.astimezone()
+        value = value.timestamp()
+    value = float(value)
+    return value, time.strftime('%Y-%m-%d', time.localtime(value))
+
+def _ocr_image(image):
+    # Runs in a worker process
+    return lazy_import('pytesseract').image_to_string(image)
+
+def _ocr_batches(page_numbers, batch_size):
+    """
+    Group page numbers into runs of consecutive pages, at most batch_size long.
+    """
+    batch = []
+    for page_number in page_numbers:
+        if batch and (page_number != batch[-1] + 1 or len(batch) == batch_size):
+            yield batch
+            batch = []
+        batch.append(page_number)
+    if batch:
+        yield batch
+
+def _skill_features(skills):
+    """
+    Canonical, de-duplicated skills used as TF-IDF terms, so multi-word skills stay one term and
+    'NLP' matches 'natural language processing'.
+    """
+    return list(dict.fromkeys(skill for skill in map(canonical_skill, skills or ()) if skill))
+
+def dependencies_available():
+    """
+    Check that the advanced feature dependencies are installed, without importing them.
+    
+    Returns:
+        bool: True if every required module can be imported
+    """
+    return modules_available(REQUIRED_MODULES)
+
 class AdvancedResumeParser:
-    def __init__(self):
-        # Load NLP models
-        self.nlp = spacy.load('en_core_web_sm')
-        nltk.download('punkt')
-        
-    def ocr_document(self, file_path):
+    def ocr_document(self, file_path, dpi=None):
         """
         Perform OCR on complex document layouts
         """
-        images = convert_from_path(file_path)
-        ocr_text = ""
-        for image in images:
-            ocr_text += pytesseract.image_to_string(image)
-        return ocr_text
+        return "".join(text for _, text in self.ocr_document_streaming(file_path, dpi=dpi))
+    
+    def ocr_document_streaming(self, source, dpi=None, batch_size=None, skip_text_pages=True, min_text_chars=20,
+                               max_pages=None):
+        """
+        OCR a PDF page by page with bounded memory.
+        
+        Pages that already have an extractable text layer are returned as is.
+        The remaining pages are rasterized a batch at a time and recognized in
+        the shared process pool, with at most two batches of images alive.
+        
+        Args:
+            source (str or bytes): PDF file path or content
+            dpi (int, optional): Rasterization resolution, defaults to OCR_DPI
+            batch_size (int, optional): Pages rasterized at a time, defaults to OCR_BATCH_SIZE
+            skip_text_pages (bool, optional): Use the text layer instead of OCR where it has text
+            min_text_chars (int, optional): Text layer length from which a page counts as having text
+            max_pages (int, optional): Pages to process at most, defaults to the upload page limit
+        
+        Yields:
+            tuple: Page number (1-based) and page text, in page order
+        """
+        from document_text import extract_page_texts, get_process_pool, MAX_DOCUMENT_PAGES
+        
+        pdf2image = lazy_import('pdf2image')
+        dpi = dpi or OCR_DPI
+        batch_size = max(1, batch_size or OCR_BATCH_SIZE)
+        max_pages = MAX_DOCUMENT_PAGES if max_pages is None else max_pages
+        
+        if isinstance(source, (bytes, bytearray)):
+            data = bytes(source)
+        else:
+            with open(source, 'rb') as file:
+                data = file.read()
+        
+        page_count = min(pdf2image.pdfinfo_from_bytes(data)['Pages'], max_pages)
+        text_layers = extract_page_texts(data, max_pages=page_count) if skip_text_pages else [""] * page_count
+        ocr_pages = [
+            page_number for page_number in range(1, page_count + 1)
+            if len(text_layers[page_number - 1].strip()) < min_text_chars
+        ]
+        
+        pool = get_process_pool()
+        # Pages in page order: (page number, OCR future or None, text layer)
+        in_flight = deque()
+        queued = 1
+        
+        def pop():
+            page_number, future, text = in_flight.popleft()
+            return page_number, future.result() if future is not None else text
+        
+        for batch in _ocr_batches(ocr_pages, batch_size):
+            for page_number in range(queued, batch[0]):
+                in_flight.append((page_number, None, text_layers[page_number - 1]))
+            
+            images = pdf2image.convert_from_bytes(data, dpi=dpi, first_page=batch[0], last_page=batch[-1])
+            for page_number, image in zip(batch, images):
+                in_flight.append((page_number, pool.submit(_ocr_image, image), None))
+            del images
+            queued = batch[-1] + 1
+            
+            # Wait for earlier batches before rasterizing another one
+            while sum(future is not None for _, future, _ in in_flight) > len(batch):
+                yield pop()
+            while in_flight and (in_flight[0][1] is None or in_flight[0][1].done()):
+                yield pop()
+        
+        for page_number in range(queued, page_count + 1):
+            in_flight.append((page_number, None, text_layers[page_number - 1]))
+        while in_flight:
+            yield pop()
     
     def extract_skills(self, text):
         """
-        Machine learning-based skill extraction
+        Extract skills by matching the skill lexicon and its aliases
+        
+        Args:
+            text (str): Resume or job description text
+        
+        Returns:
+            list: Canonical skill names in order of first mention
+        """
+        return get_skill_matcher().match(text)
+    
+    def extract_skills_batch(self, texts, batch_size=None):
+        """
+        Extract skills from many resumes, spreading large batches across worker processes
+        
+        Args:
+            texts (iterable): Resume texts
+            batch_size (int, optional): Texts per worker task, defaults to MATCH_BATCH_SIZE
+        
+        Returns:
+            list: One list of canonical skill names per text, in input order
         """
-        # Use spaCy for named entity recognition
-        doc = self.nlp(text)
-        skills = [ent.text for ent in doc.ents if ent.label_ in ['SKILL', 'TECH']]
-        return list(set(skills))
+        return get_skill_matcher().match_batch(texts, batch_size=batch_size)
     
     def skill_gap_analysis(self, resume_skills, job_description_skills):
         """
         Analyze skill gaps between resume and job description
         """
-        vectorizer = TfidfVectorizer()
+        vectorizer = lazy_import('sklearn.feature_extraction.text').TfidfVectorizer()
         skill_matrix = vectorizer.fit_transform([' '.join(resume_skills), ' '.join(job_description_skills)])
-        similarity = cosine_similarity(skill_matrix)[0][1]
+        similarity = lazy_import('sklearn.metrics.pairwise').cosine_similarity(skill_matrix)[0][1]
         return {
             'match_percentage': similarity * 100,
             'missing_skills': list(set(job_description_skills) - set(resume_skills))
         }
+    
+    def skill_gap_analysis_batch(self, resume_skill_sets, job_skill_sets, top_k=5, per='resume',
+                                 block_size=1024):
+        """
+        Rank skill matches between many resumes and many job descriptions
+        
+        The TF-IDF vocabulary is fitted once over all skill sets, with each skill
+        as a single term, and every pair is scored with one sparse matrix product.
+        
+        Args:
+            resume_skill_sets (list): Skill lists, one per resume
+            job_skill_sets (list): Skill lists, one per job description
+            top_k (int, optional): Matches kept per resume (or per job)
+            per (str, optional): 'resume' ranks jobs for each resume, 'job' ranks resumes for each job
+            block_size (int, optional): Rows scored at a time, bounds the dense score memory
+        
+        Returns:
+            list: For each resume (or job), up to top_k dicts with 'resume_index', 'job_index',
+                'match_percentage' and 'missing_skills', best match first
+        """
+        np = lazy_import('numpy')
+        resume_sets = [_skill_features(skills) for skills in resume_skill_sets]
+        job_sets = [_skill_features(skills) for skills in job_skill_sets]
+        if per not in ('resume', 'job'):
+            raise ValueError(f"per must be 'resume' or 'job', not {per!r}")
+        rows, columns = (resume_sets, job_sets) if per == 'resume' else (job_sets, resume_sets)
+        if not rows or not columns:
+            return [[] for _ in rows]
+        
+        if any(rows) or any(columns):
+            vectorizer = lazy_import('sklearn.feature_extraction.text').TfidfVectorizer(analyzer=_skill_features)
+            matrix = vectorizer.fit_transform(rows + columns)
+            # Rows are L2-normalized, so the product gives cosine similarities
+            row_matrix, column_matrix_t = matrix[:len(rows)], matrix[len(rows):].T.tocsc()
+        else:
+            row_matrix = None
+        
+        top_k = min(top_k, len(columns))
+        rankings = []
+        for start in range(0, len(rows), block_size):
+            if row_matrix is None:
+                scores = np.zeros((min(block_size, len(rows) - start), len(columns)))
+            else:
+                scores = (row_matrix[start:start + block_size] @ column_matrix_t).toarray()
+            # Partial sort keeps selection linear in the number of columns
+            candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+            for offset, row_candidates in enumerate(candidates):
+                row = start + offset
+                order = row_candidates[np.lexsort((row_candidates, -scores[offset, row_candidates]))]
+                ranking = []
+                for column in order:
+                    resume, job = (row, column) if per == 'resume' else (column, row)
+                    ranking.append({
+                        'resume_index': int(resume),
+                        'job_index': int(job),
+                        'match_percentage': float(scores[offset, column]) * 100,
+                        'missing_skills': sorted(set(job_sets[job]) - set(resume_sets[resume]))
+                    })
+                rankings.append(ranking)
+        return rankings
 
 class EmailComplianceChecker:
-    def __init__(self):
-        self.bias_detector = pipeline('text-classification')
+    def __init__(self, model=None, batch_size=None, num_threads=None, quantize=None):
+        """
+        Email appropriateness classifier running on CPU
+        
+        Args:
+            model (str, optional): Text classification model, defaults to COMPLIANCE_MODEL or the
+                transformers default; a distilled model is the cheapest way to shrink it further
+            batch_size (int, optional): Chunks classified per forward pass, defaults to COMPLIANCE_BATCH_SIZE
+            num_threads (int, optional): Intra-op threads for torch, defaults to COMPLIANCE_THREADS
+            quantize (bool, optional): Apply dynamic int8 quantization to the linear layers,
+                defaults to COMPLIANCE_QUANTIZE
+        """
+        self.model = model or COMPLIANCE_MODEL
+        self.batch_size = batch_size or COMPLIANCE_BATCH_SIZE
+        self.num_threads = num_threads or COMPLIANCE_THREADS
+        self.quantize = COMPLIANCE_QUANTIZE if quantize is None else quantize
+        self._bias_detector = None
+        self._load_lock = threading.Lock()
+    
+    @property
+    def bias_detector(self):
+        # Load the classification model on first use, once even when several threads ask at the same time
+        if self._bias_detector is None:
+            with self._load_lock:
+                if self._bias_detector is None:
+                    torch = lazy_import('torch')
+                    # Several checkers or workers oversubscribe the CPU when each uses every core
+                    torch.set_num_threads(self.num_threads)
+                    detector = lazy_import('transformers').pipeline('text-classification', model=self.model,
+                                                                    device=-1)
+                    if self.quantize:
+                        detector.model = torch.quantization.quantize_dynamic(detector.model, {torch.nn.Linear},
+                                                                             dtype=torch.qint8)
+                    self._bias_detector = detector
+        return self._bias_detector
+    
+    def warm_up(self):
+        """
+        Load the classification model now instead of on first use.
+        """
+        return self.bias_detector
+    
+    def _chunk(self, text):
+        """
+        Split text into pieces that fit the model's maximum input length.
+        """
+        tokenizer = self.bias_detector.tokenizer
+        # Tokenizers without a configured limit report a huge model_max_length
+        max_length = min(tokenizer.model_max_length, 512) - tokenizer.num_special_tokens_to_add()
+        token_ids = tokenizer(text or "", add_special_tokens=False)['input_ids']
+        if len(token_ids) <= max_length:
+            return [text or ""]
+        return [tokenizer.decode(token_ids[start:start + max_length])
+                for start in range(0, len(token_ids), max_length)]
     
     def check_appropriateness(self, email_text):
         """
         AI-powered email appropriateness scoring
         """
-        bias_result = self.bias_detector(email_text)
-        return {
-            'is_appropriate': bias_result[0]['label'] == 'APPROPRIATE',
-            'confidence': bias_result[0]['score']
-        }
+        return self.check_appropriateness_batch([email_text])[0]
+    
+    @traced('compliance_check')
+    def check_appropriateness_batch(self, email_texts):
+        """
+        Score many emails, classifying their chunks together in batched forward passes
+        
+        Emails longer than the model's input are split into chunks, and an email
+        is appropriate only if every chunk is.
+        
+        Args:
+            email_texts (list): Emails to score
+        
+        Returns:
+            list: One dict per email with 'is_appropriate', 'confidence' and 'chunks'
+        """
+        chunks = []
+        owners = []
+        for index, email_text in enumerate(email_texts):
+            for chunk in self._chunk(email_text):
+                chunks.append(chunk)
+                owners.append(index)
+        if not chunks:
+            return []
+        
+        predictions = self.bias_detector(chunks, batch_size=self.batch_size, truncation=True)
+        per_email = [[] for _ in email_texts]
+        for index, prediction in zip(owners, predictions):
+            per_email[index].append(prediction)
+        
+        results = []
+        for email_predictions in per_email:
+            flagged = [p['score'] for p in email_predictions if p['label'] != APPROPRIATE_LABEL]
+            results.append({
+                'is_appropriate': not flagged,
+                # Confidence of the strongest flag, or of the weakest appropriate chunk
+                'confidence': max(flagged) if flagged else min(p['score'] for p in email_predictions),
+                'chunks': len(email_predictions)
+            })
+        return results
     
     def anonymize_data(self, text):
         """
@@ -80,22 +372,180 @@ class EmailComplianceChecker:
         return text
 
 class EmailPerformanceTracker:
-    def __init__(self):
-        self.performance_data = []
+    def __init__(self, path=None):
+        """
+        Persistent email performance store
+        
+        Every logged event is appended to an events table, and per tone, company
+        and day counters are updated in the same transaction, so insights read a
+        few aggregate rows instead of the whole history.
+        
+        Args:
+            path (str, optional): SQLite file, defaults to PERFORMANCE_DB_PATH or .cache/performance.sqlite3
+        """
+        self.path = path or os.getenv("PERFORMANCE_DB_PATH", os.path.join(".cache", "performance.sqlite3"))
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS events ("
+                "id INTEGER PRIMARY KEY, email_id TEXT NOT NULL, event TEXT NOT NULL, timestamp REAL NOT NULL, "
+                "day TEXT NOT NULL, recipient TEXT, company TEXT, tone TEXT, compliance_score REAL, details TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS events_email_id ON events (email_id)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS aggregates ("
+                "dimension TEXT NOT NULL, key TEXT NOT NULL, generated INTEGER NOT NULL DEFAULT 0, "
+                "opened INTEGER NOT NULL DEFAULT 0, replied INTEGER NOT NULL DEFAULT 0, "
+                "compliance_sum REAL NOT NULL DEFAULT 0, compliance_count INTEGER NOT NULL DEFAULT 0, "
+                "PRIMARY KEY (dimension, key))"
+            )
+            self._conn.commit()
+        return self._conn
+    
+    def _append(self, conn, email_details, deltas):
+        details = dict(email_details)
+        event = details.pop('event', 'generated')
+        if event not in PERFORMANCE_EVENTS:
+            raise ValueError(f"Unknown performance event: {event}")
+        email_id = str(details.pop('email_id', None) or uuid.uuid4().hex)
+        timestamp, day = _event_time(details.pop('timestamp', None))
+        recipient = details.pop('recipient', None)
+        company = details.pop('company', None)
+        tone = details.pop('tone', None)
+        compliance_score = details.pop('compliance_score', None)
+        
+        if event != 'generated':
+            # Opens and replies count toward the tone, company and day the email was generated for
+            original = conn.execute(
+                "SELECT company, tone, day FROM events WHERE email_id = ? AND event = 'generated' LIMIT 1",
+                (email_id,)
+            ).fetchone()
+            if original is not None:
+                company, tone, day = company or original[0], tone or original[1], original[2]
+        
+        conn.execute(
+            "INSERT INTO events (email_id, event, timestamp, day, recipient, company, tone, compliance_score, "
+            "details) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (email_id, event, timestamp, day, recipient, company, tone, compliance_score,
+             json.dumps(details, default=str) if details else None)
+        )
+        has_score = event == 'generated' and compliance_score is not None
+        for dimension, key in (('all', ''), ('tone', tone), ('company', company), ('day', day)):
+            if key is None:
+                continue
+            delta = deltas.setdefault((dimension, str(key)), [0, 0, 0, 0.0, 0])
+            delta[PERFORMANCE_EVENTS.index(event)] += 1
+            if has_score:
+                delta[3] += float(compliance_score)
+                delta[4] += 1
+        return email_id
+    
+    @staticmethod
+    def _apply(conn, deltas):
+        # One upsert per touched aggregate row, however many events the transaction added
+        conn.executemany(
+            "INSERT INTO aggregates (dimension, key, generated, opened, replied, compliance_sum, compliance_count) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (dimension, key) DO UPDATE SET "
+            "generated = generated + excluded.generated, opened = opened + excluded.opened, "
+            "replied = replied + excluded.replied, compliance_sum = compliance_sum + excluded.compliance_sum, "
+            "compliance_count = compliance_count + excluded.compliance_count",
+            [(dimension, key, *delta) for (dimension, key), delta in deltas.items()]
+        )
     
     def log_email_performance(self, email_details):
         """
         Track email performance metrics
+        
+        Args:
+            email_details (dict): Event with optional 'event' ('generated', 'opened' or 'replied',
+                default 'generated'), 'email_id', 'timestamp', 'recipient', 'company', 'tone' and
+                'compliance_score'; other keys are stored as details
+        
+        Returns:
+            str: The email id, generated when not given, to log later opens and replies against
         """
-        self.performance_data.append(email_details)
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                deltas = {}
+                email_id = self._append(conn, email_details, deltas)
+                self._apply(conn, deltas)
+                return email_id
+    
+    def log_many(self, events):
+        """
+        Append many events in a single transaction
+        
+        Args:
+            events (iterable): Event dicts as accepted by log_email_performance
+        
+        Returns:
+            list: Email ids of the logged events
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                deltas = {}
+                email_ids = [self._append(conn, email_details, deltas) for email_details in events]
+                self._apply(conn, deltas)
+                return email_ids
+    
+    def aggregates(self, dimension='all'):
+        """
+        Read the rolling aggregates for one dimension
+        
+        Args:
+            dimension (str, optional): 'all', 'tone', 'company' or 'day'
+        
+        Returns:
+            list: Dicts with the key, event counts, average compliance score and open and
+                reply rates; rates are None until an event of that kind has been logged
+        """
+        with self._lock:
+            conn = self._connect()
+            totals = conn.execute(
+                "SELECT opened, replied FROM aggregates WHERE dimension = 'all' AND key = ''"
+            ).fetchone() or (0, 0)
+            rows = conn.execute(
+                "SELECT key, generated, opened, replied, compliance_sum, compliance_count FROM aggregates "
+                "WHERE dimension = ? ORDER BY key",
+                (dimension,)
+            ).fetchall()
+        
+        results = []
+        for key, generated, opened, replied, compliance_sum, compliance_count in rows:
+            results.append({
+                'key': key,
+                'generated': generated,
+                'opened': opened,
+                'replied': replied,
+                'compliance_score': compliance_sum / compliance_count if compliance_count else None,
+                'open_rate': opened / generated if totals[0] and generated else None,
+                'reply_rate': replied / generated if totals[1] and generated else None
+            })
+        return results
     
     def generate_performance_insights(self):
         """
         Generate performance analytics
         """
-        df = pd.DataFrame(self.performance_data)
-        fig = px.line(df, x='timestamp', y='open_rate', title='Email Performance Over Time')
-        return fig
+        df = lazy_import('pandas').DataFrame(self.aggregates('day'))
+        if df.empty:
+            return None
+        df = df.rename(columns={'key': 'day'})
+        # Only plot open rates once opens are being tracked
+        y = 'open_rate' if df['open_rate'].notna().any() else 'generated'
+        title = 'Email Open Rate by Day' if y == 'open_rate' else 'Emails Generated by Day'
+        return lazy_import('plotly.express').line(df, x='day', y=y, title=title)
 
 class IntegrationManager:
     def __init__(self):
@@ -122,6 +572,7 @@ def validate_email(email):
     """
     Validate email format
     """
+    email_validator = lazy_import('email_validator')
     try:
         email_validator.validate_email(email)
         return True
@@ -133,7 +584,7 @@ def detect_file_type(file_path):
     Detect file type using magic if available
     """
     if MAGIC_AVAILABLE:
-        file_type = magic.from_file(file_path)
+        file_type = lazy_import('magic').from_file(file_path)
         return file_type
     else:
         # Fallback method if magic is not available
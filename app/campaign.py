@@ -0,0 +1,236 @@
+import os
+import csv
+import json
+import time
+import asyncio
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from resources import get_resource
+from generation import generate_email_text, load_job_description
+
+# Accepted column names for each recipient field
+RECIPIENT_FIELDS = {
+    'name': ('name', 'recipient', 'recipient_name'),
+    'company': ('company', 'company_name'),
+    'job': ('job', 'job_url', 'job_description', 'job_text'),
+    'tone': ('tone', 'email_tone'),
+}
+
+def load_recipients(file_path):
+    """
+    Load campaign recipients from a CSV or JSONL file.
+
+    Args:
+        file_path (str): Path to a .csv or .jsonl file with name, company, job (URL or text) and tone columns
+
+    Returns:
+        list: Recipient dictionaries with id, name, company, job and tone keys
+    """
+    with open(file_path, 'r', newline='', encoding='utf-8') as file:
+        if file_path.lower().endswith(('.jsonl', '.json')):
+            rows = [json.loads(line) for line in file if line.strip()]
+        else:
+            rows = list(csv.DictReader(file))
+
+    recipients = []
+    for index, row in enumerate(rows):
+        row = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+        recipient = {'id': str(row.get('id') or index)}
+        for field, aliases in RECIPIENT_FIELDS.items():
+            recipient[field] = next((str(row[alias]).strip() for alias in aliases if row.get(alias)), '')
+        recipient['tone'] = recipient['tone'] or 'Professional'
+        recipients.append(recipient)
+    return recipients
+
+class CampaignRunner:
+    def __init__(self, chain=None, portfolio=None, resume_text="", sender_name=None,
+                 concurrency=8, checkpoint_path=None):
+        """
+        Initialize a bulk campaign runner.
+
+        Args:
+            chain (Chain, optional): Chain shared by all workers
+            portfolio (Portfolio, optional): Portfolio shared by all workers
+            resume_text (str): Sender resume text used for every email
+            sender_name (str, optional): Name to be used in the signature
+            concurrency (int): Number of generations running at the same time
+            checkpoint_path (str, optional): JSONL file receiving every result, used to resume a campaign
+        """
+        self.chain = chain or get_resource('chain')
+        self.portfolio = portfolio if portfolio is not None else get_resource('portfolio')
+        self.resume_text = resume_text or ""
+        self.sender_name = sender_name
+        self.concurrency = max(1, int(concurrency))
+        self.checkpoint_path = checkpoint_path
+
+    def compact_checkpoint(self):
+        """
+        Rewrite the checkpoint with one successful result per recipient.
+
+        Failed results are dropped since those recipients are generated again,
+        so a retried recipient ends up with a single line.
+
+        Returns:
+            set: Completed recipient ids
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+
+        kept = {}
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if result.get('status') == 'ok':
+                    kept.setdefault(str(result.get('id')), line if line.endswith("\n") else line + "\n")
+
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.writelines(kept.values())
+        os.replace(temp_path, self.checkpoint_path)
+        return set(kept)
+
+    def generate(self, recipient):
+        """
+        Generate the email for a single recipient.
+
+        Args:
+            recipient (dict): Recipient as returned by load_recipients
+
+        Returns:
+            dict: Result with recipient fields, status, email, error and elapsed seconds
+        """
+        start = time.perf_counter()
+        result = dict(recipient, status='ok', email=None, error=None)
+        try:
+            job_description = load_job_description(recipient['job'])
+            email = generate_email_text(
+                self.resume_text,
+                job_description,
+                recipient['name'],
+                recipient['company'],
+                recipient['tone'],
+                self.sender_name,
+                chain=self.chain,
+                portfolio=self.portfolio
+            )
+            # Chain reports generation failures in the returned text
+            if email.startswith("Error generating email"):
+                result.update(status='error', error=email)
+            else:
+                result['email'] = email
+        except Exception as e:
+            logging.error(f"Error generating email for recipient {recipient['id']}: {e}")
+            result.update(status='error', error=str(e))
+        result['elapsed'] = round(time.perf_counter() - start, 3)
+        return result
+
+    async def run(self, recipients):
+        """
+        Generate emails for all recipients with a pool of concurrent workers.
+
+        Recipients already completed in the checkpoint are skipped and failed
+        ones are retried. Results are yielded as soon as each generation
+        finishes and appended to the checkpoint.
+
+        Args:
+            recipients (list): Recipients as returned by load_recipients
+
+        Yields:
+            dict: Generation result for one recipient
+        """
+        completed = self.compact_checkpoint()
+        queue = asyncio.Queue()
+        for recipient in recipients:
+            if recipient['id'] not in completed:
+                queue.put_nowait(recipient)
+        if completed:
+            logging.info(f"Resuming campaign: skipping {len(completed)} completed recipients")
+
+        results = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+
+        async def worker():
+            while True:
+                try:
+                    recipient = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await loop.run_in_executor(executor, self.generate, recipient)
+                await results.put(result)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.concurrency, queue.qsize()))]
+        remaining = queue.qsize()
+        checkpoint = open(self.checkpoint_path, 'a', encoding='utf-8') if self.checkpoint_path else None
+        try:
+            for _ in range(remaining):
+                result = await results.get()
+                if checkpoint:
+                    checkpoint.write(json.dumps(result) + "\n")
+                    checkpoint.flush()
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            if checkpoint:
+                checkpoint.close()
+            executor.shutdown(wait=False)
+
+def run_campaign(recipients, **kwargs):
+    """
+    Run a campaign to completion from synchronous code.
+
+    Args:
+        recipients (list): Recipients as returned by load_recipients
+        **kwargs: Arguments passed to CampaignRunner
+
+    Returns:
+        list: Generation results in completion order
+    """
+    runner = CampaignRunner(**kwargs)
+
+    async def collect():
+        return [result async for result in runner.run(recipients)]
+
+    return asyncio.run(collect())
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate cold emails for a list of recipients")
+    parser.add_argument('recipients', help="CSV or JSONL file with name, company, job and tone columns")
+    parser.add_argument('--output', default='campaign_results.jsonl', help="JSONL results file, also used as checkpoint")
+    parser.add_argument('--concurrency', type=int, default=8, help="Number of concurrent generations")
+    parser.add_argument('--resume-text', help="Text file with the sender resume")
+    parser.add_argument('--sender-name', help="Name to be used in the signature")
+    args = parser.parse_args()
+
+    resume_text = ""
+    if args.resume_text:
+        with open(args.resume_text, 'r', encoding='utf-8') as file:
+            resume_text = file.read()
+
+    recipients = load_recipients(args.recipients)
+    runner = CampaignRunner(
+        resume_text=resume_text,
+        sender_name=args.sender_name,
+        concurrency=args.concurrency,
+        checkpoint_path=args.output
+    )
+
+    async def report():
+        done = failed = 0
+        async for result in runner.run(recipients):
+            done += 1
+            failed += result['status'] != 'ok'
+            print(f"[{done}] {result['id']} {result['name']} ({result['company']}): {result['status']} in {result['elapsed']}s")
+        print(f"Finished {done} recipients, {failed} failed. Results in {args.output}")
+
+    asyncio.run(report())
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
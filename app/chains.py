@@ -1,18 +1,103 @@
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from langchain_groq import ChatGroq
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.exceptions import OutputParserException
 import logging
 
+from llm_cache import LLMCache
+from telemetry import increment, traced
+from llm_gateway import LLMGateway, LLM_FALLBACK_MODEL, LLM_LATENCY_SLO
+from context_builder import count_tokens, split_chunks
+
+# Start of the model's sign-off, replaced by the requested signature
+SIGNATURE_MARKER = "\nBest regards,"
+# Pages longer than this many tokens are extracted chunk by chunk
+JOB_CHUNK_TOKENS = int(os.getenv("JOB_CHUNK_TOKENS", 2000))
+# Chunk extractions running at the same time
+JOB_CHUNK_CONCURRENCY = int(os.getenv("JOB_CHUNK_CONCURRENCY", 4))
+# Leading description words that, with title and location, identify a job across chunks
+JOB_KEY_DESCRIPTION_WORDS = 12
+
+def _job_key(job):
+    """
+    Identity of an extracted job, used to drop jobs seen in several chunks.
+
+    Postings that share a title but differ in location or description, e.g. the
+    same role in two offices, keep separate keys.
+    """
+    def words(field):
+        return str(job.get(field) or '').lower().split()
+    key = (' '.join(words('title')), ' '.join(words('location')),
+           ' '.join(words('description')[:JOB_KEY_DESCRIPTION_WORDS]))
+    return key if any(key) else None
+
+def _marker_prefix_length(text):
+    """
+    Length of the longest suffix of text that is a proper prefix of SIGNATURE_MARKER.
+    """
+    for length in range(min(len(SIGNATURE_MARKER) - 1, len(text)), 0, -1):
+        if text.endswith(SIGNATURE_MARKER[:length]):
+            return length
+    return 0
+
 class Chain:
-    def __init__(self):
-        self.llm = ChatGroq(
+    def __init__(self, llm=None, cache=None, gateway=None):
+        """
+        Initialize the chain with a chat model.
+        
+        Args:
+            llm (optional): Chat model to use instead of ChatGroq, e.g. a local stand-in
+            cache (LLMCache, optional): Response cache, defaults to the on-disk LLMCache
+            gateway (LLMGateway, optional): Rate-governed access to the model, defaults to a
+                gateway over llm with LLM_FALLBACK_MODEL as fallback when LLM_LATENCY_SLO is set
+        """
+        self.llm = llm or ChatGroq(
             temperature=0, 
             groq_api_key=os.getenv("GROQ_API_KEY"), 
             model_name="llama-3.1-70b-versatile"
         )
+        self.model_name = getattr(self.llm, 'model_name', type(self.llm).__name__)
+        self.cache = cache if cache is not None else LLMCache()
+        
+        fallback_llm = None
+        if llm is None and LLM_LATENCY_SLO and LLM_FALLBACK_MODEL:
+            fallback_llm = ChatGroq(
+                temperature=0,
+                groq_api_key=os.getenv("GROQ_API_KEY"),
+                model_name=LLM_FALLBACK_MODEL
+            )
+        self.gateway = gateway or LLMGateway(self.llm, fallback_llm=fallback_llm)
 
+    def _invoke(self, prompt, variables, parser=None):
+        """
+        Run a prompt through the LLM gateway, serving identical requests from the response cache.
+        
+        Args:
+            prompt (PromptTemplate): Prompt to format
+            variables (dict): Values for the prompt's input variables
+            parser (optional): Output parser applied to the response; unparseable responses and
+                answers from the fallback model are not cached
+        
+        Returns:
+            Response text, or the parsed output when a parser is given
+        """
+        key = self.cache.make_key(self.model_name, prompt.template, variables)
+        content = self.cache.get(key)
+        cached = content is not None
+        increment('llm_cache_requests_total', result='hit' if cached else 'miss')
+        model_name = self.model_name
+        if not cached:
+            # Concurrent identical prompts share the key, so the gateway sends them upstream once
+            content, model_name = self.gateway.invoke(prompt.format(**variables), key=key)
+        
+        result = parser.parse(content) if parser else content
+        if not cached and model_name == self.model_name:
+            # The key names the primary model, a fallback answer must not be served under it
+            self.cache.set(key, content)
+        return result
+
+    @traced('extract_skills')
     def extract_skills(self, context):
         """
         Extract skills from the given context.
@@ -35,7 +120,7 @@ class Chain:
         )
         
         try:
-            skills_text = self.llm.invoke(skill_prompt.format(context=context)).content
+            skills_text = self._invoke(skill_prompt, {"context": context})
             # Convert the skills text into a list, clean up any whitespace
             skills_list = [skill.strip() for skill in skills_text.split(',') if skill.strip()]
             return skills_list
@@ -43,9 +128,10 @@ class Chain:
             logging.error(f"Error extracting skills: {e}")
             return []
 
-    def write_personalized_mail(self, context, job_description, links, tone='Professional', sender_name=None):
+    def _email_request(self, context, job_description, links, tone='Professional', sender_name=None,
+                       length='Standard'):
         """
-        Generate a personalized email based on comprehensive context.
+        Build the email prompt, its input variables and the signature.
         
         Args:
             context (str): Comprehensive context about the job and sender
@@ -53,9 +139,10 @@ class Chain:
             links (list): Relevant portfolio project links
             tone (str, optional): Email tone. Defaults to 'Professional'.
             sender_name (str, optional): Name to be used in the signature
+            length (str, optional): 'Short', 'Standard' or 'Detailed'. Defaults to 'Standard'.
         
         Returns:
-            str: Generated personalized email
+            tuple: Prompt template, input variables and signature
         """
         # Ensure links is a list, default to empty list if None
         links = links or []
@@ -71,11 +158,20 @@ class Chain:
         # Default to Professional if tone is not recognized
         tone_instruction = tone_instructions.get(tone, tone_instructions['Professional'])
         
+        # Define length-specific instructions
+        length_instructions = {
+            'Short': "Keeps the email brief (under 120 words)",
+            'Standard': "Keeps the email concise (under 250 words)",
+            'Detailed': "Covers the most relevant experience in more depth (under 400 words)"
+        }
+        length_instruction = length_instructions.get(length, length_instructions['Standard'])
+        
         # Prepare sender name for signature
         signature = f"\nBest regards,\n{sender_name.strip()}" if sender_name else "\nBest regards,"
         
         prompt_email = PromptTemplate(
-            input_variables=["context", "job_description", "links", "tone_instruction", "signature"],
+            input_variables=["context", "job_description", "links", "tone_instruction", "length_instruction",
+                             "signature"],
             template="""
             You are a professional email writer helping a job seeker craft a personalized cold email.
 
@@ -99,7 +195,7 @@ class Chain:
             4. Highlights 2-3 most relevant skills/experiences
             5. Shows genuine interest and value proposition
             6. Maintains the specified communication tone
-            7. Keeps the email concise (under 250 words)
+            7. {length_instruction}
 
             ### SIGNATURE REQUIREMENTS
             - STRICTLY USE ONLY THE PROVIDED SIGNATURE
@@ -117,21 +213,43 @@ class Chain:
             """
         )
         
-        # Create the email generation chain
-        email_chain = prompt_email | self.llm
+        variables = {
+            "context": context, 
+            "job_description": job_description, 
+            "links": str(links),
+            "tone_instruction": tone_instruction,
+            "length_instruction": length_instruction,
+            "signature": signature
+        }
+        return prompt_email, variables, signature
+
+    @traced('write_personalized_mail')
+    def write_personalized_mail(self, context, job_description, links, tone='Professional', sender_name=None,
+                                length='Standard'):
+        """
+        Generate a personalized email based on comprehensive context.
+        
+        Args:
+            context (str): Comprehensive context about the job and sender
+            job_description (str): Detailed job description
+            links (list): Relevant portfolio project links
+            tone (str, optional): Email tone. Defaults to 'Professional'.
+            sender_name (str, optional): Name to be used in the signature
+            length (str, optional): 'Short', 'Standard' or 'Detailed'. Defaults to 'Standard'.
+        
+        Returns:
+            str: Generated personalized email
+        """
+        prompt_email, variables, signature = self._email_request(
+            context, job_description, links, tone, sender_name, length
+        )
         
         try:
             # Generate the email with the specified tone
-            email = email_chain.invoke({
-                "context": context, 
-                "job_description": job_description, 
-                "links": str(links),
-                "tone_instruction": tone_instruction,
-                "signature": signature
-            })
+            email = self._invoke(prompt_email, variables)
             
             # Post-process to ensure only the signature is used
-            email_parts = email.content.split("\nBest regards,")
+            email_parts = email.split(SIGNATURE_MARKER)
             processed_email = email_parts[0] + signature
             
             return processed_email
@@ -139,17 +257,70 @@ class Chain:
             print(f"Error generating email: {e}")
             return f"Error generating email: {e}"
 
-    def extract_jobs(self, text):
+    @traced('stream_personalized_mail')
+    def stream_personalized_mail(self, context, job_description, links, tone='Professional', sender_name=None,
+                                 length='Standard'):
         """
-        Extract job details from text.
+        Generate a personalized email, yielding text as the model produces it.
+        
+        Text from the model's own sign-off onwards is dropped and replaced with
+        the provided signature, so the concatenated chunks match the output of
+        write_personalized_mail.
         
         Args:
-            text (str): Text containing job information
+            context (str): Comprehensive context about the job and sender
+            job_description (str): Detailed job description
+            links (list): Relevant portfolio project links
+            tone (str, optional): Email tone. Defaults to 'Professional'.
+            sender_name (str, optional): Name to be used in the signature
+            length (str, optional): 'Short', 'Standard' or 'Detailed'. Defaults to 'Standard'.
         
-        Returns:
-            list: Extracted job details
+        Yields:
+            str: Chunks of the generated email
         """
-        job_extraction_prompt = PromptTemplate(
+        prompt_email, variables, signature = self._email_request(
+            context, job_description, links, tone, sender_name, length
+        )
+        key = self.cache.make_key(self.model_name, prompt_email.template, variables)
+        
+        cached = self.cache.get(key)
+        increment('llm_cache_requests_total', result='hit' if cached is not None else 'miss')
+        if cached is not None:
+            yield cached.split(SIGNATURE_MARKER)[0] + signature
+            return
+        
+        emitted = []
+        pending = ""
+        model_name = self.model_name
+        try:
+            for chunk, model_name in self.gateway.stream(prompt_email.format(**variables), key=key):
+                pending += chunk
+                marker_index = pending.find(SIGNATURE_MARKER)
+                if marker_index != -1:
+                    # Model reached its sign-off, nothing after it is kept
+                    pending = pending[:marker_index]
+                    break
+                
+                # Hold back a tail that could be the start of the sign-off marker
+                held = _marker_prefix_length(pending)
+                if len(pending) > held:
+                    text = pending[:len(pending) - held]
+                    pending = pending[len(pending) - held:]
+                    emitted.append(text)
+                    yield text
+            
+            if pending:
+                emitted.append(pending)
+                yield pending
+            yield signature
+            if model_name == self.model_name:
+                self.cache.set(key, "".join(emitted))
+        except Exception as e:
+            print(f"Error generating email: {e}")
+            yield f"Error generating email: {e}"
+
+    def _job_prompt(self):
+        return PromptTemplate(
             input_variables=["text"],
             template="""
             Extract key job details from the following text:
@@ -157,19 +328,87 @@ class Chain:
 
             Return a JSON list of job details with keys:
             - title: Job title
+            - location: Job location, empty if not stated
             - skills: List of required skills
             - description: Brief job description
             """
         )
+
+    @traced('extract_jobs')
+    def extract_jobs(self, text):
+        """
+        Extract job details from text.
+        
+        Text longer than JOB_CHUNK_TOKENS is extracted chunk by chunk with
+        extract_jobs_chunked.
+        
+        Args:
+            text (str): Text containing job information
         
-        job_chain = job_extraction_prompt | self.llm | JsonOutputParser()
+        Returns:
+            list: Extracted job details
+        """
+        if count_tokens(text) > JOB_CHUNK_TOKENS:
+            return list(self.extract_jobs_chunked(text))
         
         try:
-            res = job_chain.invoke({"text": text})
+            res = self._invoke(self._job_prompt(), {"text": text}, parser=JsonOutputParser())
             return res if isinstance(res, list) else [res]
         except Exception as e:
             print(f"Error extracting jobs: {e}")
             return []
 
+    @traced('extract_jobs_chunked')
+    def extract_jobs_chunked(self, text, chunk_tokens=None, max_workers=None):
+        """
+        Extract job details from a large page, yielding jobs as chunks complete.
+        
+        The text is split along line and sentence boundaries into chunks of
+        about chunk_tokens tokens, which are extracted concurrently. Each
+        chunk's response is parsed on its own, so a malformed response only
+        loses the jobs of that chunk. Jobs found in several chunks are
+        yielded once.
+        
+        Args:
+            text (str): Text containing job information
+            chunk_tokens (int, optional): Tokens per chunk, defaults to JOB_CHUNK_TOKENS
+            max_workers (int, optional): Chunks extracted at the same time, defaults to JOB_CHUNK_CONCURRENCY
+        
+        Yields:
+            dict: Extracted job details, in completion order
+        """
+        chunks = [chunk for chunk, _ in split_chunks(text, chunk_tokens or JOB_CHUNK_TOKENS)]
+        if not chunks:
+            return
+        prompt = self._job_prompt()
+        
+        def extract(chunk):
+            res = self._invoke(prompt, {"text": chunk}, parser=JsonOutputParser())
+            return res if isinstance(res, list) else [res]
+        
+        seen = set()
+        executor = ThreadPoolExecutor(max_workers=min(len(chunks), max_workers or JOB_CHUNK_CONCURRENCY))
+        futures = {executor.submit(extract, chunk): index for index, chunk in enumerate(chunks)}
+        try:
+            for future in as_completed(futures):
+                try:
+                    jobs = future.result()
+                except Exception as e:
+                    logging.error(f"Error extracting jobs from chunk {futures[future] + 1}/{len(chunks)}: {e}")
+                    continue
+                for job in jobs:
+                    if not isinstance(job, dict):
+                        continue
+                    key = _job_key(job)
+                    if not key or key in seen:
+                        continue
+                    seen.add(key)
+                    yield job
+        finally:
+            # Stop chunks that have not started yet when the caller stops reading
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
 if __name__ == "__main__":
     print(os.getenv("GROQ_API_KEY"))
\ No newline at end of file
@@ -0,0 +1,229 @@
+import os
+import re
+import math
+import logging
+import threading
+from collections import Counter
+
+from import_timing import lazy_import
+
+# Total prompt tokens spent on resume and job description content
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))
+# Target size of a single chunk
+CHUNK_TOKENS = int(os.getenv("CONTEXT_CHUNK_TOKENS", 120))
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+# Rough BPE token estimate used when no tiktoken encoding can be loaded
+PIECE_RE = re.compile(r"\w+|[^\w\s]")
+SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'is', 'it', 'of',
+    'on', 'or', 'our', 'that', 'the', 'this', 'to', 'we', 'will', 'with', 'you', 'your', 'i', 'my', 'me'
+}
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+def _get_encoding():
+    global _encoding
+    with _encoding_lock:
+        if _encoding is None:
+            try:
+                _encoding = lazy_import('tiktoken').get_encoding("cl100k_base")
+            except Exception as e:
+                # The encoding file is downloaded on first use, which fails offline
+                logging.warning(f"tiktoken unavailable, estimating token counts: {e}")
+                _encoding = False
+        return _encoding
+
+def count_tokens(text):
+    """
+    Count the tokens of a text with tiktoken, or estimate them if it is unavailable.
+
+    Args:
+        text (str): Text to measure
+
+    Returns:
+        int: Number of tokens
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(PIECE_RE.findall(text))
+
+def _split_tokens(text, chunk_tokens):
+    """
+    Hard-split text into pieces of at most chunk_tokens tokens on token boundaries.
+
+    Returns:
+        list: (piece text, token count) pairs
+    """
+    encoding = _get_encoding()
+    if encoding:
+        tokens = encoding.encode(text, disallowed_special=())
+        pieces = [encoding.decode(tokens[start:start + chunk_tokens])
+                  for start in range(0, len(tokens), chunk_tokens)]
+    else:
+        starts = [match.start() for match in PIECE_RE.finditer(text)][::chunk_tokens]
+        pieces = [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)])]
+    pieces = [piece.strip() for piece in pieces]
+    return [(piece, count_tokens(piece)) for piece in pieces if piece]
+
+def split_chunks(text, chunk_tokens=None):
+    """
+    Split text into chunks of about chunk_tokens tokens along line and sentence boundaries.
+
+    Sentences that repeat earlier ones, within a line or across lines, are
+    dropped. Sentences longer than chunk_tokens, e.g. minified text without
+    punctuation, are cut on token boundaries so no chunk exceeds the target.
+
+    Args:
+        text (str): Text to split
+        chunk_tokens (int, optional): Target chunk size, defaults to CHUNK_TOKENS
+
+    Returns:
+        list: (chunk text, token count) pairs in document order
+    """
+    chunk_tokens = chunk_tokens or CHUNK_TOKENS
+    units = []
+    seen = set()
+    for line in (text or "").splitlines():
+        line = ' '.join(line.split())
+        if not line:
+            continue
+        for sentence in SENTENCE_RE.split(line):
+            key = _dedupe_key(sentence)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            tokens = count_tokens(sentence)
+            units.extend(_split_tokens(sentence, chunk_tokens) if tokens > chunk_tokens else [(sentence, tokens)])
+
+    chunks = []
+    current, current_tokens = [], 0
+    for unit, tokens in units:
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append((' '.join(current), current_tokens))
+            current, current_tokens = [], 0
+        current.append(unit)
+        current_tokens += tokens
+    if current:
+        chunks.append((' '.join(current), current_tokens))
+    return chunks
+
+def _terms(text):
+    return [word for word in WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+def _dedupe_key(text):
+    return ' '.join(WORD_RE.findall(text.lower()))
+
+class ContextBuilder:
+    def __init__(self, token_budget=None, chunk_tokens=None, job_share=0.5):
+        """
+        Packs the most relevant resume and job description chunks into a token budget.
+
+        Args:
+            token_budget (int, optional): Tokens for resume and job description together,
+                defaults to CONTEXT_TOKEN_BUDGET
+            chunk_tokens (int, optional): Target chunk size, defaults to CHUNK_TOKENS
+            job_share (float, optional): Part of the budget reserved for the job description;
+                budget one side leaves unused goes to the other
+        """
+        self.token_budget = token_budget or CONTEXT_TOKEN_BUDGET
+        self.chunk_tokens = chunk_tokens or CHUNK_TOKENS
+        self.job_share = job_share
+
+    def _score(self, chunks, query_counts, idf):
+        # TF-IDF cosine between each chunk and the query document
+        query_weights = {term: count * idf.get(term, 1.0) for term, count in query_counts.items()}
+        query_norm = math.sqrt(sum(weight * weight for weight in query_weights.values())) or 1.0
+        scores = []
+        for text, _ in chunks:
+            counts = Counter(_terms(text))
+            weights = {term: count * idf.get(term, 1.0) for term, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1.0
+            dot = sum(weight * query_weights.get(term, 0.0) for term, weight in weights.items())
+            scores.append(dot / (norm * query_norm))
+        return scores
+
+    @staticmethod
+    def _pack(chunks, scores, budget, seen):
+        """
+        Greedily take the best scoring chunks that fit, skipping duplicates, in document order.
+        """
+        selected = []
+        used = 0
+        for index in sorted(range(len(chunks)), key=lambda i: (-scores[i], i)):
+            text, tokens = chunks[index]
+            key = _dedupe_key(text)
+            if not key or key in seen or used + tokens > budget:
+                continue
+            seen.add(key)
+            selected.append(index)
+            used += tokens
+        return ' '.join(chunks[index][0] for index in sorted(selected)), used
+
+    def build(self, resume_text, job_description):
+        """
+        Build the resume and job description context for a prompt.
+
+        Resume chunks are ranked by relevance to the job description and job
+        description chunks by relevance to the resume, with earlier job chunks
+        (usually title and requirements) slightly preferred. Repeated chunks,
+        such as navigation or footers on careers pages, are kept once.
+
+        Args:
+            resume_text (str): Full resume text
+            job_description (str): Full job description
+
+        Returns:
+            dict: 'resume' and 'job_description' texts and their total 'tokens'
+        """
+        # Keep chunks small relative to the budget so packing has room to choose
+        chunk_tokens = min(self.chunk_tokens, max(20, self.token_budget // 8))
+        resume_chunks = split_chunks(resume_text, chunk_tokens)
+        job_chunks = split_chunks(job_description, chunk_tokens)
+
+        # Inverse document frequency over all chunks, so boilerplate terms weigh less
+        document_frequency = Counter()
+        for text, _ in resume_chunks + job_chunks:
+            document_frequency.update(set(_terms(text)))
+        total = len(resume_chunks) + len(job_chunks) or 1
+        idf = {term: math.log((1 + total) / (1 + frequency)) + 1 for term, frequency in document_frequency.items()}
+
+        resume_scores = self._score(resume_chunks, Counter(_terms(job_description or "")), idf)
+        job_scores = self._score(job_chunks, Counter(_terms(resume_text or "")), idf)
+        job_scores = [score + 0.1 / (1 + index) for index, score in enumerate(job_scores)]
+
+        job_tokens = sum(tokens for _, tokens in job_chunks)
+        resume_tokens = sum(tokens for _, tokens in resume_chunks)
+        job_budget = int(self.token_budget * self.job_share)
+        resume_budget = self.token_budget - job_budget
+        # Hand budget one side cannot use to the other
+        if job_tokens < job_budget:
+            resume_budget += job_budget - job_tokens
+            job_budget = job_tokens
+        elif resume_tokens < resume_budget:
+            job_budget += resume_budget - resume_tokens
+            resume_budget = resume_tokens
+
+        seen = set()
+        job_text, job_used = self._pack(job_chunks, job_scores, job_budget, seen)
+        resume_text, resume_used = self._pack(resume_chunks, resume_scores, resume_budget, seen)
+        return {'resume': resume_text, 'job_description': job_text, 'tokens': job_used + resume_used}
+
+def build_context(resume_text, job_description, token_budget=None):
+    """
+    Build a token-budgeted resume and job description context.
+
+    Args:
+        resume_text (str): Full resume text
+        job_description (str): Full job description
+        token_budget (int, optional): Token budget, defaults to CONTEXT_TOKEN_BUDGET
+
+    Returns:
+        dict: 'resume' and 'job_description' texts and their total 'tokens'
+    """
+    return ContextBuilder(token_budget=token_budget).build(resume_text, job_description)
@@ -0,0 +1,136 @@
+import io
+import os
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import PyPDF2
+import docx
+
+from telemetry import traced
+
+# Upload limits, so a single huge document can't stall a worker
+MAX_DOCUMENT_BYTES = int(os.getenv("RESUME_MAX_BYTES", 10 * 1024 * 1024))
+MAX_DOCUMENT_PAGES = int(os.getenv("RESUME_MAX_PAGES", 50))
+# PDFs with at least this many pages are extracted across worker processes
+PARALLEL_PAGE_THRESHOLD = int(os.getenv("RESUME_PARALLEL_PAGES", 16))
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc')
+
+class DocumentTooLargeError(ValueError):
+    pass
+
+POOL_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_process_pool():
+    """
+    Shared process pool for CPU-bound document work, created on first use.
+
+    Returns:
+        ProcessPoolExecutor: Pool with POOL_WORKERS processes
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS)
+        return _pool
+
+def _extract_page_range(data, start, stop):
+    """
+    Extract the text of pages [start, stop) from PDF bytes.
+    """
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def extract_page_texts(data, max_pages=None, parallel_threshold=None):
+    """
+    Extract the text layer of each PDF page, fanning long documents out across worker processes.
+
+    Args:
+        data (bytes): PDF file content
+        max_pages (int, optional): Pages to read at most, defaults to MAX_DOCUMENT_PAGES
+        parallel_threshold (int, optional): Page count from which the process pool is used
+
+    Returns:
+        list: Text of each extracted page, empty for pages without a text layer
+    """
+    max_pages = MAX_DOCUMENT_PAGES if max_pages is None else max_pages
+    parallel_threshold = PARALLEL_PAGE_THRESHOLD if parallel_threshold is None else parallel_threshold
+
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    page_count = len(reader.pages)
+    if page_count > max_pages:
+        logging.warning(f"PDF has {page_count} pages, extracting the first {max_pages}")
+        page_count = max_pages
+
+    if page_count < parallel_threshold or POOL_WORKERS < 2:
+        return [reader.pages[index].extract_text() or "" for index in range(page_count)]
+
+    pool = get_process_pool()
+    step = -(-page_count // POOL_WORKERS)
+    futures = [
+        pool.submit(_extract_page_range, data, start, min(start + step, page_count))
+        for start in range(0, page_count, step)
+    ]
+    return [text for future in futures for text in future.result()]
+
+def extract_pdf_text(data, max_pages=None, parallel_threshold=None):
+    """
+    Extract text from PDF bytes, fanning long documents out across worker processes.
+
+    Args:
+        data (bytes): PDF file content
+        max_pages (int, optional): Pages to read at most, defaults to MAX_DOCUMENT_PAGES
+        parallel_threshold (int, optional): Page count from which the process pool is used
+
+    Returns:
+        str: Text of the extracted pages
+    """
+    return "".join(extract_page_texts(data, max_pages=max_pages, parallel_threshold=parallel_threshold))
+
+def extract_docx_text(data):
+    """
+    Extract paragraph text from DOCX bytes.
+
+    Args:
+        data (bytes): DOCX file content
+
+    Returns:
+        str: Paragraphs separated by newlines
+    """
+    document = docx.Document(io.BytesIO(data))
+    return "\n".join(paragraph.text for paragraph in document.paragraphs)
+
+@traced('extract_text')
+def extract_text(data, filename, max_bytes=None, max_pages=None):
+    """
+    Extract text from an uploaded document held in memory.
+
+    Args:
+        data (bytes): File content
+        filename (str): Original file name, used to pick the parser
+        max_bytes (int, optional): Largest accepted upload, defaults to MAX_DOCUMENT_BYTES
+        max_pages (int, optional): Pages to read at most, defaults to MAX_DOCUMENT_PAGES
+
+    Returns:
+        str: Extracted text
+
+    Raises:
+        DocumentTooLargeError: If the file exceeds max_bytes
+        ValueError: If the file type is not supported
+    """
+    max_bytes = MAX_DOCUMENT_BYTES if max_bytes is None else max_bytes
+    if len(data) > max_bytes:
+        raise DocumentTooLargeError(
+            f"File is {len(data) / 1024 / 1024:.1f} MB, the limit is {max_bytes / 1024 / 1024:.1f} MB"
+        )
+
+    file_extension = os.path.splitext(filename)[1].lower()
+    if file_extension == '.pdf':
+        return extract_pdf_text(data, max_pages=max_pages)
+    if file_extension in ('.docx', '.doc'):
+        return extract_docx_text(data)
+    raise ValueError(f"Unsupported file type: {file_extension}")
@@ -0,0 +1,189 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import validators
+
+from context_builder import build_context
+from resources import get_resource
+from skill_extractor import SKILL_EXTRACTION, get_local_extractor
+from telemetry import traced
+
+# Variants generated at the same time by generate_email_variants
+VARIANT_CONCURRENCY = int(os.getenv("VARIANT_CONCURRENCY", 4))
+
+@traced('load_job_description')
+def load_job_description(url_or_text):
+    """
+    Resolve a job description from one or more URLs or direct text input.
+
+    Args:
+        url_or_text (str): Job posting URL, several whitespace-separated URLs, or the job description itself
+
+    Returns:
+        str: Job description text, postings separated by blank lines
+
+    Raises:
+        Exception: If no URL could be loaded
+    """
+    if not url_or_text:
+        return ""
+
+    # Check if input is one or more valid URLs
+    parts = url_or_text.split()
+    if parts and all(validators.url(part) for part in parts):
+        fetcher = get_resource('job_fetcher')
+        if len(parts) == 1:
+            return fetcher.fetch_text(parts[0])
+
+        results = fetcher.fetch_many(parts)
+        texts = [text for _, text, _ in results if text]
+        if not texts:
+            raise results[0][2]
+        return "\n\n".join(texts)
+
+    # If not a URL, treat as direct text input
+    return url_or_text
+
+def _prepare_email(resume_text, job_description, recipient_name, company_name, chain, portfolio,
+                   skill_extraction=None):
+    """
+    Build the generation context and find relevant portfolio links.
+
+    The resume and job description are packed into a token budget, keeping
+    the chunks most relevant to each other; the job description is passed to
+    the email prompt once, separately from the context.
+
+    Args:
+        skill_extraction (str, optional): 'llm' or 'local', defaults to SKILL_EXTRACTION
+
+    Returns:
+        tuple: Full context, packed job description and portfolio links
+    """
+    packed = build_context(resume_text or "", job_description or "")
+
+    # Combine Context
+    full_context = f"""
+    Job Context:
+    - Recipient Name: {recipient_name}
+    - Company: {company_name}
+
+    Resume Highlights: {packed['resume']}
+    """
+
+    # Extract skills with the chain, or locally against the portfolio vocabulary to save an LLM call
+    skill_context = f"{full_context}\n    Job Description: {packed['job_description']}"
+    if (skill_extraction or SKILL_EXTRACTION) == 'local':
+        skills = get_local_extractor(portfolio).extract_skills(skill_context)
+    else:
+        skills = chain.extract_skills(skill_context)
+
+    # Find Relevant Portfolio Links
+    links = portfolio.query_links(skills)
+
+    return full_context, packed['job_description'], links
+
+def _resolve_components(chain, portfolio):
+    # Fall back to the process-wide shared Chain and Portfolio
+    chain = chain or get_resource('chain')
+    if portfolio is None:
+        portfolio = get_resource('portfolio')
+    return chain, portfolio
+
+@traced('generate_email')
+def generate_email_text(resume_text, job_description, recipient_name, company_name, email_tone, sender_name=None,
+                        chain=None, portfolio=None, skill_extraction=None, email_length='Standard'):
+    """
+    Generate personalized email text based on input parameters
+
+    Args:
+        chain (Chain, optional): Chain to use instead of the shared one
+        portfolio (Portfolio, optional): Portfolio to use instead of the shared one
+        skill_extraction (str, optional): 'llm' or 'local', defaults to SKILL_EXTRACTION
+        email_length (str, optional): 'Short', 'Standard' or 'Detailed'
+    """
+    chain, portfolio = _resolve_components(chain, portfolio)
+    full_context, job_description, links = _prepare_email(
+        resume_text, job_description, recipient_name, company_name, chain, portfolio, skill_extraction
+    )
+
+    # Generate Email
+    email = chain.write_personalized_mail(
+        context=full_context,
+        job_description=job_description,
+        links=links,
+        tone=email_tone,
+        sender_name=sender_name,  # Pass sender name to the method
+        length=email_length
+    )
+
+    return email
+
+@traced('stream_email')
+def stream_email_text(resume_text, job_description, recipient_name, company_name, email_tone, sender_name=None,
+                      chain=None, portfolio=None, skill_extraction=None, email_length='Standard'):
+    """
+    Generate personalized email text, yielding chunks as the model produces them.
+
+    Takes the same arguments as generate_email_text.
+
+    Yields:
+        str: Chunks of the generated email
+    """
+    chain, portfolio = _resolve_components(chain, portfolio)
+    full_context, job_description, links = _prepare_email(
+        resume_text, job_description, recipient_name, company_name, chain, portfolio, skill_extraction
+    )
+
+    yield from chain.stream_personalized_mail(
+        context=full_context,
+        job_description=job_description,
+        links=links,
+        tone=email_tone,
+        sender_name=sender_name,
+        length=email_length
+    )
+
+@traced('generate_email_variants')
+def generate_email_variants(resume_text, job_description, recipient_name, company_name, variants, sender_name=None,
+                            chain=None, portfolio=None, skill_extraction=None, max_workers=None):
+    """
+    Generate several tone/length variants of an email, yielding each as it completes.
+
+    The context, skills and portfolio links are worked out once and shared,
+    only the email itself is generated per variant, all variants at the same
+    time, so the wall time is close to that of a single email.
+
+    Args:
+        variants (list): (tone, length) pairs, e.g. [('Professional', 'Standard'), ('Casual', 'Short')]
+        max_workers (int, optional): Variants generated at the same time, defaults to VARIANT_CONCURRENCY
+
+    Takes the other arguments of generate_email_text.
+
+    Yields:
+        dict: Variant with index (position in variants), tone, length and email, in completion order
+    """
+    chain, portfolio = _resolve_components(chain, portfolio)
+    full_context, job_description, links = _prepare_email(
+        resume_text, job_description, recipient_name, company_name, chain, portfolio, skill_extraction
+    )
+
+    variants = list(variants)
+    if not variants:
+        return
+
+    def generate(tone, length):
+        return chain.write_personalized_mail(
+            context=full_context,
+            job_description=job_description,
+            links=links,
+            tone=tone,
+            sender_name=sender_name,
+            length=length
+        )
+
+    with ThreadPoolExecutor(max_workers=min(len(variants), max_workers or VARIANT_CONCURRENCY)) as executor:
+        futures = {executor.submit(generate, tone, length): index for index, (tone, length) in enumerate(variants)}
+        for future in as_completed(futures):
+            index = futures[future]
+            tone, length = variants[index]
+            yield {'index': index, 'tone': tone, 'length': length, 'email': future.result()}
@@ -0,0 +1,123 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import importlib.util
+import subprocess
+import threading
+
+# Seconds spent importing each lazily loaded module in this process
+IMPORT_TIMES = {}
+_lock = threading.Lock()
+
+def lazy_import(name):
+    """
+    Import a module on first use and record how long the import took.
+
+    Args:
+        name (str): Module name, e.g. 'spacy' or 'sklearn.feature_extraction.text'
+
+    Returns:
+        module: The imported module
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        start = time.perf_counter()
+        module = importlib.import_module(name)
+        elapsed = time.perf_counter() - start
+        IMPORT_TIMES[name] = elapsed
+        logging.info(f"Lazy import of {name} took {elapsed:.2f}s")
+        return module
+
+def modules_available(names):
+    """
+    Check that modules can be imported without importing them.
+
+    Args:
+        names (list): Top-level module names
+
+    Returns:
+        bool: True if every module is installed
+    """
+    return all(importlib.util.find_spec(name) is not None for name in names)
+
+def import_time_report():
+    """
+    Report lazy imports done by this process so far.
+
+    Returns:
+        list: (module, seconds) pairs, slowest first
+    """
+    return sorted(IMPORT_TIMES.items(), key=lambda item: item[1], reverse=True)
+
+# Lines of `python -X importtime` output: "import time: <self us> | <cumulative us> | <indent><module>"
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def profile_imports(module_name, python=sys.executable, cwd=None):
+    """
+    Measure the cold import cost of a module in a fresh interpreter.
+
+    Runs `python -X importtime -c "import <module>"` and aggregates the
+    cumulative cost of every top-level package it pulls in.
+
+    Args:
+        module_name (str): Module to import, e.g. 'main'
+        python (str, optional): Interpreter to use
+        cwd (str, optional): Working directory, defaults to the app directory
+
+    Returns:
+        dict: 'total_seconds' for the whole import and 'packages', a list of
+            (package, cumulative seconds) pairs, slowest first
+    """
+    cwd = cwd or os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True
+    )
+
+    packages = {}
+    for line in process.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # Nesting is shown by two extra spaces per level after the first separator space
+        if len(indent) <= 1:
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + cumulative / 1e6
+
+    if process.returncode != 0:
+        logging.warning(f"Importing {module_name} failed: {process.stderr.strip().splitlines()[-1:]}")
+
+    ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {'total_seconds': sum(packages.values()), 'packages': ranked}
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-package cold import cost")
+    parser.add_argument('module', nargs='?', default='main', help="Module to import from the app directory")
+    parser.add_argument('--top', type=int, default=20, help="Number of packages to show")
+    parser.add_argument('--json', help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    report = profile_imports(args.module)
+    print(f"Cold import of {args.module}: {report['total_seconds']:.2f}s")
+    for package, seconds in report['packages'][:args.top]:
+        print(f"{seconds:8.3f}s  {package}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump({'module': args.module, **report}, file, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+import os
+import re
+import json
+import time
+import codecs
+import hashlib
+import itertools
+import logging
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import html_to_text
+
+# Leading bytes searched for a <meta charset> when the response declares none
+CHARSET_SNIFF_BYTES = 4096
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_:.-]+)', re.I)
+
+def _known_encoding(name):
+    try:
+        return codecs.lookup(name).name
+    except (LookupError, TypeError):
+        return None
+
+def sniff_encoding(content_type, head):
+    """
+    Work out the encoding of an HTML response from its first bytes.
+
+    requests falls back to ISO-8859-1 for text/html without a charset, which
+    garbles the UTF-8 most pages are served in, so an undeclared charset is
+    taken from the page's <meta charset> tag, else detected from the bytes.
+
+    Args:
+        content_type (str): Content-Type header, may be empty
+        head (bytes): Start of the body
+
+    Returns:
+        str: Codec name
+    """
+    declared = requests.utils.get_encoding_from_headers({'content-type': content_type or ''})
+    if declared and 'charset' in (content_type or '').lower():
+        encoding = _known_encoding(declared)
+        if encoding:
+            return encoding
+    match = META_CHARSET_RE.search(head)
+    encoding = match and _known_encoding(match.group(1).decode('ascii', 'ignore'))
+    if encoding:
+        return encoding
+    detected = _known_encoding(requests.compat.chardet.detect(head)['encoding']) if head else None
+    # A head that is plain ASCII says nothing about the rest of the page, UTF-8 covers it
+    return detected if detected and detected != 'ascii' else 'utf-8'
+
+class JobFetcher:
+    def __init__(self, cache_dir=None, timeout=10, max_age=300, pool_size=10, retries=2):
+        """
+        HTTP fetcher for job postings with a shared session and an on-disk cache.
+
+        Args:
+            cache_dir (str, optional): Cache directory, defaults to JOB_CACHE_DIR or .cache/job_pages
+            timeout (float, optional): Connect and read timeout in seconds
+            max_age (float, optional): Seconds a cached page is served without revalidation
+            pool_size (int, optional): Connections kept open per host
+            retries (int, optional): Retries for connection errors and 502/503/504 responses
+        """
+        self.cache_dir = cache_dir or os.getenv("JOB_CACHE_DIR", os.path.join(".cache", "job_pages"))
+        self.timeout = timeout
+        self.max_age = max_age
+        self.pool_size = pool_size
+
+        self.session = requests.Session()
+        retry = Retry(total=retries, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                      allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers['User-Agent'] = os.getenv('USER_AGENT', 'ColdEmailGenerator/1.0')
+
+    def _cache_paths(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.html"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_meta(self, url):
+        _, meta_path = self._cache_paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, url, meta):
+        # Write to a temporary file first so readers never see a partial entry
+        _, meta_path = self._cache_paths(url)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                json.dump(meta, file)
+            os.replace(temp_path, meta_path)
+        except OSError as e:
+            logging.warning(f"Could not cache {url}: {e}")
+
+    def _iter_cached(self, url, chunk_size):
+        body_path, _ = self._cache_paths(url)
+        with open(body_path, 'r', encoding='utf-8') as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def _iter_response(self, url, response, chunk_size):
+        # Stream the body to the caller while writing it to the cache
+        body_path, _ = self._cache_paths(url)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+                raw = response.iter_content(chunk_size=chunk_size)
+                head = b''
+                for data in raw:
+                    head += data
+                    if len(head) >= CHARSET_SNIFF_BYTES:
+                        break
+                decoder = codecs.getincrementaldecoder(
+                    sniff_encoding(response.headers.get('Content-Type'), head[:CHARSET_SNIFF_BYTES])
+                )(errors='replace')
+                for data in itertools.chain([head], raw):
+                    chunk = decoder.decode(data)
+                    if chunk:
+                        file.write(chunk)
+                        yield chunk
+                chunk = decoder.decode(b'', final=True)
+                if chunk:
+                    file.write(chunk)
+                    yield chunk
+            os.replace(temp_path, body_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        finally:
+            response.close()
+        self._write_meta(url, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': time.time()
+        })
+
+    def iter_html(self, url, chunk_size=65536):
+        """
+        Stream a page's HTML in chunks, revalidating the cached copy with a conditional GET.
+
+        Args:
+            url (str): Page URL
+            chunk_size (int, optional): Bytes read per chunk
+
+        Yields:
+            str: Chunks of page HTML
+
+        Raises:
+            requests.RequestException: If the page could not be fetched
+        """
+        meta = self._read_meta(url)
+        body_path, _ = self._cache_paths(url)
+        if meta and not os.path.exists(body_path):
+            meta = None
+        if meta and time.time() - meta.get('fetched_at', 0) < self.max_age:
+            yield from self._iter_cached(url, chunk_size)
+            return
+
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        if response.status_code == 304 and meta:
+            response.close()
+            meta['fetched_at'] = time.time()
+            self._write_meta(url, meta)
+            yield from self._iter_cached(url, chunk_size)
+            return
+
+        if not response.ok:
+            response.close()
+            response.raise_for_status()
+        yield from self._iter_response(url, response, chunk_size)
+
+    def fetch_html(self, url):
+        """
+        Fetch a page, revalidating the cached copy with a conditional GET.
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            str: Page HTML
+
+        Raises:
+            requests.RequestException: If the page could not be fetched
+        """
+        return ''.join(self.iter_html(url))
+
+    def fetch_text(self, url):
+        """
+        Fetch a job posting and return its visible text.
+
+        The page is normalized while it streams in, without holding the whole HTML in memory.
+
+        Args:
+            url (str): Job posting URL
+
+        Returns:
+            str: Visible page text, one line per block element
+        """
+        return html_to_text(self.iter_html(url))
+
+    def fetch_many(self, urls, max_workers=None):
+        """
+        Fetch several job postings concurrently.
+
+        Args:
+            urls (list): Job posting URLs
+            max_workers (int, optional): Concurrent requests, defaults to the connection pool size
+
+        Returns:
+            list: (url, text, error) tuples in the order of urls; text is None when the fetch failed
+        """
+        def fetch(url):
+            try:
+                return url, self.fetch_text(url), None
+            except Exception as e:
+                logging.warning(f"Could not fetch {url}: {e}")
+                return url, None, e
+
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            return list(executor.map(fetch, urls))
@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+class LLMCache:
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=5000, bypass=None, clock=None):
+        """
+        Content-addressed on-disk cache for LLM responses.
+
+        Args:
+            path (str, optional): SQLite file, defaults to LLM_CACHE_PATH or .cache/llm_cache.sqlite3
+            ttl (float, optional): Seconds an entry stays valid, None to never expire
+            max_entries (int, optional): Entries kept before least recently used ones are evicted
+            bypass (bool, optional): Skip the cache entirely, defaults to LLM_CACHE_BYPASS
+            clock (callable, optional): Current time in seconds for expiry and recency, defaults to time.time
+        """
+        self.path = path or os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if bypass is None:
+            bypass = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+        self.bypass = bypass
+        self.clock = clock or time.time
+        self.hits = 0
+        self.misses = 0
+        self._entries = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model_name, template, variables):
+        """
+        Build the cache key for a prompt.
+
+        Args:
+            model_name (str): Name of the model answering the prompt
+            template (str): Prompt template
+            variables (dict): Values the template is formatted with
+
+        Returns:
+            str: SHA-256 hex digest of the request
+        """
+        payload = json.dumps(
+            {'model': model_name, 'template': template, 'variables': variables},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+            self._conn.commit()
+            self._entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return self._conn
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            str: Cached response, or None on a miss
+        """
+        if self.bypass:
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT value, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+                now = self.clock()
+                if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    conn.commit()
+                    self._entries -= 1
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logging.warning(f"LLM cache lookup failed: {e}")
+            return None
+
+    def set(self, key, value):
+        """
+        Store a response, evicting least recently used entries when the cache is full.
+
+        Args:
+            key (str): Key from make_key
+            value (str): Response text
+        """
+        if self.bypass:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                now = self.clock()
+                exists = conn.execute("SELECT 1 FROM responses WHERE key = ?", (key,)).fetchone()
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                if not exists:
+                    self._entries += 1
+                overflow = self._entries - self.max_entries
+                if overflow > 0:
+                    conn.execute(
+                        "DELETE FROM responses WHERE key IN "
+                        "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                        (overflow,)
+                    )
+                    self._entries -= overflow
+                conn.commit()
+        except sqlite3.Error as e:
+            logging.warning(f"LLM cache write failed: {e}")
+
+    def clear(self):
+        """
+        Remove all cached responses and reset the counters.
+        """
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+            self._entries = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Get cache usage counters.
+
+        Returns:
+            dict: Hits, misses, hit rate and number of stored entries
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': self._entries
+        }
+
+    def __len__(self):
+        return self._entries
@@ -0,0 +1,436 @@
+import os
+import time
+import random
+import itertools
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from email.utils import parsedate_to_datetime
+
+import telemetry
+from context_builder import count_tokens
+
+# Provider limits shared by every chain using the same model, 0 disables a limit
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_RPM", 30))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TPM", 0))
+# Completion tokens reserved per request on top of the prompt
+LLM_OUTPUT_TOKENS = int(os.getenv("LLM_OUTPUT_TOKENS", 512))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+# Seconds the primary model may take before requests move to the fallback model, 0 disables fallback
+LLM_LATENCY_SLO = float(os.getenv("LLM_LATENCY_SLO", 0))
+LLM_FALLBACK_MODEL = os.getenv("LLM_FALLBACK_MODEL", "llama-3.1-8b-instant")
+# Seconds requests stay on the fallback model before the primary is tried again
+LLM_FALLBACK_PERIOD = float(os.getenv("LLM_FALLBACK_PERIOD", 60))
+# Seconds a request waits on an identical one in flight before calling upstream itself
+LLM_COALESCE_TIMEOUT = float(os.getenv("LLM_COALESCE_TIMEOUT", 120))
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+class RequestCancelled(Exception):
+    """
+    The leader of a coalesced request stopped reading before the response was complete.
+    """
+
+class TokenBucket:
+    def __init__(self, per_minute):
+        """
+        Token bucket refilling continuously at per_minute tokens per minute.
+
+        Callers reserve tokens up front and sleep off any deficit, so waiting
+        requests are served in arrival order without polling.
+
+        Args:
+            per_minute (float): Refill rate and capacity, 0 or None for no limit
+        """
+        self.capacity = float(per_minute or 0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Take tokens from the bucket.
+
+        Args:
+            amount (float, optional): Tokens needed, capped at the bucket capacity
+
+        Returns:
+            float: Seconds to wait before the tokens may be used
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            if not self.capacity:
+                return wait
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+            self.updated = now
+            self.tokens -= min(amount, self.capacity)
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens * 60 / self.capacity)
+            return wait
+
+    def block(self, seconds):
+        """
+        Hold back every request for a while, e.g. for a Retry-After from the provider.
+        """
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+class RateLimiter:
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None):
+        """
+        Requests-per-minute and tokens-per-minute budgets for one model.
+
+        Args:
+            requests_per_minute (float, optional): Defaults to LLM_RPM
+            tokens_per_minute (float, optional): Defaults to LLM_TPM
+        """
+        self.requests = TokenBucket(LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute)
+        self.tokens = TokenBucket(LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute)
+
+    def acquire(self, tokens):
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def block(self, seconds):
+        self.requests.block(seconds)
+        self.tokens.block(seconds)
+
+_limiters = {}
+_inflight = {}
+# Followers waiting on each in-flight request
+_followers = {}
+_shared_lock = threading.Lock()
+
+def get_rate_limiter(model_name):
+    """
+    Get the process-wide rate limiter of a model.
+
+    Args:
+        model_name (str): Model the requests go to
+
+    Returns:
+        RateLimiter: Limiter shared by every gateway using the model
+    """
+    with _shared_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            limiter = _limiters[model_name] = RateLimiter()
+        return limiter
+
+def _model_name(llm):
+    return getattr(llm, 'model_name', type(llm).__name__)
+
+def _status_code(error):
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+def _retry_after(error):
+    """
+    Seconds from a Retry-After header on the error's response, if any.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def _completion_tokens(messages, text):
+    # Providers report usage on the message, or on the last chunk of a stream
+    reported = sum((getattr(message, 'usage_metadata', None) or {}).get('output_tokens', 0) for message in messages)
+    return reported or count_tokens(text)
+
+def _prompt_tokens(messages, estimate):
+    reported = sum((getattr(message, 'usage_metadata', None) or {}).get('input_tokens', 0) for message in messages)
+    return reported or estimate
+
+def _is_retryable(error):
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    name = type(error).__name__
+    return 'Timeout' in name or 'Connection' in name or 'RateLimit' in name
+
+class LLMGateway:
+    def __init__(self, llm, fallback_llm=None, latency_slo=None, max_retries=None, backoff=0.5, max_backoff=30):
+        """
+        Rate-governed access to a chat model.
+
+        Requests wait for the model's shared requests and tokens per minute
+        budgets, retry 429s and transient failures with jittered exponential
+        backoff (honouring Retry-After), and identical requests in flight at
+        the same time share one upstream call.
+
+        Args:
+            llm: Chat model with invoke and stream
+            fallback_llm (optional): Faster model used while the primary misses the latency SLO
+            latency_slo (float, optional): Seconds to the full response, or to the first token when
+                streaming, defaults to LLM_LATENCY_SLO; 0 disables the fallback
+            max_retries (int, optional): Retries per request, defaults to LLM_MAX_RETRIES
+            backoff (float, optional): First retry delay in seconds, doubled on each retry
+            max_backoff (float, optional): Longest retry delay in seconds
+        """
+        self.llm = llm
+        self.fallback_llm = fallback_llm
+        self.latency_slo = LLM_LATENCY_SLO if latency_slo is None else latency_slo
+        self.max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._latency = None
+        self._fallback_until = 0.0
+        self._lock = threading.Lock()
+
+    def _select_llm(self):
+        if self.fallback_llm is not None and self.latency_slo and time.monotonic() < self._fallback_until:
+            return self.fallback_llm
+        return self.llm
+
+    def _record_latency(self, llm, seconds):
+        if llm is not self.llm or not self.latency_slo or self.fallback_llm is None:
+            return
+        with self._lock:
+            self._latency = seconds if self._latency is None else 0.7 * self._latency + 0.3 * seconds
+            if self._latency > self.latency_slo:
+                logging.warning(f"{_model_name(self.llm)} latency {self._latency:.1f}s is over the "
+                                f"{self.latency_slo:.1f}s SLO, using {_model_name(self.fallback_llm)}")
+                self._fallback_until = time.monotonic() + LLM_FALLBACK_PERIOD
+                self._latency = None
+
+    def _backoff_delay(self, attempt, error):
+        delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        retry_after = _retry_after(error)
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _acquire(self, tokens):
+        # Budget is taken from the model actually called, fallback included
+        llm = self._select_llm()
+        get_rate_limiter(_model_name(llm)).acquire(tokens)
+        return llm
+
+    def _retry_or_raise(self, llm, attempt, error):
+        if attempt >= self.max_retries or not _is_retryable(error):
+            raise error
+        delay = self._backoff_delay(attempt, error)
+        if _status_code(error) == 429 or _retry_after(error) is not None:
+            # Everyone using this model waits, not just this request
+            get_rate_limiter(_model_name(llm)).block(delay)
+        logging.warning(f"LLM request failed ({error}), retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+    def _call(self, prompt_text):
+        prompt_tokens = count_tokens(prompt_text)
+        for attempt in itertools.count():
+            llm = self._acquire(prompt_tokens + LLM_OUTPUT_TOKENS)
+            start = time.monotonic()
+            try:
+                message = llm.invoke(prompt_text)
+            except Exception as e:
+                telemetry.record_llm_call(_model_name(llm), prompt_tokens, 0, time.monotonic() - start, 'error')
+                self._retry_or_raise(llm, attempt, e)
+                continue
+            duration = time.monotonic() - start
+            self._record_latency(llm, duration)
+            telemetry.record_llm_call(_model_name(llm), _prompt_tokens([message], prompt_tokens),
+                                      _completion_tokens([message], message.content), duration)
+            return message.content, _model_name(llm)
+
+    def _join(self, key):
+        """
+        Join an identical request in flight, or register this one as the leader.
+
+        Returns:
+            tuple: The shared Future and whether the caller leads the request
+        """
+        with _shared_lock:
+            future = _inflight.get(key)
+            if future is not None:
+                _followers[key] = _followers.get(key, 0) + 1
+                return future, False
+            future = _inflight[key] = Future()
+            return future, True
+
+    @staticmethod
+    def _leave(key, future):
+        with _shared_lock:
+            if _inflight.get(key) is future and _followers.get(key):
+                _followers[key] -= 1
+
+    @staticmethod
+    def _detach(key, future):
+        """
+        Hand an abandoned request over to its followers, if it has any.
+
+        Returns:
+            bool: Whether followers are waiting; if not, the request is no
+                longer joinable
+        """
+        with _shared_lock:
+            if _followers.get(key):
+                return True
+            if _inflight.get(key) is future:
+                del _inflight[key]
+            _followers.pop(key, None)
+            return False
+
+    @staticmethod
+    def _finish(key, future, result=None, error=None):
+        with _shared_lock:
+            if _inflight.get(key) is future:
+                del _inflight[key]
+                _followers.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _follow(self, key):
+        """
+        Wait for an identical request in flight, or register this one as the leader.
+
+        A follower whose leader was cancelled joins again, so one of the
+        followers takes the request over instead of receiving partial text.
+        A follower that waits longer than LLM_COALESCE_TIMEOUT gives up and
+        calls upstream on its own.
+
+        Returns:
+            tuple: The Future to finish when leading, else None, and the leader's
+                (text, model name) result when following, else None; both are None
+                when the caller should call upstream without coalescing
+        """
+        while True:
+            future, leader = self._join(key)
+            if leader:
+                return future, None
+            telemetry.increment('llm_coalesced_requests_total', model=_model_name(self.llm))
+            try:
+                return None, future.result(timeout=LLM_COALESCE_TIMEOUT or None)
+            except RequestCancelled:
+                continue
+            except FutureTimeoutError:
+                self._leave(key, future)
+                logging.warning(f"Request {key} still in flight after {LLM_COALESCE_TIMEOUT:.0f}s, calling upstream")
+                return None, None
+
+    def invoke(self, prompt_text, key=None):
+        """
+        Send a prompt and return the response text.
+
+        Args:
+            prompt_text (str): Formatted prompt
+            key (str, optional): Request identity, e.g. the response cache key; concurrent
+                requests with the same key share one upstream call
+
+        Returns:
+            tuple: Response text and the name of the model that answered, which is
+                the fallback model while the primary misses its latency SLO
+        """
+        if key is None:
+            return self._call(prompt_text)
+        future, result = self._follow(key)
+        if future is None:
+            return result if result is not None else self._call(prompt_text)
+        try:
+            result = self._call(prompt_text)
+        except BaseException as e:
+            # Interrupts and cancellations too, or followers would wait on the key forever
+            self._finish(key, future, error=e if isinstance(e, Exception) else RequestCancelled(str(e)))
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def stream(self, prompt_text, key=None):
+        """
+        Send a prompt and yield the response text as it arrives.
+
+        Failures before the first chunk are retried like invoke. A request
+        joining an identical one in flight receives the text its leader read,
+        in one chunk, when the leader finishes. If the leader's consumer stops
+        reading early, e.g. at the email sign-off, the rest of the response is
+        read in the background for any followers, so they still share the one
+        upstream call and never receive partial text.
+
+        Args:
+            prompt_text (str): Formatted prompt
+            key (str, optional): Request identity for coalescing
+
+        Yields:
+            tuple: Chunk of response text and the name of the model that answered
+        """
+        future = None
+        if key is not None:
+            future, result = self._follow(key)
+            if result is not None:
+                yield result
+                return
+
+        chunks = []
+        messages = []
+        prompt_tokens = count_tokens(prompt_text)
+        llm, start, upstream = self.llm, time.monotonic(), iter(())
+
+        def record(status):
+            telemetry.record_llm_call(_model_name(llm), _prompt_tokens(messages, prompt_tokens),
+                                      _completion_tokens(messages, "".join(chunks)), time.monotonic() - start,
+                                      status, streamed=True)
+
+        def collect(chunk):
+            if getattr(chunk, 'usage_metadata', None):
+                messages.append(chunk)
+            chunks.append(chunk.content)
+
+        def drain():
+            try:
+                for chunk in upstream:
+                    collect(chunk)
+            except Exception as e:
+                record('error')
+                self._finish(key, future, error=e)
+                return
+            record('ok')
+            self._finish(key, future, ("".join(chunks), _model_name(llm)))
+
+        try:
+            for attempt in itertools.count():
+                llm = self._acquire(prompt_tokens + LLM_OUTPUT_TOKENS)
+                start = time.monotonic()
+                try:
+                    upstream = iter(llm.stream(prompt_text))
+                    for chunk in upstream:
+                        if not chunks:
+                            self._record_latency(llm, time.monotonic() - start)
+                        collect(chunk)
+                        yield chunk.content, _model_name(llm)
+                    break
+                except Exception as e:
+                    record('error')
+                    if chunks:
+                        # Part of the answer is already out, a retry would repeat it
+                        raise
+                    self._retry_or_raise(llm, attempt, e)
+            record('ok')
+        except GeneratorExit:
+            if future is not None and self._detach(key, future):
+                # The consumer stopped reading but followers want the full answer, finish it for them
+                threading.Thread(target=drain, name="llm-stream-drain", daemon=True).start()
+                raise
+            record('ok')
+            if future is not None:
+                self._finish(key, future, error=RequestCancelled(f"Request {key} was cancelled by its leader"))
+            raise
+        except BaseException as e:
+            if future is not None:
+                self._finish(key, future, error=e if isinstance(e, Exception) else RequestCancelled(str(e)))
+            raise
+        if future is not None:
+            self._finish(key, future, ("".join(chunks), _model_name(llm)))
@@ -88,9 +88,8 @@ def create_streamlit_app():
         
         # Initialize advanced feature managers if available
         if ADVANCED_FEATURES_AVAILABLE:
-            compliance_checker = EmailComplianceChecker()
-            performance_tracker = EmailPerformanceTracker()
-            integration_manager = IntegrationManager()
+            compliance_checker = get_resource('compliance_checker')
+            performance_tracker = get_resource('performance_tracker')
         
         # Create a sidebar layout
         with st.sidebar:
@@ -110,6 +109,14 @@ def create_streamlit_app():
             # Email Customization Controls
             tone_options = ["Professional", "Friendly", "Formal", "Casual"]
             email_tone = st.selectbox("Email Tone", tone_options)
+            length_options = ["Standard", "Short", "Detailed"]
+            email_length = st.selectbox("Email Length", length_options)
+            
+            # Generate several tone/length variants side by side from one shared context
+            compare_variants = st.checkbox("Compare Variants")
+            if compare_variants:
+                variant_tones = st.multiselect("Variant Tones", tone_options, default=tone_options)
+                variant_lengths = st.multiselect("Variant Lengths", length_options, default=[email_length])
             
             # Compliance and Privacy Toggle
             if ADVANCED_FEATURES_AVAILABLE:
@@ -117,6 +124,10 @@ def create_streamlit_app():
             
             # Generate Email Button
             generate_email = st.button("Generate Personalized Email")
+            
+            # Per-stage timings, token usage and cache hits for this process
+            with st.expander("Pipeline Metrics"):
+                st.code(prometheus_snapshot(), language="text")
         
         if generate_email:
             # Process Resume if uploaded
@@ -127,23 +138,97 @@ def create_streamlit_app():
                     st.error("Could not extract text from the resume.")
                     return
             
-            # Get Job Description
-            job_description = get_job_description(job_description_input)
-            
             # Compliance Check
-            if ADVANCED_FEATURES_AVAILABLE and anonymize_data:
+            anonymize = ADVANCED_FEATURES_AVAILABLE and anonymize_data
+            
+            # Get Job Description, a generation service fetches job URLs itself
+            if GENERATION_SERVICE_URL and not anonymize:
+                job_description = job_description_input
+            else:
+                job_description = get_job_description(job_description_input)
+            
+            if anonymize:
                 resume_text = compliance_checker.anonymize_data(resume_text)
                 job_description = compliance_checker.anonymize_data(job_description)
             
-            # Generate Email Text
-            email_text = generate_email_text(
-                resume_text, 
-                job_description, 
-                recipient_name, 
-                company_name, 
-                email_tone,
-                sender_name  # Pass sender name to the function
-            )
+            if compare_variants:
+                variants = [(tone, length) for tone in variant_tones or [email_tone]
+                            for length in variant_lengths or [email_length]]
+                st.subheader("Generated Variants")
+                columns = st.columns(min(len(variants), 4))
+                placeholders = []
+                for index, (tone, length) in enumerate(variants):
+                    with columns[index % len(columns)]:
+                        st.markdown(f"**{tone} · {length}**")
+                        placeholders.append(st.empty())
+                        placeholders[-1].info("Generating...")
+                
+                if GENERATION_SERVICE_URL:
+                    results = ServiceClient(GENERATION_SERVICE_URL).generate_variants(
+                        variants,
+                        resume_text=resume_text,
+                        job_description=job_description,
+                        recipient_name=recipient_name,
+                        company_name=company_name,
+                        sender_name=sender_name
+                    )
+                else:
+                    results = generate_email_variants(
+                        resume_text,
+                        job_description,
+                        recipient_name,
+                        company_name,
+                        variants,
+                        sender_name
+                    )
+                
+                # Fill in each variant as it completes
+                for variant in results:
+                    placeholder = placeholders[variant['index']].container()
+                    placeholder.write(variant['email'])
+                    if ADVANCED_FEATURES_AVAILABLE:
+                        compliance_result = compliance_checker.check_appropriateness(variant['email'])
+                        if not compliance_result['is_appropriate']:
+                            placeholder.warning("This variant may contain inappropriate content.")
+                        performance_tracker.log_email_performance({
+                            'timestamp': pd.Timestamp.now(),
+                            'recipient': recipient_name,
+                            'company': company_name,
+                            'tone': variant['tone'],
+                            'compliance_score': compliance_result.get('confidence', 1.0)
+                        })
+                return
+            
+            # Stream the generated email as it is produced
+            st.subheader("Generated Email")
+            email_placeholder = st.empty()
+            email_text = ""
+            if GENERATION_SERVICE_URL:
+                # Generate on the shared worker pool instead of in this UI process
+                client = ServiceClient(GENERATION_SERVICE_URL)
+                job_id = client.submit(
+                    resume_text=resume_text,
+                    job_description=job_description,
+                    recipient_name=recipient_name,
+                    company_name=company_name,
+                    email_tone=email_tone,
+                    email_length=email_length,
+                    sender_name=sender_name
+                )
+                chunks = client.stream(job_id)
+            else:
+                chunks = stream_email_text(
+                    resume_text, 
+                    job_description, 
+                    recipient_name, 
+                    company_name, 
+                    email_tone,
+                    sender_name,  # Pass sender name to the function
+                    email_length=email_length
+                )
+            for chunk in chunks:
+                email_text += chunk
+                email_placeholder.write(email_text)
             
             # Email Appropriateness Check
             if ADVANCED_FEATURES_AVAILABLE:
@@ -152,10 +237,6 @@ def create_streamlit_app():
                 if not compliance_result['is_appropriate']:
                     st.warning("Generated email may contain inappropriate content.")
             
-            # Display Generated Email
-            st.subheader("Generated Email")
-            st.write(email_text)
-            
             # Performance Tracking
             if ADVANCED_FEATURES_AVAILABLE:
                 performance_tracker.log_email_performance({
@@ -169,148 +250,76 @@ def create_streamlit_app():
         global_exception_handler()
         st.exception(e)
 
-from langchain_community.document_loaders import WebBaseLoader
-import PyPDF2
-import docx
-import io
-import validators
 import pandas as pd
 
-from chains import Chain
-from portfolio import Portfolio
-from utils import clean_text
+from document_text import extract_text, DocumentTooLargeError, SUPPORTED_EXTENSIONS
+from generation import generate_email_variants, stream_email_text, load_job_description
+from resources import get_resource, preload_resources
+from service import ServiceClient
+from telemetry import prometheus_snapshot, traced
 
-# Optional import with fallback for advanced features
+# Root of a headless generation service (python app/service.py serve); generation runs in-process when unset
+GENERATION_SERVICE_URL = os.getenv("GENERATION_SERVICE_URL", "")
+
+# Advanced features are created through get_resource, so only check their dependencies here
 try:
-    from advanced_features import (
-        AdvancedResumeParser, 
-        EmailComplianceChecker, 
-        EmailPerformanceTracker,
-        IntegrationManager,
-        validate_email,
-        detect_file_type
-    )
-    ADVANCED_FEATURES_AVAILABLE = True
+    from advanced_features import dependencies_available
+    # Heavy dependencies load lazily, so check they are installed without importing them
+    ADVANCED_FEATURES_AVAILABLE = dependencies_available()
 except ImportError:
-    st.warning("Advanced features are not available. Some functionality may be limited.")
     ADVANCED_FEATURES_AVAILABLE = False
-    
-    # Provide fallback classes
-    class AdvancedResumeParser:
-        def __init__(self):
-            pass
-        def extract_skills(self, text):
-            return []
-    
-    class EmailComplianceChecker:
-        def check_appropriateness(self, email_text):
-            return {'is_appropriate': True, 'confidence': 1.0}
-        def anonymize_data(self, text):
-            return text
-    
-    class EmailPerformanceTracker:
-        def log_email_performance(self, email_details):
-            pass
-    
-    class IntegrationManager:
-        pass
 
+if not ADVANCED_FEATURES_AVAILABLE:
+    st.warning("Advanced features are not available. Some functionality may be limited.")
+
+@traced('extract_text_from_file')
 def extract_text_from_file(uploaded_file):
     """
     Enhanced document text extraction with advanced parsing
     """
     try:
         file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-        
-        # Temporary save file for advanced parsing
-        with open(uploaded_file.name, 'wb') as f:
-            f.write(uploaded_file.getvalue())
-        
-        # Detect file type and choose appropriate parsing method
-        if file_extension == '.pdf':
-            # Try standard PDF parsing
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text()
-        
-        elif file_extension in ['.docx', '.doc']:
-            doc = docx.Document(uploaded_file)
-            text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
-        
-        else:
+        if file_extension not in SUPPORTED_EXTENSIONS:
             st.error(f"Unsupported file type: {file_extension}")
             return None
         
+        # Parse the upload in memory, long PDFs are split across worker processes
+        data = uploaded_file.getvalue()
+        text = extract_text(data, uploaded_file.name)
+        
+        # Scanned PDFs have no text layer, fall back to OCR
+        if file_extension == '.pdf' and not text.strip() and ADVANCED_FEATURES_AVAILABLE:
+            parser = get_resource('resume_parser')
+            text = "".join(page_text for _, page_text in parser.ocr_document_streaming(data, skip_text_pages=False))
+        
         # Extract skills from parsed text if advanced features are available
         if ADVANCED_FEATURES_AVAILABLE:
-            parser = AdvancedResumeParser()
+            parser = get_resource('resume_parser')
             skills = parser.extract_skills(text)
             st.write("Extracted Skills:", skills)
         
         return text
     
+    except DocumentTooLargeError as e:
+        st.error(f"Resume is too large: {e}")
+        return None
     except Exception as e:
         st.error(f"Error reading document: {e}")
         return None
 
+@traced('get_job_description')
 def get_job_description(url_or_text):
     """
     Retrieve job description from URL or direct text input.
     """
-    if not url_or_text:
+    try:
+        return load_job_description(url_or_text)
+    except Exception as e:
+        st.warning(f"Could not load job description from URL: {e}")
         return ""
-    
-    # Check if input is a valid URL
-    if validators.url(url_or_text):
-        try:
-            loader = WebBaseLoader([url_or_text])
-            return clean_text(loader.load().pop().page_content)
-        except Exception as e:
-            st.warning(f"Could not load job description from URL: {e}")
-            return ""
-    
-    # If not a URL, treat as direct text input
-    return url_or_text
-
-def generate_email_text(resume_text, job_description, recipient_name, company_name, email_tone, sender_name=None):
-    """
-    Generate personalized email text based on input parameters
-    """
-    # Initialize Chain and Portfolio
-    chain = Chain()
-    portfolio = Portfolio()
-    
-    # Combine Context
-    full_context = f"""
-    Job Context:
-    - Recipient Name: {recipient_name}
-    - Company: {company_name}
-    - Job Description: {job_description}
-    
-    Resume Summary: {resume_text[:1000]}  # Limit to first 1000 chars
-    """
-    
-    # Portfolio Preparation
-    portfolio.load_portfolio()
-    
-    # Extract skills using the chain
-    skills = chain.extract_skills(full_context)
-    
-    # Find Relevant Portfolio Links
-    links = portfolio.query_links(skills)
-    
-    # Generate Email
-    email = chain.write_personalized_mail(
-        context=full_context, 
-        job_description=job_description, 
-        links=links,
-        tone=email_tone,
-        sender_name=sender_name  # Pass sender name to the method
-    )
-    
-    return email
 
 if __name__ == "__main__":
     st.set_page_config(layout="wide", page_title="ProConnect: AI-Powered Cold Email Creator", page_icon="📧")
+    # Warm shared models in the background (PRELOAD_RESOURCES), once per process
+    preload_resources()
     create_streamlit_app()
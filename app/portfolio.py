@@ -1,5 +1,6 @@
 import os
 import sys
+import math
 import logging
 
 # Try to import pysqlite3 and replace sqlite3 if possible
@@ -9,22 +10,249 @@ try:
 except ImportError:
     print("Warning: Could not import pysqlite3. Using system sqlite3.")
 
+import numpy as np
 import pandas as pd
 import uuid
+from collections import defaultdict
+
+from skill_matcher import canonical_skill
+from telemetry import traced
+
+PORTFOLIO_COLUMNS = ['id', 'name', 'description', 'skills', 'link']
+# Column names used by other portfolio layouts, e.g. the Techstack/Links CSV written by update_portfolio.py
+COLUMN_ALIASES = {
+    'techstack': 'skills',
+    'tech stack': 'skills',
+    'links': 'link',
+    'url': 'link',
+    'project': 'name',
+    'project_name': 'name',
+}
+
+def _canonical_column(column):
+    column = ' '.join(str(column).strip().lower().split())
+    return COLUMN_ALIASES.get(column, column)
+
+def normalize_columns(df):
+    """
+    Rename portfolio columns to the id/name/description/skills/link layout and add missing ones.
+    """
+    df = df.rename(columns={column: _canonical_column(column) for column in df.columns})
+    df = df.loc[:, ~df.columns.duplicated()]
+    for column in PORTFOLIO_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    return df
+
+def normalize_project(project):
+    """
+    Map a project record in any supported layout to the portfolio columns, with empty values as None.
+    """
+    normalized = dict.fromkeys(PORTFOLIO_COLUMNS)
+    for column, value in project.items():
+        column = _canonical_column(column)
+        if column in normalized and normalized[column] is None:
+            if isinstance(value, (list, tuple)):
+                value = ', '.join(str(item) for item in value)
+            if value is not None and not (isinstance(value, float) and math.isnan(value)):
+                value = str(value).strip()
+                normalized[column] = value or None
+    return normalized
+
+def split_skills(skills):
+    """
+    Split a comma-separated skills value into canonical skill names, e.g. 'NLP, K8s' ->
+    ['natural language processing', 'kubernetes'].
+    """
+    if skills is None or (not isinstance(skills, str) and pd.isna(skills)):
+        return []
+    return [skill for skill in (canonical_skill(part) for part in str(skills).split(',')) if skill]
 
 class Portfolio:
-    def __init__(self, file_path="my_portfolio.csv"):
+    def __init__(self, file_path="my_portfolio.csv", retrieval=None, vectorstore_path="vectorstore", store=None):
         """
         Initialize portfolio with required columns
+        
+        Args:
+            file_path (str, optional): Portfolio CSV file
+            retrieval (str, optional): 'skills' for exact skill matching or 'semantic' for
+                vector search, which by default uses lexical hashing embeddings (see
+                HashingEmbeddingFunction), defaults to PORTFOLIO_RETRIEVAL or 'skills'
+            vectorstore_path (str, optional): Chroma directory used by semantic retrieval
+            store (PortfolioStore or str, optional): SQLite store (or its path) to keep projects in
+                instead of the CSV, defaults to PORTFOLIO_STORE when set; an empty store is
+                imported from file_path once
         """
-        try:
-            if pd.os.path.exists(file_path):
-                self.df = pd.read_csv(file_path)
-            else:
-                self.df = pd.DataFrame(columns=['id', 'name', 'description', 'skills', 'link'])
-        except Exception as e:
-            logging.error(f"Error initializing portfolio: {e}")
-            self.df = pd.DataFrame(columns=['id', 'name', 'description', 'skills', 'link'])
+        if store is None:
+            store = os.getenv("PORTFOLIO_STORE") or None
+        if isinstance(store, str):
+            from portfolio_store import PortfolioStore
+            store = PortfolioStore(store)
+        self.store = store
+        self._df = None
+        self._pending = []
+        # Project id -> row position in df, built on the first in-place update
+        self._positions = None
+        self._vocabulary = None
+        
+        if self.store is not None:
+            # Lookups go to the store's skill index, rows are only read when df is used
+            if not len(self.store) and os.path.exists(file_path):
+                self.store.import_csv(file_path)
+        else:
+            try:
+                if os.path.exists(file_path):
+                    self.df = normalize_columns(pd.read_csv(file_path))
+                else:
+                    self.df = pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+            except Exception as e:
+                logging.error(f"Error initializing portfolio: {e}")
+                self.df = pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+        self._build_index()
+        
+        self.retrieval = retrieval or os.getenv("PORTFOLIO_RETRIEVAL", "skills")
+        self.vectorstore_path = vectorstore_path
+        self._vector_index = None
+        if self.retrieval == 'semantic':
+            self.enable_semantic_search()
+
+    @property
+    def df(self):
+        """
+        Portfolio projects as a DataFrame, read from the store on first use.
+        """
+        if self._df is None:
+            self._df = self._load_store() if self.store is not None else pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+        if self._pending:
+            # Projects added since the last read are appended in one concat
+            if self._positions is not None:
+                self._positions.update((project['id'], len(self._df) + offset)
+                                       for offset, project in enumerate(self._pending))
+            self._df = pd.concat([self._df, pd.DataFrame(self._pending, columns=PORTFOLIO_COLUMNS)],
+                                 ignore_index=True)
+            self._pending = []
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self._pending = []
+        self._positions = None
+
+    def _load_store(self):
+        return pd.DataFrame(list(self.store.iter_projects()), columns=PORTFOLIO_COLUMNS)
+
+    def _build_index(self):
+        """
+        Build the skill -> project inverted index over the loaded projects.
+        
+        Postings hold row positions in self.df, so they stay sorted in
+        portfolio order as projects are appended. A store-backed portfolio
+        uses the store's skill index instead.
+        """
+        self._postings = defaultdict(list)
+        self._posting_arrays = {}
+        self._links = []
+        self._vocabulary = None
+        if self.store is not None or 'skills' not in self.df.columns:
+            return
+        links = self.df['link'] if 'link' in self.df.columns else [None] * len(self.df)
+        for skills, link in zip(self.df['skills'], links):
+            self._index_project(skills, link)
+
+    def _index_project(self, skills, link):
+        position = len(self._links)
+        self._links.append(None if link is None or pd.isna(link) or not link else link)
+        for skill in set(split_skills(skills)):
+            self._postings[skill].append(position)
+            self._posting_arrays.pop(skill, None)
+
+    def _posting_array(self, skill):
+        # Cached numpy view of a posting list, invalidated when the skill gets new projects
+        array = self._posting_arrays.get(skill)
+        if array is None:
+            array = np.asarray(self._postings[skill], dtype=np.int64)
+            self._posting_arrays[skill] = array
+        return array
+
+    def _rank_positions(self, skills):
+        """
+        Rank project positions by the number of requested skills they have.
+        
+        Args:
+            skills (list): Skills to search for
+        
+        Returns:
+            ndarray: Row positions, most overlapping skills first, ties in portfolio order
+        """
+        normalized = {canonical_skill(skill) for skill in skills}
+        arrays = [self._posting_array(skill) for skill in normalized if skill in self._postings]
+        if not arrays:
+            return np.empty(0, dtype=np.int64)
+        if len(arrays) == 1:
+            return arrays[0]
+        counts = np.bincount(np.concatenate(arrays))
+        positions = np.flatnonzero(counts)
+        return positions[np.argsort(-counts[positions], kind='stable')]
+
+    def _project_records(self):
+        """
+        Portfolio rows as dictionaries with a stable id for the vector index.
+        """
+        records = []
+        for position, project in enumerate(self.df.to_dict('records')):
+            project_id = project.get('id')
+            if project_id is None or pd.isna(project_id):
+                project_id = project.get('link')
+                if project_id is None or pd.isna(project_id):
+                    project_id = f"row-{position}"
+            project['id'] = str(project_id)
+            records.append(project)
+        return records
+
+    def enable_semantic_search(self, persist_directory=None):
+        """
+        Switch to embedding-based retrieval backed by the persistent Chroma vectorstore.
+        
+        Only projects that are new or changed since the last run are embedded.
+        The default embeddings match shared words and word fragments, not meaning.
+        
+        Args:
+            persist_directory (str, optional): Chroma directory, defaults to vectorstore_path
+        """
+        from vector_index import PortfolioVectorIndex
+        
+        self._vector_index = PortfolioVectorIndex(persist_directory or self.vectorstore_path)
+        self._vector_index.sync(self._project_records())
+        self.retrieval = 'semantic'
+
+    def query_similar(self, query, k=5):
+        """
+        Retrieve the projects most similar to a job description or list of skills.
+        
+        Args:
+            query (str or list): Job description text or extracted skills
+            k (int, optional): Number of projects to return
+        
+        Returns:
+            list: Dictionaries with id, link, document and similarity score, best match first
+        """
+        if self._vector_index is None:
+            self.enable_semantic_search()
+        return self._vector_index.query(query, k=k)
+
+    def skill_vocabulary(self):
+        """
+        Get all canonical skills present in the portfolio.
+        
+        Returns:
+            list: Skill names
+        """
+        if self.store is None:
+            return list(self._postings)
+        if self._vocabulary is None:
+            self._vocabulary = set(self.store.skills())
+        return list(self._vocabulary)
 
     def add_project(self, project_name, description, skills, link=None):
         """
@@ -45,43 +273,88 @@ class Portfolio:
             'link': link
         }
         
-        self.df = self.df._append(new_project, ignore_index=True)
-        self.save()
+        if self.store is not None:
+            stored_id = self.store.add(new_project)
+            if stored_id != project_id:
+                # The link belonged to a stored project, which was updated in place; skills
+                # it no longer has may have been its last use, so the vocabulary is reread
+                self._vocabulary = None
+                project_id = new_project['id'] = stored_id
+                if self._df is not None:
+                    self._replace_row(new_project)
+            else:
+                if self._vocabulary is not None:
+                    self._vocabulary.update(split_skills(new_project['skills']))
+                if self._df is not None:
+                    self._pending.append(new_project)
+        else:
+            self._pending.append(new_project)
+            self._index_project(new_project['skills'], link)
+        
+        if self._vector_index is not None:
+            self._vector_index.upsert(new_project)
+        if self.store is None:
+            self.save()
         return project_id
 
+    def _replace_row(self, project):
+        # Update the loaded row of a project in place, without flushing pending rows
+        for index, pending in enumerate(self._pending):
+            if pending['id'] == project['id']:
+                self._pending[index] = project
+                return
+        if self._positions is None:
+            self._positions = {project_id: position for position, project_id in enumerate(self._df['id'])}
+        position = self._positions.get(project['id'])
+        if position is None:
+            self._pending.append(project)
+            return
+        columns = [self._df.columns.get_loc(column) for column in PORTFOLIO_COLUMNS]
+        self._df.iloc[position, columns] = [project[column] for column in PORTFOLIO_COLUMNS]
+
     def get_projects_by_skill(self, skill):
         """
-        Retrieve projects that match a specific skill
+        Retrieve projects that have a specific skill
         
         Args:
-            skill (str): Skill to search for
+            skill (str): Skill to search for, matched case-insensitively and through SKILL_ALIASES
         
         Returns:
             DataFrame: Projects matching the skill
         """
-        return self.df[self.df['skills'].str.contains(skill, case=False, na=False)]
+        if self.store is not None:
+            return pd.DataFrame(self.store.find_by_skills([skill]), columns=PORTFOLIO_COLUMNS)
+        return self.df.iloc[self._rank_positions([skill])]
 
-    def query_links(self, skills):
+    @traced('query_links')
+    def query_links(self, skills, limit=None):
         """
         Retrieve project links that match the specified skills.
         
         Args:
             skills (list): List of skills to search for.
+            limit (int, optional): Maximum number of links to return.
         
         Returns:
-            list: Project links that match the skills.
+            list: Project links that match the skills, most overlapping skills first.
         """
-        if self.df.empty or 'skills' not in self.df.columns:
-            return []
-            
+        if self.retrieval == 'semantic':
+            projects = self.query_similar(skills or [], k=limit or 5)
+            return [project['link'] for project in projects if project['link']]
+        if self.store is not None:
+            return [project['link'] for project in self.store.find_by_skills(skills or [], limit=limit,
+                                                                               with_link=True)]
+        
         links = []
-        for _, row in self.df.iterrows():
-            if pd.isna(row['skills']) or pd.isna(row['link']):
+        seen = set()
+        for position in self._rank_positions(skills or []):
+            link = self._links[position]
+            if link is None or link in seen:
                 continue
-            row_skills = str(row['skills']).lower().split(', ')
-            if any(skill.lower() in row_skills for skill in skills):
-                if row['link'] and not pd.isna(row['link']):
-                    links.append(row['link'])
+            seen.add(link)
+            links.append(link)
+            if limit is not None and len(links) >= limit:
+                break
         return links
 
     def save(self, file_path="my_portfolio.csv"):
@@ -98,7 +371,7 @@ class Portfolio:
 
     def load_portfolio(self, file_path="my_portfolio.csv"):
         """
-        Load portfolio from a CSV file
+        Load portfolio from a CSV file, importing it into the store when one is used
         
         Args:
             file_path (str): Path to the CSV file to load
@@ -106,17 +379,26 @@ class Portfolio:
         Returns:
             DataFrame: Loaded portfolio projects
         """
-        try:
-            self.df = pd.read_csv(file_path)
-            return self.df
-        except FileNotFoundError:
-            logging.warning(f"Portfolio file {file_path} not found. Creating an empty portfolio.")
-            self.df = pd.DataFrame(columns=['id', 'name', 'description', 'skills', 'link'])
-            return self.df
-        except Exception as e:
-            logging.error(f"Error loading portfolio: {e}")
-            self.df = pd.DataFrame(columns=['id', 'name', 'description', 'skills', 'link'])
-            return self.df
+        if self.store is not None:
+            # Store errors surface to the caller rather than leaving an empty portfolio
+            try:
+                self.store.import_csv(file_path)
+            except FileNotFoundError:
+                logging.warning(f"Portfolio file {file_path} not found. Keeping the stored portfolio.")
+            self.df = None
+        else:
+            try:
+                self.df = normalize_columns(pd.read_csv(file_path))
+            except FileNotFoundError:
+                logging.warning(f"Portfolio file {file_path} not found. Creating an empty portfolio.")
+                self.df = pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+            except Exception as e:
+                logging.error(f"Error loading portfolio: {e}")
+                self.df = pd.DataFrame(columns=PORTFOLIO_COLUMNS)
+        self._build_index()
+        if self._vector_index is not None:
+            self._vector_index.sync(self._project_records())
+        return self.df
 
     def __len__(self):
         """
@@ -125,6 +407,8 @@ class Portfolio:
         Returns:
             int: Number of projects
         """
+        if self.store is not None:
+            return len(self.store)
         return len(self.df)
 
     def display(self):
@@ -0,0 +1,244 @@
+import os
+import csv
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from portfolio import PORTFOLIO_COLUMNS, normalize_project, split_skills
+
+# SQLite file shared by the app (which only uses a store when this is set) and the GitHub sync
+PORTFOLIO_STORE = os.getenv("PORTFOLIO_STORE") or None
+DEFAULT_STORE_PATH = os.path.join(".cache", "portfolio.sqlite3")
+
+# Bumped when the way skills are indexed changes, so existing stores are re-indexed on open
+SKILL_INDEX_VERSION = 1
+
+class PortfolioStore:
+    def __init__(self, path=None):
+        """
+        Transactional SQLite storage for portfolio projects.
+
+        Projects are keyed by their link (or by their content when they have
+        none), so importing or syncing the same project twice updates it in
+        place instead of adding a duplicate. A skill table indexes projects by
+        normalized skill.
+
+        Args:
+            path (str, optional): SQLite file, defaults to PORTFOLIO_STORE or .cache/portfolio.sqlite3
+        """
+        self.path = path or PORTFOLIO_STORE or DEFAULT_STORE_PATH
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                "id TEXT PRIMARY KEY, key TEXT NOT NULL UNIQUE, name TEXT, description TEXT, skills TEXT, "
+                "link TEXT, content_hash TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS project_skills ("
+                "skill TEXT NOT NULL, project_id TEXT NOT NULL, PRIMARY KEY (skill, project_id)) WITHOUT ROWID"
+            )
+            # Updates replace a project's skills by project id
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS project_skills_project ON project_skills (project_id)"
+            )
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] < SKILL_INDEX_VERSION:
+                self._reindex_skills(self._conn)
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _reindex_skills(conn):
+        # Stores written before skills were canonicalized index them by their raw spelling
+        conn.execute("DELETE FROM project_skills")
+        conn.executemany(
+            "INSERT OR IGNORE INTO project_skills (skill, project_id) VALUES (?, ?)",
+            [(skill, project_id) for project_id, skills in conn.execute("SELECT id, skills FROM projects")
+             for skill in split_skills(skills)]
+        )
+        conn.execute(f"PRAGMA user_version = {SKILL_INDEX_VERSION}")
+
+    @staticmethod
+    def _content_hash(project):
+        payload = json.dumps([project.get(column) for column in PORTFOLIO_COLUMNS[1:]], default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _upsert(self, conn, project):
+        """
+        Insert or update one project inside the caller's transaction.
+
+        Returns:
+            tuple: Project id and 'inserted', 'updated' or 'unchanged'
+        """
+        project = normalize_project(project)
+        content_hash = self._content_hash(project)
+        key = project['link'] or f"content:{content_hash}"
+        row = conn.execute("SELECT id, content_hash FROM projects WHERE key = ?", (key,)).fetchone()
+        if row is not None and row[1] == content_hash:
+            return row[0], 'unchanged'
+
+        now = time.time()
+        if row is None:
+            project_id = project['id'] or str(uuid.uuid4())
+            conn.execute(
+                "INSERT INTO projects (id, key, name, description, skills, link, content_hash, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (project_id, key, project['name'], project['description'], project['skills'], project['link'],
+                 content_hash, now)
+            )
+            status = 'inserted'
+        else:
+            project_id = row[0]
+            conn.execute(
+                "UPDATE projects SET name = ?, description = ?, skills = ?, link = ?, content_hash = ?, "
+                "updated_at = ? WHERE id = ?",
+                (project['name'], project['description'], project['skills'], project['link'], content_hash, now,
+                 project_id)
+            )
+            conn.execute("DELETE FROM project_skills WHERE project_id = ?", (project_id,))
+            status = 'updated'
+
+        conn.executemany(
+            "INSERT OR IGNORE INTO project_skills (skill, project_id) VALUES (?, ?)",
+            [(skill, project_id) for skill in split_skills(project['skills'])]
+        )
+        return project_id, status
+
+    def add(self, project):
+        """
+        Add or update a single project.
+
+        Args:
+            project (dict): Project with any of id, name, description, skills and link;
+                'Techstack' and 'Links' are accepted for skills and link
+
+        Returns:
+            str: Project id
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                project_id, _ = self._upsert(conn, project)
+        return project_id
+
+    def add_many(self, projects):
+        """
+        Add or update many projects in one transaction.
+
+        Args:
+            projects (iterable): Project dictionaries as accepted by add
+
+        Returns:
+            dict: Number of 'inserted', 'updated' and 'unchanged' projects
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for project in projects:
+                    _, status = self._upsert(conn, project)
+                    counts[status] += 1
+        return counts
+
+    def import_csv(self, file_path, batch_size=1000):
+        """
+        Import a portfolio CSV in either the skills/link or the Techstack/Links layout.
+
+        The file is streamed and written in batches, each in its own transaction.
+
+        Args:
+            file_path (str): CSV file
+            batch_size (int, optional): Rows per transaction
+
+        Returns:
+            dict: Number of 'inserted', 'updated' and 'unchanged' projects
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        with open(file_path, 'r', newline='', encoding='utf-8') as file:
+            batch = []
+            for row in csv.DictReader(file):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    for status, count in self.add_many(batch).items():
+                        counts[status] += count
+                    batch = []
+            if batch:
+                for status, count in self.add_many(batch).items():
+                    counts[status] += count
+        logging.info(f"Imported {file_path} into portfolio store: {counts}")
+        return counts
+
+    def iter_projects(self, batch_size=1000):
+        """
+        Stream all projects in insertion order.
+
+        Args:
+            batch_size (int, optional): Rows fetched from SQLite at a time
+
+        Yields:
+            dict: Project with id, name, description, skills and link
+        """
+        with self._lock:
+            cursor = self._connect().execute(
+                f"SELECT {', '.join(PORTFOLIO_COLUMNS)} FROM projects ORDER BY rowid"
+            )
+            rows = cursor.fetchmany(batch_size)
+        while rows:
+            for row in rows:
+                yield dict(zip(PORTFOLIO_COLUMNS, row))
+            with self._lock:
+                rows = cursor.fetchmany(batch_size)
+
+    def find_by_skills(self, skills, limit=None, with_link=False):
+        """
+        Find projects by skill through the skill index, without loading the portfolio.
+
+        Args:
+            skills (list): Skills to search for
+            limit (int, optional): Maximum number of projects
+            with_link (bool, optional): Only return projects that have a link
+
+        Returns:
+            list: Projects, most overlapping skills first, ties in insertion order
+        """
+        skills = sorted({skill for value in skills for skill in split_skills(value)})
+        if not skills:
+            return []
+        query = (
+            f"SELECT {', '.join('p.' + column for column in PORTFOLIO_COLUMNS)} FROM project_skills s "
+            f"JOIN projects p ON p.id = s.project_id WHERE s.skill IN ({', '.join('?' * len(skills))}) "
+            f"{'AND p.link IS NOT NULL ' if with_link else ''}GROUP BY p.id ORDER BY COUNT(*) DESC, p.rowid"
+        )
+        parameters = list(skills)
+        if limit is not None:
+            query += " LIMIT ?"
+            parameters.append(limit)
+        with self._lock:
+            rows = self._connect().execute(query, parameters).fetchall()
+        return [dict(zip(PORTFOLIO_COLUMNS, row)) for row in rows]
+
+    def skills(self):
+        """
+        Every indexed skill.
+
+        Returns:
+            list: Canonical skill names in alphabetical order
+        """
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT DISTINCT skill FROM project_skills ORDER BY skill")]
+
+    def __len__(self):
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM projects").fetchone()[0]
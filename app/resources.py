@@ -0,0 +1,171 @@
+import os
+import logging
+import threading
+import time
+
+class ResourceRegistry:
+    def __init__(self):
+        """
+        Process-wide registry of expensive objects, each built once on first use.
+        """
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._preload_thread = None
+
+    def register(self, name, factory):
+        """
+        Register a factory for a named resource.
+
+        Args:
+            name (str): Resource name
+            factory (callable): Zero-argument function building the resource
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        Get a resource, building it on first use.
+
+        Concurrent callers asking for a resource that is still loading wait for
+        the single load instead of building their own copy.
+
+        Args:
+            name (str): Resource name
+
+        Returns:
+            The shared resource instance
+        """
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        if name not in self._factories:
+            raise KeyError(f"Unknown resource: {name}")
+        with self._locks[name]:
+            instance = self._instances.get(name)
+            if instance is None:
+                start = time.perf_counter()
+                instance = self._factories[name]()
+                self._instances[name] = instance
+                logging.info(f"Loaded resource '{name}' in {time.perf_counter() - start:.2f}s")
+        return instance
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+    def reset(self, name=None):
+        """
+        Drop one or all loaded resources so they are rebuilt on next use.
+
+        Args:
+            name (str, optional): Resource to drop, all resources when omitted
+        """
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+    def preload(self, names=None, background=False):
+        """
+        Load resources ahead of the first request, including the models of
+        resources that load them lazily (those with a warm_up method).
+
+        Args:
+            names (list, optional): Resources to load, all registered ones when omitted
+            background (bool, optional): Load in a daemon thread instead of blocking
+
+        Returns:
+            threading.Thread: The loading thread when background is set, else None
+        """
+        names = list(names or self._factories)
+
+        def load():
+            for name in names:
+                try:
+                    instance = self.get(name)
+                    # Resources that load their models lazily expose warm_up to load them ahead of use
+                    warm_up = getattr(instance, 'warm_up', None)
+                    if callable(warm_up):
+                        warm_up()
+                except Exception as e:
+                    logging.error(f"Could not preload resource '{name}': {e}")
+
+        if not background:
+            load()
+            return None
+
+        with self._lock:
+            if self._preload_thread is None or not self._preload_thread.is_alive():
+                self._preload_thread = threading.Thread(target=load, name="resource-preload", daemon=True)
+                self._preload_thread.start()
+        return self._preload_thread
+
+registry = ResourceRegistry()
+
+def _create_chain():
+    from chains import Chain
+    return Chain()
+
+def _create_portfolio():
+    from portfolio import Portfolio
+    return Portfolio()
+
+def _create_resume_parser():
+    from advanced_features import AdvancedResumeParser
+    return AdvancedResumeParser()
+
+def _create_compliance_checker():
+    from advanced_features import EmailComplianceChecker
+    return EmailComplianceChecker()
+
+def _create_performance_tracker():
+    from advanced_features import EmailPerformanceTracker
+    return EmailPerformanceTracker()
+
+def _create_job_fetcher():
+    from job_fetcher import JobFetcher
+    return JobFetcher()
+
+registry.register('chain', _create_chain)
+registry.register('portfolio', _create_portfolio)
+registry.register('resume_parser', _create_resume_parser)
+registry.register('compliance_checker', _create_compliance_checker)
+registry.register('performance_tracker', _create_performance_tracker)
+registry.register('job_fetcher', _create_job_fetcher)
+
+def get_resource(name):
+    """
+    Get a shared resource from the process-wide registry.
+
+    Args:
+        name (str): One of 'chain', 'portfolio', 'resume_parser', 'compliance_checker',
+            'performance_tracker' or 'job_fetcher'
+
+    Returns:
+        The shared resource instance
+    """
+    return registry.get(name)
+
+def preload_resources(names=None, background=True):
+    """
+    Preload resources at startup.
+
+    Args:
+        names (list, optional): Resources to load, defaults to the comma-separated
+            PRELOAD_RESOURCES setting ('all' for every resource, empty for none)
+        background (bool, optional): Load in a daemon thread instead of blocking
+
+    Returns:
+        threading.Thread: The loading thread when loading in the background, else None
+    """
+    if names is None:
+        setting = os.getenv("PRELOAD_RESOURCES", "").strip()
+        if not setting:
+            return None
+        names = None if setting == 'all' else [name.strip() for name in setting.split(',') if name.strip()]
+    return registry.preload(names, background=background)
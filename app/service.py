@@ -0,0 +1,538 @@
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from generation import generate_email_variants, load_job_description, stream_email_text
+from resources import preload_resources
+from telemetry import increment, prometheus_snapshot
+
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", 8600))
+SERVICE_WORKERS = int(os.getenv("SERVICE_WORKERS", 4))
+# Jobs waiting for a worker before submissions are turned away with 503
+SERVICE_MAX_QUEUE = int(os.getenv("SERVICE_MAX_QUEUE", 100))
+# Seconds a finished job's result stays available
+SERVICE_JOB_TTL = float(os.getenv("SERVICE_JOB_TTL", 3600))
+
+# Request fields and their defaults
+JOB_FIELDS = {
+    'resume_text': "",
+    'job_description': "",
+    'recipient_name': "",
+    'company_name': "",
+    'email_tone': "Professional",
+    'email_length': "Standard",
+    'sender_name': None,
+    'skill_extraction': None,
+    # (tone, length) pairs; a variants job shares one analysis and replaces email_tone and email_length
+    'variants': None,
+}
+
+class QueueFullError(Exception):
+    pass
+
+def _is_variant_list(value):
+    return isinstance(value, list) and all(
+        isinstance(pair, (list, tuple)) and len(pair) == 2 and all(isinstance(item, str) for item in pair)
+        for pair in value
+    )
+
+class GenerationJob:
+    def __init__(self, request):
+        """
+        One email generation request and its progress.
+
+        Args:
+            request (dict): Generation arguments, see JOB_FIELDS
+        """
+        self.id = uuid.uuid4().hex
+        self.request = request
+        self.status = 'queued'
+        self.chunks = []
+        self.variants = []
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._changed = threading.Condition()
+
+    def append(self, chunk):
+        with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    def add_variant(self, variant):
+        with self._changed:
+            self.variants.append(variant)
+            self._changed.notify_all()
+
+    def update(self, status, error=None):
+        with self._changed:
+            self.status = status
+            self.error = error
+            if status in ('done', 'failed'):
+                self.finished = time.time()
+            self._changed.notify_all()
+
+    def to_dict(self):
+        with self._changed:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'email': "".join(self.chunks),
+                'variants': list(self.variants),
+                'error': self.error,
+                'created': self.created,
+                'finished': self.finished,
+            }
+
+    def iter_chunks(self, timeout=None):
+        """
+        Yield the email chunks as they are produced, from the first one on.
+
+        Args:
+            timeout (float, optional): Longest wait for the next chunk in seconds
+
+        Yields:
+            str: Chunks of the generated email
+        """
+        position = 0
+        while True:
+            with self._changed:
+                if position == len(self.chunks) and self.status not in ('done', 'failed'):
+                    self._changed.wait(timeout)
+                chunks = self.chunks[position:]
+                finished = self.status in ('done', 'failed')
+            position += len(chunks)
+            yield from chunks
+            if finished and not chunks:
+                return
+
+class GenerationService:
+    def __init__(self, workers=None, max_queue=None, job_ttl=None, chain=None, portfolio=None):
+        """
+        Job queue served by a fixed pool of worker threads.
+
+        Workers share the process-wide chain, portfolio and caches, so they
+        stay warm across requests regardless of which client sent them.
+
+        Args:
+            workers (int, optional): Worker threads, defaults to SERVICE_WORKERS
+            max_queue (int, optional): Jobs waiting for a worker, defaults to SERVICE_MAX_QUEUE
+            job_ttl (float, optional): Seconds finished jobs are kept, defaults to SERVICE_JOB_TTL
+            chain (Chain, optional): Chain to use instead of the shared one
+            portfolio (Portfolio, optional): Portfolio to use instead of the shared one
+        """
+        self.workers = max(1, int(workers or SERVICE_WORKERS))
+        self.job_ttl = SERVICE_JOB_TTL if job_ttl is None else job_ttl
+        self.chain = chain
+        self.portfolio = portfolio
+        self._queue = queue.Queue(maxsize=SERVICE_MAX_QUEUE if max_queue is None else max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"generation-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _expire(self):
+        cutoff = time.time() - self.job_ttl
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]:
+                del self._jobs[job_id]
+
+    def submit(self, request):
+        """
+        Queue a generation request.
+
+        Args:
+            request (dict): Generation arguments, see JOB_FIELDS; job_description may be URLs or text
+
+        Returns:
+            GenerationJob: The queued job
+
+        Raises:
+            ValueError: If the request has unknown fields, values that are not strings or
+                variants that are not (tone, length) pairs
+            QueueFullError: If max_queue jobs are already waiting
+        """
+        unknown = set(request) - set(JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        for field, value in request.items():
+            if field == 'variants':
+                if value is not None and not _is_variant_list(value):
+                    raise ValueError("variants must be a list of [tone, length] pairs")
+            elif value is not None and not isinstance(value, str):
+                raise ValueError(f"{field} must be a string")
+
+        self._expire()
+        job = GenerationJob({field: request.get(field, default) for field, default in JOB_FIELDS.items()})
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            increment('service_jobs_total', status='rejected')
+            raise QueueFullError(f"{self._queue.maxsize} jobs are already waiting")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job):
+        job.update('running')
+        request = dict(job.request)
+        variants = request.pop('variants')
+        try:
+            request['job_description'] = load_job_description(request['job_description'])
+            if variants:
+                # One context for every variant, only the emails are generated per variant
+                for variant in generate_email_variants(
+                    request['resume_text'], request['job_description'], request['recipient_name'],
+                    request['company_name'], [tuple(pair) for pair in variants], request['sender_name'],
+                    chain=self.chain, portfolio=self.portfolio, skill_extraction=request['skill_extraction']
+                ):
+                    job.add_variant(variant)
+            else:
+                for chunk in stream_email_text(**request, chain=self.chain, portfolio=self.portfolio):
+                    job.append(chunk)
+        except Exception as e:
+            logging.exception(f"Generation job {job.id} failed")
+            job.update('failed', error=str(e))
+            increment('service_jobs_total', status='failed')
+            return
+        job.update('done')
+        increment('service_jobs_total', status='done')
+
+def make_handler(service):
+    """
+    Build the HTTP request handler class serving a GenerationService.
+
+    Routes:
+        POST /jobs: Submit a request (JSON body), 202 with the job
+        GET /jobs/{id}: Job status and the email, or the variants, generated so far
+        GET /jobs/{id}/stream: Email text streamed as it is generated
+        GET /metrics: Prometheus metrics
+        GET /healthz: Liveness check
+    """
+    class GenerationHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            logging.debug(f"{self.address_string()} {format % args}")
+
+        def _send(self, status, body, content_type='application/json'):
+            if not isinstance(body, (str, bytes)):
+                body = json.dumps(body)
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _job(self, job_id):
+            job = service.get(job_id)
+            if job is None:
+                self._send(404, {'error': f"Unknown job: {job_id}"})
+            return job
+
+        def do_POST(self):
+            if urlparse(self.path).path.rstrip('/') != '/jobs':
+                self._send(404, {'error': "Not found"})
+                return
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if not isinstance(request, dict):
+                    raise ValueError("Request body must be a JSON object")
+                job = service.submit(request)
+            except QueueFullError as e:
+                self._send(503, {'error': str(e)})
+                return
+            except ValueError as e:
+                self._send(400, {'error': str(e)})
+                return
+            self._send(202, job.to_dict())
+
+        def do_GET(self):
+            parts = [part for part in urlparse(self.path).path.split('/') if part]
+            if parts == ['healthz']:
+                self._send(200, {'status': 'ok'})
+            elif parts == ['metrics']:
+                self._send(200, prometheus_snapshot(), 'text/plain; version=0.0.4')
+            elif len(parts) == 2 and parts[0] == 'jobs':
+                job = self._job(parts[1])
+                if job is not None:
+                    self._send(200, job.to_dict())
+            elif len(parts) == 3 and parts[0] == 'jobs' and parts[2] == 'stream':
+                job = self._job(parts[1])
+                if job is not None:
+                    self._stream(job)
+            else:
+                self._send(404, {'error': "Not found"})
+
+        def _stream(self, job):
+            # Chunked transfer, one HTTP chunk per model chunk
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in job.iter_chunks():
+                data = chunk.encode('utf-8')
+                if data:
+                    self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+                    self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+
+    return GenerationHandler
+
+def serve(host=None, port=None, workers=None, service=None):
+    """
+    Run the generation service until interrupted.
+
+    Args:
+        host (str, optional): Interface to listen on, defaults to SERVICE_HOST
+        port (int, optional): Port to listen on, defaults to SERVICE_PORT
+        workers (int, optional): Worker threads, defaults to SERVICE_WORKERS
+        service (GenerationService, optional): Service to expose instead of a new one
+    """
+    service = service or GenerationService(workers=workers)
+    # Warm the shared chain and portfolio before the first job instead of inside it
+    preload_resources(None if os.getenv("PRELOAD_RESOURCES") else ['chain', 'portfolio'])
+    service.start()
+    server = ThreadingHTTPServer((host or SERVICE_HOST, SERVICE_PORT if port is None else port),
+                                 make_handler(service))
+    server.daemon_threads = True
+    logging.info(f"Generation service listening on {server.server_address[0]}:{server.server_address[1]} "
+                 f"with {service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+
+class ServiceClient:
+    def __init__(self, base_url=None, timeout=30):
+        """
+        Client of a running generation service.
+
+        Args:
+            base_url (str, optional): Service root, defaults to GENERATION_SERVICE_URL
+            timeout (float, optional): Seconds to wait for the service to answer
+        """
+        import requests
+
+        self.base_url = (base_url or os.getenv("GENERATION_SERVICE_URL", "")).rstrip('/')
+        if not self.base_url:
+            raise ValueError("No generation service URL configured")
+        self.timeout = timeout
+        self._new_session = requests.Session
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        # A requests.Session is not thread-safe, so each thread keeps its own connection pool
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._new_session()
+        return session
+
+    def submit(self, **request):
+        """
+        Submit a generation request.
+
+        Args:
+            **request: Generation arguments, see JOB_FIELDS
+
+        Returns:
+            str: Job id
+
+        Raises:
+            requests.HTTPError: If the service rejected the request, 503 when its queue is full
+        """
+        response = self.session.post(f"{self.base_url}/jobs", json=request, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['id']
+
+    def status(self, job_id):
+        response = self.session.get(f"{self.base_url}/jobs/{job_id}", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def result(self, job_id, poll_interval=0.5, timeout=None):
+        """
+        Poll a job until it finishes.
+
+        Args:
+            job_id (str): Job id returned by submit
+            poll_interval (float, optional): Seconds between polls
+            timeout (float, optional): Longest wait in seconds, no limit when omitted
+
+        Returns:
+            str: Generated email
+
+        Raises:
+            RuntimeError: If the job failed
+            TimeoutError: If the job did not finish in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.status(job_id)
+            if job['status'] == 'done':
+                return job['email']
+            if job['status'] == 'failed':
+                raise RuntimeError(f"Generation failed: {job['error']}")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish in {timeout}s")
+            time.sleep(poll_interval)
+
+    def stream(self, job_id):
+        """
+        Stream a job's email as it is generated.
+
+        Args:
+            job_id (str): Job id returned by submit
+
+        Yields:
+            str: Chunks of the generated email
+
+        Raises:
+            RuntimeError: If the job failed
+        """
+        with self.session.get(f"{self.base_url}/jobs/{job_id}/stream", stream=True,
+                              timeout=self.timeout) as response:
+            response.raise_for_status()
+            response.encoding = 'utf-8'
+            for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+                if chunk:
+                    yield chunk
+        # A failure can only be told once the stream has ended
+        job = self.status(job_id)
+        if job['status'] == 'failed':
+            raise RuntimeError(f"Generation failed: {job['error']}")
+
+    def generate_variants(self, variants, poll_interval=0.5, timeout=None, **request):
+        """
+        Generate tone/length variants in one service job, yielding each as it completes.
+
+        The service works out the context once and generates only the emails
+        per variant, as generate_email_variants does in process.
+
+        Args:
+            variants (list): (tone, length) pairs
+            poll_interval (float, optional): Seconds between polls
+            timeout (float, optional): Longest wait in seconds, no limit when omitted
+            **request: Generation arguments shared by all variants
+
+        Yields:
+            dict: Variant with index, tone, length and email, like generate_email_variants
+
+        Raises:
+            RuntimeError: If the job failed
+            TimeoutError: If the job did not finish in time
+        """
+        variants = [list(pair) for pair in variants]
+        if not variants:
+            return
+        job_id = self.submit(**request, variants=variants)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        position = 0
+        while True:
+            job = self.status(job_id)
+            yield from job['variants'][position:]
+            position = len(job['variants'])
+            if job['status'] == 'done':
+                return
+            if job['status'] == 'failed':
+                raise RuntimeError(f"Generation failed: {job['error']}")
+            if deadline is not None and time.monotonic() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish in {timeout}s")
+            time.sleep(poll_interval)
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless cold email generation service")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="Run the HTTP service and its worker pool")
+    serve_parser.add_argument('--host', default=SERVICE_HOST, help="Interface to listen on")
+    serve_parser.add_argument('--port', type=int, default=SERVICE_PORT, help="Port to listen on")
+    serve_parser.add_argument('--workers', type=int, default=SERVICE_WORKERS, help="Worker threads")
+
+    submit_parser = commands.add_parser('submit', help="Generate an email through a running service")
+    submit_parser.add_argument('job_description', help="Job posting URL(s) or text")
+    submit_parser.add_argument('--url', default=None, help="Service root (default: GENERATION_SERVICE_URL)")
+    submit_parser.add_argument('--resume-text', help="Text file with the sender resume")
+    submit_parser.add_argument('--recipient-name', default="", help="Recipient's name")
+    submit_parser.add_argument('--company-name', default="", help="Company name")
+    submit_parser.add_argument('--tone', default="Professional", help="Email tone")
+    submit_parser.add_argument('--length', default="Standard", help="Short, Standard or Detailed")
+    submit_parser.add_argument('--sender-name', help="Name to be used in the signature")
+    submit_parser.add_argument('--no-stream', action='store_true', help="Poll for the finished email instead")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'serve':
+        serve(args.host, args.port, args.workers)
+        return
+
+    resume_text = ""
+    if args.resume_text:
+        with open(args.resume_text, 'r', encoding='utf-8') as file:
+            resume_text = file.read()
+
+    client = ServiceClient(args.url or os.getenv("GENERATION_SERVICE_URL", f"http://{SERVICE_HOST}:{SERVICE_PORT}"))
+    job_id = client.submit(
+        resume_text=resume_text,
+        job_description=args.job_description,
+        recipient_name=args.recipient_name,
+        company_name=args.company_name,
+        email_tone=args.tone,
+        email_length=args.length,
+        sender_name=args.sender_name
+    )
+    if args.no_stream:
+        print(client.result(job_id))
+        return
+    for chunk in client.stream(job_id):
+        print(chunk, end='', flush=True)
+    print()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from skill_matcher import SkillMatcher
+from telemetry import traced
+
+# 'llm' asks the model for skills, 'local' matches the portfolio vocabulary in-process
+SKILL_EXTRACTION = os.getenv("SKILL_EXTRACTION", "llm")
+
+class LocalSkillExtractor(SkillMatcher):
+    """
+    In-process skill extractor matching a portfolio's skill vocabulary plus aliases.
+    """
+
+    @classmethod
+    def from_portfolio(cls, portfolio, aliases=None):
+        """
+        Build an extractor over a portfolio's skill vocabulary.
+
+        Args:
+            portfolio (Portfolio): Loaded portfolio
+            aliases (dict, optional): Canonical skill -> alternative spellings
+
+        Returns:
+            LocalSkillExtractor: Extractor for the portfolio
+        """
+        return cls(portfolio.skill_vocabulary(), aliases)
+
+    @traced('extract_skills_local')
+    def extract_skills(self, context):
+        """
+        Extract known skills from text without calling the LLM.
+
+        Args:
+            context (str): Context containing potential skills
+
+        Returns:
+            list: Canonical skill names in order of first mention
+        """
+        return self.match(context)
+
+# Extractors kept for the most recently used vocabularies
+EXTRACTOR_CACHE_SIZE = 8
+
+_extractors = OrderedDict()
+_extractors_lock = threading.Lock()
+
+def vocabulary_fingerprint(vocabulary):
+    """
+    Content hash of a skill vocabulary, independent of its order.
+    """
+    digest = hashlib.sha256()
+    for skill in sorted(set(vocabulary)):
+        digest.update(skill.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def get_local_extractor(portfolio):
+    """
+    Get the extractor for a portfolio's current skill vocabulary.
+
+    Extractors are cached by the vocabulary's content, so any change to the
+    vocabulary builds a new one and identical vocabularies share one.
+
+    Args:
+        portfolio (Portfolio): Loaded portfolio
+
+    Returns:
+        LocalSkillExtractor: Extractor over the portfolio's current vocabulary
+    """
+    vocabulary = portfolio.skill_vocabulary()
+    key = vocabulary_fingerprint(vocabulary)
+    with _extractors_lock:
+        extractor = _extractors.get(key)
+        if extractor is None:
+            extractor = _extractors[key] = LocalSkillExtractor(vocabulary)
+            while len(_extractors) > EXTRACTOR_CACHE_SIZE:
+                _extractors.popitem(last=False)
+        else:
+            _extractors.move_to_end(key)
+        return extractor
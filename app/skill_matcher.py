@@ -0,0 +1,287 @@
+import os
+import threading
+from collections import deque
+
+# Canonical skill -> other spellings that mean the same thing
+SKILL_ALIASES = {
+    'react': ['reactjs', 'react.js', 'react js'],
+    'react native': ['react-native'],
+    'node.js': ['node', 'nodejs', 'node js'],
+    'express': ['express.js', 'expressjs'],
+    'next.js': ['nextjs', 'next js'],
+    'vue.js': ['vue', 'vuejs', 'vue js'],
+    'angular': ['angularjs', 'angular.js'],
+    'javascript': ['js', 'ecmascript', 'es6'],
+    'typescript': ['ts'],
+    'python': ['python3', 'python 3'],
+    'go': ['golang'],
+    'c#': ['csharp', 'c sharp'],
+    'c++': ['cpp'],
+    '.net': ['dotnet', 'asp.net', '.net core'],
+    'postgresql': ['postgres', 'psql'],
+    'mysql': ['my sql'],
+    'mongodb': ['mongo'],
+    'sql server': ['mssql', 'ms sql', 'microsoft sql server'],
+    'ruby on rails': ['rails', 'ror'],
+    'aws': ['amazon web services'],
+    'gcp': ['google cloud', 'google cloud platform'],
+    'azure': ['microsoft azure'],
+    'kubernetes': ['k8s'],
+    'machine learning': ['ml'],
+    'artificial intelligence': ['ai'],
+    'deep learning': ['dl'],
+    'natural language processing': ['nlp'],
+    'scikit-learn': ['sklearn', 'scikit learn'],
+    'tensorflow': ['tensor flow'],
+    'html': ['html5'],
+    'css': ['css3'],
+    'ci/cd': ['cicd', 'ci cd'],
+}
+
+def normalize_skill(skill):
+    """
+    Normalize a skill name for index lookups: lowercase with single spaces.
+    """
+    return ' '.join(str(skill).lower().split())
+
+# Alternative spelling -> canonical skill
+CANONICAL_SKILLS = {normalize_skill(spelling): canonical
+                    for canonical, spellings in SKILL_ALIASES.items() for spelling in spellings}
+
+def canonical_skill(skill):
+    """
+    Normalize a skill name and map alternative spellings to their canonical skill, e.g. 'K8s' -> 'kubernetes'.
+    """
+    skill = normalize_skill(skill)
+    return CANONICAL_SKILLS.get(skill, skill)
+
+# Skills recognized in resumes even when the portfolio does not mention them
+SKILL_LEXICON = [
+    'python', 'java', 'javascript', 'typescript', 'go', 'rust', 'c', 'c++', 'c#', 'ruby', 'php', 'swift',
+    'kotlin', 'scala', 'r', 'matlab', 'perl', 'dart', 'sql', 'bash', 'html', 'css', 'sass', 'graphql',
+    'react', 'react native', 'angular', 'vue.js', 'svelte', 'next.js', 'redux', 'jquery', 'bootstrap',
+    'tailwind', 'node.js', 'express', 'django', 'flask', 'fastapi', 'spring', 'spring boot', '.net',
+    'ruby on rails', 'laravel', 'flutter', 'android', 'ios',
+    'mysql', 'postgresql', 'sqlite', 'mongodb', 'redis', 'cassandra', 'elasticsearch', 'dynamodb',
+    'sql server', 'oracle', 'firebase', 'snowflake',
+    'aws', 'azure', 'gcp', 'docker', 'kubernetes', 'terraform', 'ansible', 'jenkins', 'ci/cd', 'git',
+    'linux', 'nginx', 'kafka', 'rabbitmq', 'spark', 'hadoop', 'airflow', 'microservices', 'rest',
+    'machine learning', 'deep learning', 'artificial intelligence', 'natural language processing',
+    'computer vision', 'data science', 'data analysis', 'pandas', 'numpy', 'scikit-learn', 'tensorflow',
+    'pytorch', 'keras', 'langchain', 'llm', 'tableau', 'power bi', 'excel',
+    'agile', 'scrum', 'jira', 'figma', 'unit testing', 'selenium',
+]
+
+# Characters that continue a skill token, e.g. the '+' in c++ or the '#' in c#
+TOKEN_CHARS = frozenset('abcdefghijklmnopqrstuvwxyz0123456789+#')
+
+# Forms up to this length are common words ('go', 'ai', 'r') and only match when written as a name
+SHORT_FORM_LENGTH = 2
+
+# Texts handed to a worker process at a time in batched matching
+MATCH_BATCH_SIZE = int(os.getenv("SKILL_MATCH_BATCH_SIZE", 256))
+
+class SkillMatcher:
+    def __init__(self, vocabulary=(), aliases=None):
+        """
+        Aho-Corasick matcher finding every known skill in a single pass over the text.
+
+        Matching is case-insensitive and treats any run of whitespace as one
+        space. Skills must stand as whole tokens, so 'java' is not found in
+        'javascript' and 'c' is not found in 'c++'.
+
+        Args:
+            vocabulary (iterable): Skill names to recognize
+            aliases (dict, optional): Canonical skill -> alternative spellings, defaults to SKILL_ALIASES
+        """
+        aliases = SKILL_ALIASES if aliases is None else aliases
+        self.forms = {}
+        for canonical, spellings in aliases.items():
+            canonical = normalize_skill(canonical)
+            self.forms.setdefault(canonical, canonical)
+            for spelling in spellings:
+                self.forms.setdefault(normalize_skill(spelling), canonical)
+        # Aliases go first so a vocabulary spelled 'NLP' or 'k8s' still reports the canonical skill
+        for skill in vocabulary:
+            skill = normalize_skill(skill)
+            if skill:
+                self.forms.setdefault(skill, skill)
+        self._build()
+
+    def _build(self):
+        # Trie of every form, then failure links in breadth-first order
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+        for form in self.forms:
+            state = 0
+            for char in form:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._output[state] = (form,)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0) if state else 0
+                # Forms ending here include those ending at the failure state
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def __getstate__(self):
+        # Worker processes rebuild the automaton from the forms, which pickle much smaller
+        return {'forms': self.forms}
+
+    def __setstate__(self, state):
+        self.forms = state['forms']
+        self._build()
+
+    def _candidates(self, text):
+        """
+        Find every occurrence of a form as (start, end, form) with original text offsets.
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        # Original offset of each character fed to the automaton, whitespace runs count once
+        offsets = []
+        previous_space = False
+        for index, char in enumerate(text):
+            if char.isspace():
+                if previous_space:
+                    continue
+                previous_space = True
+                char = ' '
+            else:
+                previous_space = False
+                lowered = char.lower()
+                char = lowered if len(lowered) == 1 else char
+            offsets.append(index)
+
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for form in output[state]:
+                yield offsets[len(offsets) - len(form)], index + 1, form
+
+    @staticmethod
+    def _is_token(text, start, end):
+        before = text[start - 1].lower() if start else ''
+        if before in TOKEN_CHARS or before == '.':
+            return False
+        after = text[end].lower() if end < len(text) else ''
+        if after in TOKEN_CHARS:
+            return False
+        # A dot followed by a token character continues the name, as in node.js
+        return not (after == '.' and end + 1 < len(text) and text[end + 1].lower() in TOKEN_CHARS)
+
+    def find(self, text):
+        """
+        Find skill mentions, preferring the longest form where mentions overlap.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: (start, end, canonical skill) tuples in text order
+        """
+        text = text or ""
+        matches = []
+        for start, end, form in self._candidates(text):
+            if not self._is_token(text, start, end):
+                continue
+            if len(form) <= SHORT_FORM_LENGTH:
+                surface = text[start:end]
+                if surface != form.upper() and surface != form.title():
+                    continue
+            matches.append((start, end, form))
+
+        found = []
+        position = 0
+        for start, end, form in sorted(matches, key=lambda match: (match[0], match[0] - match[1])):
+            if start >= position:
+                found.append((start, end, self.forms[form]))
+                position = end
+        return found
+
+    def match(self, text):
+        """
+        Extract the skills mentioned in a text.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            list: Canonical skill names in order of first mention
+        """
+        skills = []
+        seen = set()
+        for _, _, skill in self.find(text):
+            if skill not in seen:
+                seen.add(skill)
+                skills.append(skill)
+        return skills
+
+    def match_batch(self, texts, batch_size=None):
+        """
+        Extract skills from many texts, fanning large batches out across worker processes.
+
+        Args:
+            texts (iterable): Texts to search
+            batch_size (int, optional): Texts per worker task, defaults to MATCH_BATCH_SIZE
+
+        Returns:
+            list: One list of canonical skill names per text, in input order
+        """
+        from document_text import POOL_WORKERS, get_process_pool
+
+        texts = list(texts)
+        batch_size = batch_size or MATCH_BATCH_SIZE
+        if len(texts) <= batch_size or POOL_WORKERS < 2:
+            return [self.match(text) for text in texts]
+
+        pool = get_process_pool()
+        futures = [
+            pool.submit(_match_texts, self.forms, texts[start:start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ]
+        return [skills for future in futures for skills in future.result()]
+
+# Matchers rebuilt inside worker processes, keyed by their forms
+_worker_matchers = {}
+
+def _match_texts(forms, texts):
+    # Runs in a worker process
+    key = hash(frozenset(forms.items()))
+    matcher = _worker_matchers.get(key)
+    if matcher is None:
+        matcher = SkillMatcher.__new__(SkillMatcher)
+        matcher.__setstate__({'forms': forms})
+        _worker_matchers.clear()
+        _worker_matchers[key] = matcher
+    return [matcher.match(text) for text in texts]
+
+_default_matcher = None
+_default_matcher_lock = threading.Lock()
+
+def get_skill_matcher():
+    """
+    Get the shared matcher over SKILL_LEXICON and SKILL_ALIASES.
+
+    Returns:
+        SkillMatcher: Matcher built on first use
+    """
+    global _default_matcher
+    with _default_matcher_lock:
+        if _default_matcher is None:
+            _default_matcher = SkillMatcher(SKILL_LEXICON)
+        return _default_matcher
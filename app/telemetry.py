@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import bisect
+import logging
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+
+# Collection is cheap enough to leave on; TELEMETRY_ENABLED=0 turns it off entirely
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1").lower() not in ('0', 'false', 'no')
+# Emit one JSON log line per span and LLM call on the 'telemetry' logger
+TELEMETRY_LOG = os.getenv("TELEMETRY_LOG", "1").lower() not in ('0', 'false', 'no')
+# Upper bounds in seconds of the stage duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger('telemetry')
+
+METRIC_HELP = {
+    'stage_duration_seconds': ('histogram', "Time spent in each pipeline stage"),
+    'stage_errors_total': ('counter', "Pipeline stage calls that raised"),
+    'llm_requests_total': ('counter', "Upstream LLM calls by model and outcome"),
+    'llm_prompt_tokens_total': ('counter', "Prompt tokens sent to the LLM"),
+    'llm_completion_tokens_total': ('counter', "Completion tokens received from the LLM"),
+    'llm_coalesced_requests_total': ('counter', "Requests served by an identical request already in flight"),
+    'llm_cache_requests_total': ('counter', "LLM response cache lookups by result"),
+    'service_jobs_total': ('counter', "Generation service jobs by outcome"),
+}
+
+class Metrics:
+    def __init__(self, buckets=DURATION_BUCKETS):
+        """
+        In-process counters and histograms with Prometheus text export.
+
+        Args:
+            buckets (tuple, optional): Histogram bucket upper bounds in seconds
+        """
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """
+        Current metric values.
+
+        Returns:
+            dict: 'counters' and 'histograms' lists with name, labels and values
+        """
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(labels), 'value': value}
+                        for (name, labels), value in sorted(self._counters.items())]
+            histograms = [{'name': name, 'labels': dict(labels), 'buckets': list(counts), 'sum': total,
+                           'count': count}
+                          for (name, labels), (counts, total, count) in sorted(self._histograms.items())]
+        return {'counters': counters, 'histograms': histograms}
+
+    def prometheus(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        snapshot = self.snapshot()
+        lines = []
+        described = set()
+
+        def describe(name, default_type):
+            if name not in described:
+                described.add(name)
+                metric_type, help_text = METRIC_HELP.get(name, (default_type, name))
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for counter in snapshot['counters']:
+            describe(counter['name'], 'counter')
+            lines.append(f"{counter['name']}{_labels(counter['labels'])} {counter['value']}")
+        for histogram in snapshot['histograms']:
+            name, labels = histogram['name'], histogram['labels']
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), histogram['buckets']):
+                cumulative += count
+                bucket_labels = dict(labels, le='+Inf' if bound == float('inf') else repr(bound))
+                lines.append(f"{name}_bucket{_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+metrics = Metrics()
+
+def _log(record):
+    if TELEMETRY_LOG and logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(record, default=str))
+
+def increment(name, value=1, **labels):
+    """
+    Add to a counter, e.g. increment('llm_cache_requests_total', result='hit').
+    """
+    if TELEMETRY_ENABLED:
+        metrics.increment(name, value, **labels)
+
+@contextmanager
+def span(stage, **labels):
+    """
+    Time a pipeline stage into the stage duration histogram and the JSON log.
+
+    Args:
+        stage (str): Stage name, e.g. 'extract_skills'
+        **labels: Extra fields for the log line
+    """
+    if not TELEMETRY_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException as e:
+        # A consumer closing a streaming stage early is not an error
+        if not isinstance(e, GeneratorExit):
+            status = 'error'
+            metrics.increment('stage_errors_total', stage=stage)
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        metrics.observe('stage_duration_seconds', duration, stage=stage)
+        _log({'event': 'span', 'stage': stage, 'duration_ms': round(duration * 1000, 3), 'status': status,
+              **labels})
+
+def traced(stage):
+    """
+    Decorator wrapping a function, or the full iteration of a generator function, in a span.
+
+    Args:
+        stage (str): Stage name
+    """
+    def decorator(function):
+        if inspect.isgeneratorfunction(function):
+            @functools.wraps(function)
+            def generator_wrapper(*args, **kwargs):
+                with span(stage):
+                    yield from function(*args, **kwargs)
+            return generator_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_llm_call(model, prompt_tokens, completion_tokens, duration, status='ok', streamed=False):
+    """
+    Count an upstream LLM call and its token usage.
+
+    Args:
+        model (str): Model name
+        prompt_tokens (int): Tokens in the prompt
+        completion_tokens (int): Tokens in the response
+        duration (float): Seconds the call took
+        status (str, optional): 'ok' or 'error'
+        streamed (bool, optional): Whether the response was streamed
+    """
+    if not TELEMETRY_ENABLED:
+        return
+    metrics.increment('llm_requests_total', model=model, status=status)
+    metrics.increment('llm_prompt_tokens_total', prompt_tokens, model=model)
+    metrics.increment('llm_completion_tokens_total', completion_tokens, model=model)
+    _log({'event': 'llm_call', 'model': model, 'status': status, 'streamed': streamed,
+          'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+          'duration_ms': round(duration * 1000, 3)})
+
+def prometheus_snapshot():
+    """
+    Current metrics in the Prometheus text format.
+
+    Returns:
+        str: Metrics text
+    """
+    return metrics.prometheus()
+
+def write_prometheus_snapshot(path):
+    """
+    Write the metrics for the node exporter textfile collector, replacing the file atomically.
+
+    Args:
+        path (str): Output .prom file
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        file.write(prometheus_snapshot())
+    os.replace(temp_path, path)
@@ -1,16 +1,101 @@
 import re
+from html.parser import HTMLParser
 
-def clean_text(text):
-    # Remove HTML tags
-    text = re.sub(r'<[^>]*?>', '', text)
-    # Remove URLs
-    text = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', '', text)
-    # Remove special characters
-    text = re.sub(r'[^a-zA-Z0-9 ]', '', text)
-    # Replace multiple spaces with a single space
-    text = re.sub(r'\s{2,}', ' ', text)
-    # Trim leading and trailing whitespace
-    text = text.strip()
-    # Remove extra whitespace
-    text = ' '.join(text.split())
-    return text
\ No newline at end of file
+# URLs end at whitespace, quotes or angle brackets
+URL_RE = re.compile(r'https?://[^\s<>"\']*')
+
+# Elements whose content is never visible text
+SKIPPED_TAGS = {'script', 'style', 'noscript', 'template', 'svg', 'iframe', 'object'}
+# Elements that start a new line of visible text
+BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'details', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'td', 'th', 'title', 'tr', 'ul'
+}
+
+class HTMLTextNormalizer(HTMLParser):
+    def __init__(self):
+        """
+        Incremental HTML to text converter.
+
+        Feed HTML in chunks of any size; completed lines of visible text are
+        collected as block elements close, so memory stays bounded by the
+        longest line rather than the page size.
+        """
+        super().__init__(convert_charrefs=True)
+        self._skip_depth = 0
+        self._fragments = []
+        self._lines = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._fragments.append(data)
+
+    def _end_line(self):
+        if not self._fragments:
+            return
+        text = ' '.join(URL_RE.sub('', ''.join(self._fragments)).split())
+        self._fragments = []
+        if text:
+            self._lines.append(text)
+
+    def close(self):
+        super().close()
+        self._end_line()
+
+    def pop_lines(self):
+        """
+        Take the lines completed so far.
+
+        Returns:
+            list: Normalized lines of visible text
+        """
+        lines, self._lines = self._lines, []
+        return lines
+
+def iter_text_lines(chunks):
+    """
+    Stream normalized lines of visible text out of HTML chunks.
+
+    Args:
+        chunks (iterable or str): HTML as a string or an iterable of string chunks
+
+    Yields:
+        str: Lines of visible text with URLs removed and whitespace collapsed
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    normalizer = HTMLTextNormalizer()
+    for chunk in chunks:
+        normalizer.feed(chunk)
+        yield from normalizer.pop_lines()
+    normalizer.close()
+    yield from normalizer.pop_lines()
+
+def html_to_text(chunks):
+    """
+    Convert HTML to visible text, keeping one line per block element.
+
+    Args:
+        chunks (iterable or str): HTML as a string or an iterable of string chunks
+
+    Returns:
+        str: Visible text, scripts and styles removed
+    """
+    return '\n'.join(iter_text_lines(chunks))
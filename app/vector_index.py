@@ -0,0 +1,189 @@
+import re
+import math
+import zlib
+import hashlib
+import logging
+
+import numpy as np
+
+# Tokens keep characters that are part of technology names, e.g. c++, c#, node.js
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+class HashingEmbeddingFunction:
+    def __init__(self, dimensions=384, ngram_weight=0.5):
+        """
+        Local CPU embedding based on signed feature hashing of words and character trigrams.
+
+        Needs no model download, so it works offline and gives the same vectors
+        in every process. The vectors are lexical, not semantic: texts are close
+        when they share words or word fragments, so synonyms such as "ML" and
+        "machine learning" do not match. Pass a model-backed embedding_function
+        to PortfolioVectorIndex for semantic matching.
+
+        Args:
+            dimensions (int, optional): Embedding size
+            ngram_weight (float, optional): Weight of character trigrams relative to whole words
+        """
+        self.dimensions = dimensions
+        self.ngram_weight = ngram_weight
+
+    def _features(self, text):
+        for token in TOKEN_PATTERN.findall(str(text).lower()):
+            yield token, 1.0
+            padded = f"#{token}#"
+            for i in range(len(padded) - 2):
+                yield padded[i:i + 3], self.ngram_weight
+
+    def embed(self, text):
+        """
+        Embed a single text.
+
+        Returns:
+            ndarray: L2-normalized vector
+        """
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature, weight in self._features(text):
+            digest = zlib.crc32(feature.encode('utf-8'))
+            sign = 1.0 if digest & 0x80000000 else -1.0
+            vector[digest % self.dimensions] += sign * weight
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def __call__(self, input):
+        return [self.embed(text).tolist() for text in input]
+
+def project_document(project):
+    """
+    Build the text that represents a project in the vector index.
+    """
+    parts = [project.get('name'), project.get('skills'), project.get('description')]
+    return '\n'.join(
+        str(part) for part in parts
+        if part is not None and not (isinstance(part, float) and math.isnan(part)) and str(part).strip()
+    )
+
+class PortfolioVectorIndex:
+    def __init__(self, persist_directory="vectorstore", collection_name="portfolio_projects", embedding_function=None):
+        """
+        Persistent Chroma index of portfolio projects.
+
+        Args:
+            persist_directory (str, optional): Chroma persistence directory
+            collection_name (str, optional): Collection holding the projects
+            embedding_function (optional): Callable mapping a list of texts to vectors,
+                defaults to the lexical HashingEmbeddingFunction
+        """
+        import chromadb
+
+        self.embedding_function = embedding_function or HashingEmbeddingFunction()
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        # Embeddings are computed here and L2-normalized, so Chroma's default L2 space ranks like cosine
+        self.collection = self.client.get_or_create_collection(collection_name, embedding_function=None)
+
+    @staticmethod
+    def _content_hash(document, link):
+        return hashlib.sha1(f"{document}\n{link}".encode('utf-8')).hexdigest()
+
+    def _fingerprint(self):
+        return (self.collection.metadata or {}).get('fingerprint')
+
+    def sync(self, projects, batch_size=1000):
+        """
+        Upsert new or changed projects by id.
+
+        Projects whose content is unchanged are skipped, and when the whole
+        portfolio matches the last sync nothing is read from the index at all.
+
+        Args:
+            projects (list): Project dictionaries with id, name, description, skills and link
+            batch_size (int, optional): Projects compared and upserted per round trip
+
+        Returns:
+            int: Number of projects written to the index
+        """
+        records = []
+        for project in projects:
+            document = project_document(project)
+            link = project.get('link') or ''
+            records.append((str(project['id']), document, link, self._content_hash(document, link)))
+
+        fingerprint = hashlib.sha1(''.join(record[0] + record[3] for record in records).encode('utf-8')).hexdigest()
+        if fingerprint == self._fingerprint():
+            return 0
+
+        # Drop projects that were removed from the portfolio since the last sync
+        current = {record[0] for record in records}
+        stale = [project_id for project_id in self.collection.get(include=[])['ids'] if project_id not in current]
+        if stale:
+            self.collection.delete(ids=stale)
+
+        written = 0
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            existing = self.collection.get(ids=[record[0] for record in batch], include=['metadatas'])
+            known = {
+                project_id: (metadata or {}).get('content_hash')
+                for project_id, metadata in zip(existing['ids'], existing['metadatas'])
+            }
+            changed = [record for record in batch if known.get(record[0]) != record[3]]
+            if changed:
+                self._upsert(changed)
+                written += len(changed)
+
+        self.collection.modify(metadata={'fingerprint': fingerprint})
+        logging.info(f"Portfolio vector index synced: {written} of {len(records)} projects updated")
+        return written
+
+    def upsert(self, project):
+        """
+        Add or update a single project.
+
+        Args:
+            project (dict): Project with id, name, description, skills and link
+        """
+        document = project_document(project)
+        link = project.get('link') or ''
+        self._upsert([(str(project['id']), document, link, self._content_hash(document, link))])
+
+    def _upsert(self, records):
+        self.collection.upsert(
+            ids=[record[0] for record in records],
+            documents=[record[1] for record in records],
+            embeddings=self.embedding_function([record[1] for record in records]),
+            metadatas=[{'link': record[2], 'content_hash': record[3]} for record in records]
+        )
+
+    def query(self, query, k=5):
+        """
+        Find the projects most similar to a job description or list of skills.
+
+        Args:
+            query (str or list): Job description text or list of skills
+            k (int, optional): Number of projects to return
+
+        Returns:
+            list: Dictionaries with id, link, document and similarity score, best match first
+        """
+        if not isinstance(query, str):
+            query = ', '.join(str(item) for item in query)
+        count = self.collection.count()
+        if not query.strip() or not count:
+            return []
+
+        result = self.collection.query(
+            query_embeddings=self.embedding_function([query]),
+            n_results=min(k, count),
+            include=['metadatas', 'documents', 'distances']
+        )
+        return [
+            {
+                'id': project_id,
+                'link': (metadata or {}).get('link') or None,
+                'document': document,
+                # Squared L2 distance between unit vectors is 2 - 2 * cosine
+                'score': 1.0 - distance / 2.0
+            }
+            for project_id, metadata, document, distance in zip(
+                result['ids'][0], result['metadatas'][0], result['documents'][0], result['distances'][0]
+            )
+        ]
@@ -0,0 +1,87 @@
+"""
+Throughput benchmark for the email compliance classifier.
+
+Compares the original one-email-per-call scoring with batched scoring, and
+optionally with the dynamically quantized model:
+
+    python benchmarks/compliance_benchmark.py --emails 200 --quantize
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'app'))
+
+from advanced_features import EmailComplianceChecker
+
+SENTENCES = [
+    "I came across the opening on your careers page and wanted to reach out.",
+    "My recent work focused on building data pipelines with Python and Airflow.",
+    "I led the migration of our services to Kubernetes, cutting deployment time in half.",
+    "I would welcome the chance to discuss how I could contribute to your team.",
+    "Thank you for your time and consideration.",
+    "I have attached my resume and a few links to projects that match the role.",
+]
+
+def make_emails(count, long_share, seed=0):
+    """
+    Build synthetic emails, a share of them longer than the model's input length.
+    """
+    rng = random.Random(seed)
+    emails = []
+    for _ in range(count):
+        sentences = rng.randint(60, 90) if rng.random() < long_share else rng.randint(4, 10)
+        emails.append(' '.join(rng.choice(SENTENCES) for _ in range(sentences)))
+    return emails
+
+def run(name, score, emails):
+    start = time.perf_counter()
+    score(emails)
+    elapsed = time.perf_counter() - start
+    result = {'name': name, 'emails': len(emails), 'seconds': round(elapsed, 3),
+              'emails_per_second': round(len(emails) / elapsed, 2)}
+    print(json.dumps(result))
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compliance classification throughput")
+    parser.add_argument('--emails', type=int, default=200, help="Number of emails to score")
+    parser.add_argument('--long-share', type=float, default=0.1, help="Share of emails over the model length")
+    parser.add_argument('--batch-size', type=int, default=16, help="Chunks per forward pass")
+    parser.add_argument('--threads', type=int, default=None, help="Torch intra-op threads")
+    parser.add_argument('--model', default=None, help="Text classification model")
+    parser.add_argument('--quantize', action='store_true', help="Also benchmark the int8 quantized model")
+    args = parser.parse_args()
+
+    emails = make_emails(args.emails, args.long_share)
+    checker = EmailComplianceChecker(model=args.model, batch_size=args.batch_size, num_threads=args.threads,
+                                     quantize=False)
+    # Load the model and warm up before timing
+    checker.check_appropriateness_batch(emails[:2])
+
+    # Original behavior: one pipeline call per email, truncated so long emails do not fail
+    results = [run('per_email', lambda texts: [checker.bias_detector(text, truncation=True) for text in texts],
+                   emails),
+               run('batched', checker.check_appropriateness_batch, emails)]
+
+    if args.quantize:
+        quantized = EmailComplianceChecker(model=args.model, batch_size=args.batch_size,
+                                           num_threads=args.threads, quantize=True)
+        quantized.check_appropriateness_batch(emails[:2])
+        results.append(run('batched_quantized', quantized.check_appropriateness_batch, emails))
+
+        # How often the quantized model changes the verdict
+        baseline = checker.check_appropriateness_batch(emails)
+        shrunk = quantized.check_appropriateness_batch(emails)
+        agreement = sum(a['is_appropriate'] == b['is_appropriate'] for a, b in zip(baseline, shrunk)) / len(emails)
+        print(json.dumps({'name': 'quantized_agreement', 'share': round(agreement, 4)}))
+
+    baseline_rate = results[0]['emails_per_second']
+    for result in results[1:]:
+        print(f"{result['name']}: {result['emails_per_second'] / baseline_rate:.2f}x per_email throughput")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+Offline end-to-end latency benchmark of the email generation pipeline.
+
+ChatGroq is replaced by a local stand-in with configurable latency and token
+rate, and job descriptions are served from a local HTTP server, so the run
+needs no network access or API key:
+
+    python benchmarks/pipeline_benchmark.py --concurrency 1,4,16 --requests 32 --output results.json
+    python benchmarks/pipeline_benchmark.py --baseline results.json
+
+Each request parses a resume PDF, fetches the job description, extracts
+skills, looks up portfolio links, generates the email and (when transformers
+is installed) runs the compliance check. p50/p95/p99 per stage and
+throughput per concurrency level are written as JSON; with --baseline the
+run fails when a stage's p95 regresses beyond the tolerance.
+"""
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'app')
+sys.path.insert(0, APP_DIR)
+
+RESUME_LINES = [
+    "Jane Doe - Software Engineer",
+    "Summary: Backend engineer with six years of Python, Django and PostgreSQL experience.",
+    "Experience: Built REST APIs on AWS with Docker and Kubernetes, serving two million users.",
+    "Led a migration from MySQL to PostgreSQL and cut p95 latency by 40 percent.",
+    "Built React and Node.js dashboards for internal analytics.",
+    "Skills: Python, Django, Flask, React, Node.js, MongoDB, AWS, Docker, Machine Learning",
+    "Education: B.Tech in Computer Science",
+]
+
+JOB_HTML = """<html><head><title>Senior Backend Engineer</title><style>body {{ color: #333 }}</style></head>
+<body><nav><a href="/">Careers</a></nav><main>
+<h1>Senior Backend Engineer - Acme</h1>
+<p>We are looking for a backend engineer to build our payments platform.</p>
+<h2>Requirements</h2><ul>{requirements}</ul>
+<p>Apply at https://acme.example/jobs/123</p></main>
+<script>window.analytics = {{}};</script></body></html>"""
+
+REQUIREMENTS = ["5+ years of Python", "Django or Flask", "PostgreSQL", "AWS and Docker", "React is a plus",
+                "Experience with Kubernetes", "Strong communication skills"]
+
+EMAIL_TEXT = ("Dear {name},\n\nI came across the Senior Backend Engineer role at Acme and wanted to reach out. "
+              "Over the past six years I have built Python and Django services on AWS, most recently "
+              "migrating a large MySQL deployment to PostgreSQL and cutting p95 latency by 40 percent. "
+              "Your focus on a reliable payments platform matches the work I enjoy most, and my projects "
+              "show how I approach scale and observability. I would welcome a short call to discuss how I "
+              "could contribute to your team.\n\nBest regards,\nJane")
+
+def minimal_pdf(lines):
+    """
+    Build a one-page PDF with a text layer, without any PDF library.
+    """
+    def escape(text):
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    content = "BT /F1 11 Tf 72 720 Td 14 TL " + " ".join(f"({escape(line)}) '" for line in lines) + " ET"
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(content)} >>\nstream\n{content}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    pdf = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    pdf += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    return pdf.encode('latin-1')
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+class FakeChatModel:
+    def __init__(self, latency=0.3, tokens_per_second=250.0, model_name="fake-llm"):
+        """
+        Local stand-in for ChatGroq with a fixed time to first token and a steady token rate.
+
+        Args:
+            latency (float, optional): Seconds before the first token
+            tokens_per_second (float, optional): Output rate after the first token, 0 for instant
+            model_name (str, optional): Name reported to the cache and rate limiter
+        """
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.model_name = model_name
+
+    @staticmethod
+    def _respond(prompt):
+        if "extract a list of technical skills" in prompt:
+            return "Python, Django, PostgreSQL, AWS, Docker, React"
+        if "Extract key job details" in prompt:
+            return '[{"title": "Senior Backend Engineer", "skills": ["Python"], "description": "Payments"}]'
+        return EMAIL_TEXT.format(name="Alex")
+
+    def _tokens(self, text):
+        # Roughly one token per word or punctuation run, spaces kept with the following word
+        tokens = []
+        for word in text.split(' '):
+            tokens.append(word if not tokens else ' ' + word)
+        return tokens
+
+    def invoke(self, prompt):
+        text = self._respond(str(prompt))
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += len(self._tokens(text)) / self.tokens_per_second
+        time.sleep(delay)
+        return FakeMessage(text)
+
+    def stream(self, prompt):
+        time.sleep(self.latency)
+        for token in self._tokens(self._respond(str(prompt))):
+            if self.tokens_per_second:
+                time.sleep(1 / self.tokens_per_second)
+            yield FakeMessage(token)
+
+class _JobHandler(BaseHTTPRequestHandler):
+    body = JOB_HTML.format(requirements="".join(f"<li>{item}</li>" for item in REQUIREMENTS * 20)).encode('utf-8')
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_job_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _JobHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+class StageTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def time(self, stage, function, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def wrap(self, obj, method, stage):
+        # Time calls made from inside the pipeline, e.g. chain.extract_skills during generate_email_text
+        original = getattr(obj, method)
+        setattr(obj, method, lambda *args, **kwargs: self.time(stage, original, *args, **kwargs))
+
+def summarize(samples):
+    values = np.asarray(samples) * 1000
+    return {
+        'count': int(values.size),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p95_ms': round(float(np.percentile(values, 95)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+    }
+
+def run_level(concurrency, requests, components, job_url, resume_pdf, skill_extraction):
+    from document_text import extract_text
+    from generation import generate_email_text, load_job_description
+
+    chain, portfolio, checker = components
+    timer = StageTimer()
+    timer.wrap(chain, 'extract_skills', 'skill_extraction')
+    timer.wrap(chain, 'write_personalized_mail', 'email_generation')
+    timer.wrap(portfolio, 'query_links', 'query_links')
+
+    def request(index):
+        start = time.perf_counter()
+        resume_text = timer.time('resume_parse', extract_text, resume_pdf, 'resume.pdf')
+        job_description = timer.time('jd_fetch', load_job_description, job_url)
+        email = generate_email_text(resume_text, job_description, f"Recipient {index}", "Acme", "Professional",
+                                    sender_name="Jane", chain=chain, portfolio=portfolio,
+                                    skill_extraction=skill_extraction)
+        if email.startswith("Error generating email"):
+            raise RuntimeError(email)
+        if checker is not None:
+            timer.time('compliance', checker.check_appropriateness, email)
+        timer.record('end_to_end', time.perf_counter() - start)
+
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(request, index) for index in range(requests)]:
+            try:
+                future.result()
+            except Exception as e:
+                errors += 1
+                print(f"Request failed: {e}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    # Undo the instance-level wrappers before the next level wraps again
+    for obj, method in ((chain, 'extract_skills'), (chain, 'write_personalized_mail'), (portfolio, 'query_links')):
+        delattr(obj, method)
+
+    return {
+        'concurrency': concurrency,
+        'requests': requests,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round((requests - errors) / elapsed, 3),
+        'stages': {stage: summarize(samples) for stage, samples in sorted(timer.samples.items())},
+    }
+
+def compare(results, baseline, tolerance):
+    """
+    Find stages whose p95 grew by more than tolerance over the baseline run.
+    """
+    baseline_levels = {level['concurrency']: level for level in baseline.get('levels', [])}
+    regressions = []
+    for level in results['levels']:
+        previous = baseline_levels.get(level['concurrency'])
+        if previous is None:
+            continue
+        for stage, stats in level['stages'].items():
+            before = previous['stages'].get(stage)
+            if before and stats['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append({'concurrency': level['concurrency'], 'stage': stage,
+                                    'baseline_p95_ms': before['p95_ms'], 'p95_ms': stats['p95_ms']})
+        if level['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append({'concurrency': level['concurrency'], 'stage': 'throughput',
+                                'baseline_rps': previous['throughput_rps'], 'rps': level['throughput_rps']})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the email pipeline against a fake LLM")
+    parser.add_argument('--concurrency', default='1,4,16', help="Comma-separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=32, help="Requests per concurrency level")
+    parser.add_argument('--latency', type=float, default=0.3, help="Fake LLM seconds to first token")
+    parser.add_argument('--token-rate', type=float, default=250.0, help="Fake LLM output tokens per second")
+    parser.add_argument('--skill-extraction', choices=['llm', 'local'], default='llm')
+    parser.add_argument('--cache', action='store_true', help="Keep the LLM response cache enabled")
+    parser.add_argument('--no-compliance', action='store_true', help="Skip the compliance check stage")
+    parser.add_argument('--output', default='benchmark_results.json', help="Results file")
+    parser.add_argument('--baseline', default=None, help="Earlier results file to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed p95 regression, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # The fake backend has no provider limits, and each run starts with cold caches
+        os.environ.setdefault('LLM_RPM', '0')
+        os.environ['JOB_CACHE_DIR'] = os.path.join(workdir, 'job_pages')
+
+        from chains import Chain
+        from llm_cache import LLMCache
+        from portfolio import Portfolio
+        from job_fetcher import JobFetcher
+        from resources import registry
+        from import_timing import modules_available
+
+        registry.register('job_fetcher', lambda: JobFetcher(max_age=0))
+        llm = FakeChatModel(latency=args.latency, tokens_per_second=args.token_rate)
+        chain = Chain(llm=llm, cache=LLMCache(path=os.path.join(workdir, 'llm_cache.sqlite3'), bypass=not args.cache))
+        portfolio = Portfolio(os.path.join(APP_DIR, os.pardir, 'my_portfolio.csv'), retrieval='skills')
+
+        checker = None
+        if not args.no_compliance and modules_available(['transformers', 'torch']):
+            from advanced_features import EmailComplianceChecker
+            checker = EmailComplianceChecker()
+        elif not args.no_compliance:
+            print("transformers/torch not installed, skipping the compliance stage", file=sys.stderr)
+
+        server = start_job_server()
+        job_url = f"http://127.0.0.1:{server.server_port}/jobs/123"
+        resume_pdf = minimal_pdf(RESUME_LINES)
+        try:
+            levels = [
+                run_level(int(level), args.requests, (chain, portfolio, checker), job_url, resume_pdf,
+                          args.skill_extraction)
+                for level in args.concurrency.split(',') if level.strip()
+            ]
+        finally:
+            server.shutdown()
+
+    results = {
+        'config': {
+            'latency': args.latency,
+            'token_rate': args.token_rate,
+            'skill_extraction': args.skill_extraction,
+            'cache': args.cache,
+            'compliance': checker is not None,
+            'requests': args.requests,
+        },
+        'levels': levels,
+    }
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            results['regressions'] = compare(results, json.load(file), args.tolerance)
+
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+
+    for level in levels:
+        end_to_end = level['stages'].get('end_to_end', {})
+        print(f"concurrency {level['concurrency']:>3}: {level['throughput_rps']:.2f} req/s, "
+              f"end-to-end p50 {end_to_end.get('p50_ms', 0):.0f} ms, p95 {end_to_end.get('p95_ms', 0):.0f} ms, "
+              f"{level['errors']} errors")
+    if results.get('regressions'):
+        print(json.dumps(results['regressions'], indent=2))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import sys
+import uuid
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from llm_gateway import RateLimiter, _limiters
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+class FakeChatModel:
+    def __init__(self, respond):
+        """
+        Chat model stand-in answering every prompt with respond(prompt).
+
+        Each instance has its own model name with no rate limit, and records
+        the prompts it was sent in prompts.
+        """
+        self.respond = respond
+        self.model_name = f"fake-{uuid.uuid4().hex[:8]}"
+        self.prompts = []
+        self._lock = threading.Lock()
+        _limiters[self.model_name] = RateLimiter(0, 0)
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.prompts.append(str(prompt))
+        return FakeMessage(self.respond(str(prompt)))
+
+    def stream(self, prompt):
+        yield self.invoke(prompt)
+
+class StubChain:
+    def __init__(self, gate=None):
+        """
+        Chain stand-in writing "{tone} {length} email for {job}" without a model.
+
+        Records skill extractions and the (tone, length) of every email; streams
+        wait for gate, when given, before their first chunk.
+        """
+        self.gate = gate
+        self.skill_calls = 0
+        self.emails = []
+        self._lock = threading.Lock()
+
+    def extract_skills(self, context):
+        with self._lock:
+            self.skill_calls += 1
+        return ['python']
+
+    def write_personalized_mail(self, context, job_description, links, tone='Professional', sender_name=None,
+                                length='Standard'):
+        with self._lock:
+            self.emails.append((tone, length))
+        return f"{tone} {length} email for {job_description}"
+
+    def stream_personalized_mail(self, context, job_description, links, tone='Professional', sender_name=None,
+                                 length='Standard'):
+        if self.gate is not None:
+            self.gate.wait(5)
+        email = self.write_personalized_mail(context, job_description, links, tone, sender_name, length)
+        for index, word in enumerate(email.split(' ')):
+            yield word if index == 0 else ' ' + word
+
+class StubPortfolio:
+    def query_links(self, skills):
+        return []
+
+class _PageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append({'path': self.path, 'port': self.client_address[1],
+                                    'if_none_match': self.headers.get('If-None-Match')})
+        body = server.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        data = body.encode('utf-8') if isinstance(body, str) else body
+        etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', server.content_types.get(self.path, 'text/html; charset=utf-8'))
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+class PageServer:
+    def __init__(self):
+        """
+        Local HTTP stand-in serving HTML pages with ETags and 304 revalidation.
+
+        Set pages[path] to serve a page, as text sent in UTF-8 or as raw bytes, and
+        content_types[path] to override its Content-Type; every request is recorded in requests.
+        """
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _PageHandler)
+        self.server.daemon_threads = True
+        self.server.pages = {}
+        self.server.content_types = {}
+        self.server.requests = []
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    @property
+    def pages(self):
+        return self.server.pages
+
+    @property
+    def content_types(self):
+        return self.server.content_types
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def url(self, path):
+        return self.base_url + path
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def page_server():
+    server = PageServer()
+    yield server
+    server.close()
@@ -0,0 +1,100 @@
+import re
+import json
+
+import pytest
+
+from campaign import load_recipients, run_campaign
+from chains import Chain
+from conftest import FakeChatModel, StubPortfolio
+from llm_cache import LLMCache
+
+JOB_RE = re.compile(r'\bjob-\d+\b')
+
+@pytest.fixture
+def make_chain(tmp_path):
+    def make(failing=()):
+        """
+        Real Chain over a fake chat model whose emails fail for the given job texts.
+        """
+        def respond(prompt):
+            if "extract a list of technical skills" in prompt:
+                return "Python, SQL"
+            job = JOB_RE.search(prompt).group(0)
+            if job in failing:
+                raise RuntimeError("upstream unavailable")
+            return f"Dear Hiring Team,\nI would love to work on {job}.\nBest regards,\nModel"
+
+        llm = FakeChatModel(respond)
+        chain = Chain(llm=llm, cache=LLMCache(path=str(tmp_path / f"{llm.model_name}.sqlite3")))
+        return chain, llm
+    return make
+
+def email_jobs(llm):
+    # Jobs the model was asked to write an email for
+    return [JOB_RE.search(prompt).group(0) for prompt in llm.prompts if "extract a list" not in prompt]
+
+def make_recipients(count):
+    return [{'id': str(index), 'name': f"Name {index}", 'company': f"Company {index}", 'job': f"job-{index}",
+             'tone': 'Professional'} for index in range(count)]
+
+def read_checkpoint(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+def test_load_recipients_accepts_column_aliases(tmp_path):
+    path = tmp_path / "recipients.csv"
+    path.write_text("Recipient,Company_Name,Job_URL\nAda,Acme,job text\n", encoding='utf-8')
+
+    assert load_recipients(str(path)) == [
+        {'id': '0', 'name': 'Ada', 'company': 'Acme', 'job': 'job text', 'tone': 'Professional'}
+    ]
+
+def test_resume_skips_completed_recipients(tmp_path, make_chain):
+    checkpoint = str(tmp_path / "results.jsonl")
+    recipients = make_recipients(20)
+    chain, _ = make_chain()
+    first = run_campaign(recipients[:12], chain=chain, portfolio=StubPortfolio(), concurrency=4,
+                         checkpoint_path=checkpoint)
+    assert len(first) == 12
+    assert all(result['status'] == 'ok' for result in first)
+    assert all(f"I would love to work on job-{result['id']}." in result['email'] for result in first)
+
+    chain, llm = make_chain()
+    second = run_campaign(recipients, chain=chain, portfolio=StubPortfolio(), concurrency=4,
+                          checkpoint_path=checkpoint)
+
+    assert sorted(email_jobs(llm)) == sorted(f"job-{index}" for index in range(12, 20))
+    assert sorted(result['id'] for result in second) == [str(index) for index in range(12, 20)]
+    ids = [result['id'] for result in read_checkpoint(checkpoint)]
+    assert sorted(ids, key=int) == [str(index) for index in range(20)]
+
+def test_failed_recipient_is_retried_without_duplicate_lines(tmp_path, make_chain):
+    checkpoint = str(tmp_path / "results.jsonl")
+    recipients = make_recipients(6)
+    chain, _ = make_chain(failing={'job-2', 'job-4'})
+    first = run_campaign(recipients, chain=chain, portfolio=StubPortfolio(), concurrency=3,
+                         checkpoint_path=checkpoint)
+    failed = [result for result in first if result['status'] == 'error']
+    assert sorted(result['id'] for result in failed) == ['2', '4']
+    assert all("upstream unavailable" in result['error'] for result in failed)
+
+    chain, llm = make_chain()
+    second = run_campaign(recipients, chain=chain, portfolio=StubPortfolio(), concurrency=3,
+                          checkpoint_path=checkpoint)
+
+    assert sorted(email_jobs(llm)) == ['job-2', 'job-4']
+    assert all(result['status'] == 'ok' for result in second)
+    lines = read_checkpoint(checkpoint)
+    assert sorted(result['id'] for result in lines) == [str(index) for index in range(6)]
+    assert all(result['status'] == 'ok' for result in lines)
+
+def test_partial_last_line_is_ignored(tmp_path, make_chain):
+    checkpoint = tmp_path / "results.jsonl"
+    checkpoint.write_text(json.dumps({'id': '0', 'status': 'ok', 'email': 'done'}) + "\n{\"id\": \"1\", \"sta",
+                          encoding='utf-8')
+
+    chain, llm = make_chain()
+    run_campaign(make_recipients(2), chain=chain, portfolio=StubPortfolio(), checkpoint_path=str(checkpoint))
+
+    assert email_jobs(llm) == ['job-1']
+    assert sorted(result['id'] for result in read_checkpoint(str(checkpoint))) == ['0', '1']
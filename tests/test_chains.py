@@ -0,0 +1,47 @@
+import pytest
+
+from chains import Chain
+from conftest import FakeChatModel, FakeMessage
+from llm_cache import LLMCache
+
+EMAILS = [
+    "Dear Hiring Team,\nI build data pipelines.\nBest regards,\nModel Name\nModel Title",
+    # Text that starts like the sign-off but is not one must come through intact
+    "Dear Ada,\nBest practices matter to me.\nBest regards\nnot the marker.\nBest regards,\nModel",
+    "Dear Ada,\nNo sign-off from the model at all.\nBest",
+]
+
+class ChunkedChatModel(FakeChatModel):
+    def __init__(self, text, chunk_size):
+        super().__init__(lambda prompt: text)
+        self.chunk_size = chunk_size
+
+    def stream(self, prompt):
+        text = self.invoke(prompt).content
+        for start in range(0, len(text), self.chunk_size):
+            yield FakeMessage(text[start:start + self.chunk_size])
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 17])
+@pytest.mark.parametrize('text', EMAILS)
+def test_streamed_email_matches_the_non_streamed_one(tmp_path, text, chunk_size):
+    llm = ChunkedChatModel(text, chunk_size)
+    chain = Chain(llm=llm, cache=LLMCache(path=str(tmp_path / "cache.sqlite3"), bypass=True))
+    arguments = dict(context="context", job_description="job", links=[], sender_name="Ada Lovelace")
+
+    chunks = list(chain.stream_personalized_mail(**arguments))
+
+    assert "".join(chunks) == chain.write_personalized_mail(**arguments)
+    assert all(chunks)
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 17])
+def test_cached_stream_matches_the_streamed_one(tmp_path, chunk_size):
+    llm = ChunkedChatModel(EMAILS[1], chunk_size)
+    chain = Chain(llm=llm, cache=LLMCache(path=str(tmp_path / "cache.sqlite3"), bypass=False))
+    arguments = dict(context="context", job_description="job", links=[], sender_name="Ada Lovelace")
+
+    streamed = "".join(chain.stream_personalized_mail(**arguments))
+    cached = "".join(chain.stream_personalized_mail(**arguments))
+
+    assert cached == streamed
+    assert len(llm.prompts) == 1
+    assert "Best practices matter to me." in streamed and "Ada Lovelace" in streamed
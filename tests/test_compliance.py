@@ -0,0 +1,77 @@
+import pytest
+
+from advanced_features import APPROPRIATE_LABEL, EmailComplianceChecker
+
+class WordTokenizer:
+    # One token per word, with a five word model input
+    model_max_length = 7
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def __call__(self, text, add_special_tokens=False):
+        return {'input_ids': text.split()}
+
+    def decode(self, token_ids):
+        return ' '.join(token_ids)
+
+class FakeDetector:
+    def __init__(self, scores):
+        """
+        Classifier flagging chunks that contain a word in scores, with that score.
+        """
+        self.tokenizer = WordTokenizer()
+        self.scores = scores
+        self.calls = []
+
+    def __call__(self, chunks, batch_size=None, truncation=False):
+        self.calls.append((list(chunks), batch_size))
+        predictions = []
+        for chunk in chunks:
+            flags = [score for word, score in self.scores.items() if word in chunk.split()]
+            if flags:
+                predictions.append({'label': 'INAPPROPRIATE', 'score': max(flags)})
+            else:
+                predictions.append({'label': APPROPRIATE_LABEL, 'score': 0.9 - 0.01 * len(chunk.split())})
+        return predictions
+
+@pytest.fixture
+def checker():
+    checker = EmailComplianceChecker(batch_size=8)
+    checker._bias_detector = FakeDetector({'rude': 0.7, 'insulting': 0.95})
+    return checker
+
+def test_short_email_is_one_chunk(checker):
+    assert checker.check_appropriateness("Thanks for your time") == {
+        'is_appropriate': True, 'confidence': pytest.approx(0.86), 'chunks': 1
+    }
+
+def test_long_email_is_flagged_by_any_chunk(checker):
+    email = "one two three four five six seven rude nine ten eleven twelve insulting"
+
+    result = checker.check_appropriateness(email)
+
+    assert result == {'is_appropriate': False, 'confidence': 0.95, 'chunks': 3}
+    assert checker.bias_detector.calls[0][0] == [
+        "one two three four five", "six seven rude nine ten", "eleven twelve insulting"
+    ]
+
+def test_appropriate_email_reports_its_weakest_chunk(checker):
+    result = checker.check_appropriateness("one two three four five six seven")
+
+    assert result == {'is_appropriate': True, 'confidence': pytest.approx(0.85), 'chunks': 2}
+
+def test_batch_classifies_all_chunks_in_one_pass_and_keeps_order(checker):
+    emails = ["Hello there", "one two three four five six rude", "", "Kind regards"]
+
+    results = checker.check_appropriateness_batch(emails)
+
+    assert [result['is_appropriate'] for result in results] == [True, False, True, True]
+    assert [result['chunks'] for result in results] == [1, 2, 1, 1]
+    assert results[1]['confidence'] == 0.7
+    assert len(checker.bias_detector.calls) == 1
+    assert checker.bias_detector.calls[0][1] == 8
+
+def test_empty_batch_skips_the_model(checker):
+    assert checker.check_appropriateness_batch([]) == []
+    assert checker.bias_detector.calls == []
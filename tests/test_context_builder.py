@@ -0,0 +1,96 @@
+import json
+
+import context_builder
+from chains import Chain, _job_key
+from context_builder import ContextBuilder, build_context, count_tokens, split_chunks
+
+def test_long_unpunctuated_text_is_cut_on_token_boundaries():
+    # Minified pages often have no line or sentence breaks at all
+    text = ' '.join(f"requirement{index} python kubernetes" for index in range(400))
+
+    chunks = split_chunks(text, 50)
+
+    assert len(chunks) > 1
+    assert all(tokens <= 50 for _, tokens in chunks)
+    assert all(count_tokens(chunk) == tokens for chunk, tokens in chunks)
+    assert ' '.join(chunk for chunk, _ in chunks) == text
+
+def test_estimate_fallback_splits_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(context_builder, '_encoding', False)
+    text = "x" * 10 + " " + ' '.join(f"word{index}" for index in range(95))
+
+    chunks = split_chunks(text, 20)
+
+    assert [tokens for _, tokens in chunks] == [20, 20, 20, 20, 16]
+    assert ' '.join(chunk for chunk, _ in chunks) == text
+
+def test_short_sentences_are_still_packed_whole():
+    text = "Build APIs in Python. Deploy with Docker. Monitor with Grafana."
+
+    assert split_chunks(text, 8) == [("Build APIs in Python.", 5), ("Deploy with Docker. Monitor with Grafana.", 8)]
+
+def test_repeated_sentences_inside_a_short_line_are_dropped():
+    text = "Apply now. We use Python. Apply now.\nApply   NOW. Ship daily."
+
+    assert [chunk for chunk, _ in split_chunks(text, 100)] == ["Apply now. We use Python. Ship daily."]
+
+FILLER = [f"Volunteered at community event number {index} on weekends." for index in range(40)]
+
+def test_context_stays_within_the_token_budget():
+    resume = "\n".join(FILLER)
+    job = "\n".join(f"Requirement {index}: experience with tool {index} in production." for index in range(40))
+
+    context = ContextBuilder(token_budget=120).build(resume, job)
+
+    assert 0 < context['tokens'] <= 120
+    assert count_tokens(context['resume']) + count_tokens(context['job_description']) <= 120
+    assert context['resume'] and context['job_description']
+
+def test_unused_job_budget_goes_to_the_resume():
+    resume = "\n".join(FILLER)
+
+    context = ContextBuilder(token_budget=120).build(resume, "Python developer.")
+
+    assert context['job_description'] == "Python developer."
+    assert context['tokens'] > 60
+
+def test_resume_chunks_are_ranked_by_relevance_to_the_job():
+    relevant = "Built Kafka streaming pipelines in Scala for payments."
+    resume = "\n".join(FILLER[:20] + [relevant] + FILLER[20:])
+    job = "We need a Scala engineer to run Kafka streaming pipelines."
+
+    # Room for a few resume chunks, the relevant one from the middle comes first
+    context = ContextBuilder(token_budget=40, chunk_tokens=20).build(resume, job)
+
+    assert relevant in context['resume']
+    assert "event number 0 " not in context['resume']
+
+def test_boilerplate_repeated_across_lines_is_kept_once():
+    footer = "Cookie settings. Privacy policy. Terms of use."
+    job = "\n".join([footer, "Senior Go engineer for distributed systems.", footer, "Remote in Europe.", footer])
+    context = build_context("Go engineer.", job, token_budget=200)
+
+    assert context['job_description'].count("Cookie settings.") == 1
+    assert context['job_description'].count("Privacy policy.") == 1
+    assert "Senior Go engineer for distributed systems." in context['job_description']
+
+def test_job_key_keeps_same_title_in_other_locations():
+    berlin = {'title': 'Data Engineer', 'location': 'Berlin', 'description': 'Build pipelines'}
+    london = {'title': 'Data Engineer', 'location': 'London', 'description': 'Build pipelines'}
+    repeated = {'title': ' data  engineer', 'location': 'berlin', 'description': 'Build pipelines'}
+
+    assert _job_key(berlin) != _job_key(london)
+    assert _job_key(berlin) == _job_key(repeated)
+    assert _job_key({'title': '', 'description': ''}) is None
+
+def test_chunked_extraction_drops_only_repeated_postings(tmp_path):
+    jobs = [
+        {'title': 'Data Engineer', 'location': 'Berlin', 'description': 'Build pipelines'},
+        {'title': 'Data Engineer', 'location': 'London', 'description': 'Build pipelines'},
+    ]
+    chain = Chain.__new__(Chain)
+    chain._invoke = lambda prompt, variables, parser=None: parser.parse(json.dumps(jobs))
+
+    found = list(chain.extract_jobs_chunked("First posting.\nSecond posting.", chunk_tokens=3))
+
+    assert sorted(job['location'] for job in found) == ['Berlin', 'London']
@@ -0,0 +1,98 @@
+import pytest
+import requests
+
+from job_fetcher import JobFetcher
+
+POSTING = "<html><body><h1>Backend Engineer</h1><p>Python and <b>SQL</b> required.</p><script>x()</script></body></html>"
+
+@pytest.fixture
+def fetcher(tmp_path):
+    return JobFetcher(cache_dir=str(tmp_path / "pages"), max_age=0, retries=0)
+
+def test_fetch_text_returns_visible_text(page_server, fetcher):
+    page_server.pages['/job'] = POSTING
+
+    text = fetcher.fetch_text(page_server.url('/job'))
+
+    assert "Backend Engineer" in text
+    assert "Python and SQL required." in text
+    assert "x()" not in text
+
+def test_session_reuses_connections(page_server, fetcher):
+    for index in range(5):
+        page_server.pages[f'/job/{index}'] = POSTING
+
+    for index in range(5):
+        fetcher.fetch_html(page_server.url(f'/job/{index}'))
+
+    assert len(page_server.requests) == 5
+    assert len({request['port'] for request in page_server.requests}) == 1
+
+def test_unchanged_page_is_revalidated_with_etag(page_server, fetcher):
+    page_server.pages['/job'] = POSTING
+    url = page_server.url('/job')
+
+    first = fetcher.fetch_html(url)
+    second = fetcher.fetch_html(url)
+
+    assert first == second == POSTING
+    assert page_server.requests[0]['if_none_match'] is None
+    assert page_server.requests[1]['if_none_match'] is not None
+
+def test_changed_page_is_fetched_again(page_server, fetcher):
+    page_server.pages['/job'] = POSTING
+    url = page_server.url('/job')
+    fetcher.fetch_html(url)
+
+    page_server.pages['/job'] = POSTING.replace("Backend", "Frontend")
+
+    assert "Frontend Engineer" in fetcher.fetch_text(url)
+    assert "Frontend Engineer" in fetcher.fetch_text(url)
+
+def test_fresh_cache_skips_the_network(page_server, tmp_path):
+    page_server.pages['/job'] = POSTING
+    fetcher = JobFetcher(cache_dir=str(tmp_path / "pages"), max_age=300)
+
+    fetcher.fetch_html(page_server.url('/job'))
+    fetcher.fetch_html(page_server.url('/job'))
+
+    assert len(page_server.requests) == 1
+
+def test_fetch_many_keeps_order_and_reports_failures(page_server, fetcher):
+    page_server.pages['/a'] = "<p>First posting</p>"
+    page_server.pages['/b'] = "<p>Second posting</p>"
+    urls = [page_server.url('/a'), page_server.url('/missing'), page_server.url('/b')]
+
+    results = fetcher.fetch_many(urls)
+
+    assert [url for url, _, _ in results] == urls
+    assert "First posting" in results[0][1]
+    assert results[1][1] is None and isinstance(results[1][2], requests.HTTPError)
+    assert "Second posting" in results[2][1]
+
+LOCAL_POSTING = "<html><body><h1>Software Engineer – München</h1><p>Grüße aus Köln</p></body></html>"
+
+@pytest.mark.parametrize('content_type, body', [
+    ('text/html', LOCAL_POSTING.encode('utf-8')),
+    ('text/html', LOCAL_POSTING.replace('<html>', '<html><head><meta charset="windows-1252"></head>')
+        .replace('–', '-').encode('cp1252')),
+    ('text/html; charset=iso-8859-1', LOCAL_POSTING.replace('–', '-').encode('latin-1')),
+], ids=['undeclared-utf8', 'meta-charset', 'declared-charset'])
+def test_pages_are_decoded_without_a_declared_utf8_charset(page_server, fetcher, content_type, body):
+    page_server.pages['/job'] = body
+    page_server.content_types['/job'] = content_type
+
+    text = fetcher.fetch_text(page_server.url('/job'))
+
+    assert "München" in text and "Grüße aus Köln" in text
+    # The cached copy is stored decoded and served the same way
+    assert fetcher.fetch_text(page_server.url('/job')) == text
+
+def test_non_ascii_after_the_sniffed_head_is_decoded(page_server, fetcher):
+    padding = "<p>" + "ascii filler " * 1000 + "</p>"
+    page_server.pages['/job'] = LOCAL_POSTING.replace('<body>', '<body>' + padding).encode('utf-8')
+    page_server.content_types['/job'] = 'text/html'
+
+    text = fetcher.fetch_text(page_server.url('/job'))
+
+    assert "Software Engineer – München" in text
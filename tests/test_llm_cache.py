@@ -0,0 +1,96 @@
+import pytest
+
+from llm_cache import LLMCache
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+@pytest.fixture
+def make_cache(tmp_path, clock):
+    def make(**kwargs):
+        return LLMCache(path=str(tmp_path / "cache.sqlite3"), clock=clock, **{'bypass': False, **kwargs})
+    return make
+
+def test_key_depends_on_model_template_and_variables():
+    key = LLMCache.make_key('model-a', "Hi {name}", {'name': 'Ada'})
+
+    assert key == LLMCache.make_key('model-a', "Hi {name}", {'name': 'Ada'})
+    assert key != LLMCache.make_key('model-b', "Hi {name}", {'name': 'Ada'})
+    assert key != LLMCache.make_key('model-a', "Hello {name}", {'name': 'Ada'})
+    assert key != LLMCache.make_key('model-a', "Hi {name}", {'name': 'Bob'})
+
+def test_entries_expire_after_the_ttl(make_cache, clock):
+    cache = make_cache(ttl=60)
+    cache.set('key', 'answer')
+
+    clock.now += 60
+    assert cache.get('key') == 'answer'
+
+    clock.now += 1
+    assert cache.get('key') is None
+    assert len(cache) == 0
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 0}
+
+def test_entries_without_ttl_never_expire(make_cache, clock):
+    cache = make_cache(ttl=None)
+    cache.set('key', 'answer')
+
+    clock.now += 10 * 365 * 24 * 3600
+
+    assert cache.get('key') == 'answer'
+
+def test_least_recently_used_entries_are_evicted(make_cache, clock):
+    cache = make_cache(max_entries=3)
+    for key in ('a', 'b', 'c'):
+        cache.set(key, key.upper())
+        clock.now += 1
+
+    # Reading 'a' makes 'b' the least recently used entry
+    assert cache.get('a') == 'A'
+    clock.now += 1
+    cache.set('d', 'D')
+
+    assert len(cache) == 3
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in ('a', 'c', 'd')] == ['A', 'C', 'D']
+
+def test_replacing_an_entry_does_not_evict(make_cache, clock):
+    cache = make_cache(max_entries=2)
+    cache.set('a', 'first')
+    cache.set('b', 'B')
+
+    cache.set('a', 'second')
+
+    assert len(cache) == 2
+    assert cache.get('a') == 'second' and cache.get('b') == 'B'
+
+def test_entries_survive_reopening(make_cache):
+    make_cache().set('key', 'answer')
+
+    reopened = make_cache()
+
+    assert reopened.get('key') == 'answer'
+    assert len(reopened) == 1
+
+def test_bypass_neither_reads_nor_writes(make_cache):
+    make_cache().set('key', 'answer')
+    bypassed = make_cache(bypass=True)
+
+    bypassed.set('other', 'value')
+
+    assert bypassed.get('key') is None
+    assert bypassed.stats()['misses'] == 0
+    assert make_cache().get('other') is None
+
+def test_bypass_defaults_to_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_BYPASS", "true")
+
+    assert LLMCache(path=str(tmp_path / "cache.sqlite3")).bypass
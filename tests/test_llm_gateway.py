@@ -0,0 +1,198 @@
+import threading
+import time
+import uuid
+
+import pytest
+
+import llm_gateway
+import telemetry
+from chains import Chain
+from llm_cache import LLMCache
+from llm_gateway import LLMGateway, RequestCancelled, _inflight
+from langchain_core.prompts import PromptTemplate
+
+class FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+class FakeLLM:
+    def __init__(self, text, model_name=None, gate=None, error=None):
+        self.text = text
+        # The first invoke, and streams after their first chunk, pause until the gate is set
+        self.gate = gate
+        self.error = error
+        # Rate limiters are shared per model name, so each test gets its own
+        self.model_name = model_name or f"fake-{uuid.uuid4().hex[:8]}"
+        self.calls = 0
+        self.first_chunk = threading.Event()
+        self._lock = threading.Lock()
+
+    def invoke(self, prompt):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        if self.error is not None:
+            raise self.error
+        if first and self.gate is not None:
+            self.gate.wait(5)
+        return FakeMessage(self.text)
+
+    def stream(self, prompt):
+        with self._lock:
+            self.calls += 1
+        for index, word in enumerate(self.text.split(' ')):
+            yield FakeMessage(word if index == 0 else ' ' + word)
+            self.first_chunk.set()
+            if index == 0 and self.gate is not None:
+                self.gate.wait(5)
+
+def coalesced(model_name):
+    return sum(counter['value'] for counter in telemetry.metrics.snapshot()['counters']
+               if counter['name'] == 'llm_coalesced_requests_total' and counter['labels'] == {'model': model_name})
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_abandoned_stream_is_finished_for_followers():
+    llm = FakeLLM("one two three four")
+    gateway = LLMGateway(llm)
+    key = uuid.uuid4().hex
+
+    leader = gateway.stream("prompt", key=key)
+    assert next(leader) == ("one", llm.model_name)
+
+    received = []
+    follower = threading.Thread(target=lambda: received.extend(gateway.stream("prompt", key=key)))
+    follower.start()
+    wait_for(lambda: coalesced(llm.model_name) == 1)
+
+    # The leader's consumer stops reading, e.g. at the sign-off
+    leader.close()
+    follower.join(5)
+
+    assert received == [("one two three four", llm.model_name)]
+    assert llm.calls == 1
+    assert key not in _inflight
+
+def test_abandoned_stream_without_followers_is_not_joinable():
+    llm = FakeLLM("one two three four")
+    gateway = LLMGateway(llm)
+    key = uuid.uuid4().hex
+
+    leader = gateway.stream("prompt", key=key)
+    next(leader)
+    future = _inflight[key]
+    leader.close()
+
+    with pytest.raises(RequestCancelled):
+        future.result()
+    assert key not in _inflight
+    # A later identical request gets the full answer, not what the leader read
+    assert list(gateway.stream("prompt", key=key)) == [
+        ("one", llm.model_name), (" two", llm.model_name), (" three", llm.model_name), (" four", llm.model_name)
+    ]
+
+def test_concurrent_email_streams_share_one_upstream_call(tmp_path):
+    gate = threading.Event()
+    llm = FakeLLM("Dear team,\nI build data pipelines.\nBest regards,\nModel", gate=gate)
+    chain = Chain(llm=llm, cache=LLMCache(path=str(tmp_path / "cache.sqlite3")), gateway=LLMGateway(llm))
+
+    emails = []
+    def stream():
+        emails.append("".join(chain.stream_personalized_mail("context", "job", [], sender_name="Ada")))
+    threads = [threading.Thread(target=stream) for _ in range(2)]
+    threads[0].start()
+    llm.first_chunk.wait(5)
+    threads[1].start()
+    wait_for(lambda: coalesced(llm.model_name) == 1)
+    gate.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert llm.calls == 1
+    assert len(emails) == 2 and emails[0] == emails[1]
+    assert emails[0].startswith("Dear team,\nI build data pipelines.") and emails[0].endswith("Ada")
+
+def test_interrupted_invoke_releases_its_followers():
+    llm = FakeLLM("answer", error=KeyboardInterrupt())
+    gateway = LLMGateway(llm)
+    key = uuid.uuid4().hex
+
+    with pytest.raises(KeyboardInterrupt):
+        gateway.invoke("prompt", key=key)
+
+    assert key not in _inflight
+    llm.error = None
+    assert gateway.invoke("prompt", key=key) == ("answer", llm.model_name)
+
+def test_follower_stops_waiting_after_the_coalesce_timeout(monkeypatch):
+    monkeypatch.setattr(llm_gateway, 'LLM_COALESCE_TIMEOUT', 0.05)
+    gate = threading.Event()
+    llm = FakeLLM("answer", gate=gate)
+    gateway = LLMGateway(llm)
+    key = uuid.uuid4().hex
+
+    leader = threading.Thread(target=gateway.invoke, args=("prompt",), kwargs={'key': key})
+    leader.start()
+    wait_for(lambda: llm.calls == 1)
+    try:
+        assert gateway.invoke("prompt", key=key) == ("answer", llm.model_name)
+        assert llm.calls == 2
+    finally:
+        gate.set()
+        leader.join(5)
+
+def test_completed_stream_is_shared_with_followers():
+    llm = FakeLLM("shared text")
+    gateway = LLMGateway(llm)
+    key = uuid.uuid4().hex
+
+    leader = gateway.stream("prompt", key=key)
+    next(leader)
+    received = []
+    follower = threading.Thread(target=lambda: received.extend(gateway.stream("prompt", key=key)))
+    follower.start()
+    wait_for(lambda: coalesced(llm.model_name) == 1)
+    list(leader)
+    follower.join(5)
+
+    assert received == [("shared text", llm.model_name)]
+    assert llm.calls == 1
+
+def make_chain(tmp_path, on_fallback):
+    primary = FakeLLM("Dear team,\nprimary answer\nBest regards,\nModel")
+    fallback = FakeLLM("Dear team,\nfallback answer\nBest regards,\nModel")
+    gateway = LLMGateway(primary, fallback_llm=fallback, latency_slo=10)
+    if on_fallback:
+        gateway._fallback_until = time.monotonic() + 60
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite3"))
+    return Chain(llm=primary, cache=cache, gateway=gateway), primary, fallback
+
+def test_fallback_answers_are_not_cached_under_the_primary_model(tmp_path):
+    chain, primary, fallback = make_chain(tmp_path, on_fallback=True)
+    prompt = PromptTemplate.from_template("Write about {topic}")
+
+    assert chain._invoke(prompt, {'topic': 'x'}) == fallback.text
+    assert len(chain.cache) == 0
+
+    chain.gateway._fallback_until = 0.0
+    assert chain._invoke(prompt, {'topic': 'x'}) == primary.text
+    assert chain._invoke(prompt, {'topic': 'x'}) == primary.text
+    assert primary.calls == 1
+    assert len(chain.cache) == 1
+
+def test_streamed_fallback_email_is_not_cached(tmp_path):
+    chain, primary, fallback = make_chain(tmp_path, on_fallback=True)
+
+    email = "".join(chain.stream_personalized_mail("context", "job", [], sender_name="Ada"))
+
+    assert "fallback answer" in email and email.endswith("Ada")
+    assert len(chain.cache) == 0
+
+    chain.gateway._fallback_until = 0.0
+    email = "".join(chain.stream_personalized_mail("context", "job", [], sender_name="Ada"))
+    assert "primary answer" in email
+    assert len(chain.cache) == 1
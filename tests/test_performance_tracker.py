@@ -0,0 +1,42 @@
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from advanced_features import EmailPerformanceTracker, _event_time
+
+@pytest.fixture
+def local_timezone(monkeypatch):
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+def test_naive_timestamps_are_local_time(local_timezone):
+    now = time.time()
+
+    for value in (pd.Timestamp.now(), datetime.now(), datetime.now().isoformat(), None):
+        timestamp, day = _event_time(value)
+        assert abs(timestamp - now) < 5
+        assert day == time.strftime('%Y-%m-%d', time.localtime(now))
+
+def test_aware_timestamps_keep_their_offset(local_timezone):
+    assert _event_time(pd.Timestamp('2026-03-01 03:00', tz='UTC')) == (1772334000.0, '2026-02-28')
+    assert _event_time(datetime(2026, 3, 1, 3, tzinfo=timezone.utc))[0] == 1772334000.0
+    assert _event_time(1772334000) == (1772334000.0, '2026-02-28')
+
+def test_aggregates_count_events_by_tone_and_day(tmp_path):
+    tracker = EmailPerformanceTracker(str(tmp_path / "performance.sqlite3"))
+    first = tracker.log_email_performance({'timestamp': pd.Timestamp.now(), 'company': 'Acme', 'tone': 'Casual',
+                                           'compliance_score': 0.9})
+    tracker.log_email_performance({'company': 'Acme', 'tone': 'Formal', 'compliance_score': 0.7})
+    tracker.log_email_performance({'email_id': first, 'event': 'opened'})
+
+    tones = {row['key']: row for row in tracker.aggregates('tone')}
+    days = tracker.aggregates('day')
+
+    assert tones['Casual']['generated'] == 1 and tones['Casual']['opened'] == 1
+    assert tones['Formal']['generated'] == 1 and tones['Formal']['opened'] == 0
+    assert [row['key'] for row in days] == [time.strftime('%Y-%m-%d')]
@@ -0,0 +1,109 @@
+import pytest
+
+from portfolio import Portfolio
+from portfolio_store import PortfolioStore
+
+PORTFOLIO_CSV = """Techstack,Links
+"Python, Flask",https://example.com/api
+"React, Node",https://example.com/web
+"Python, Pandas, SQL",https://example.com/etl
+"""
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "portfolio.csv"
+    path.write_text(PORTFOLIO_CSV, encoding='utf-8')
+    return str(path)
+
+@pytest.fixture
+def stored(tmp_path, csv_path):
+    return Portfolio(file_path=csv_path, store=str(tmp_path / "portfolio.sqlite3"))
+
+def test_store_portfolio_serves_lookups_without_loading_rows(stored):
+    assert stored._df is None
+    assert len(stored) == 3
+    assert stored.query_links(['python', 'sql']) == ['https://example.com/etl', 'https://example.com/api']
+    assert stored.query_links(['python'], limit=1) == ['https://example.com/api']
+    assert sorted(stored.skill_vocabulary()) == ['flask', 'node.js', 'pandas', 'python', 'react', 'sql']
+    assert list(stored.get_projects_by_skill('Node')['link']) == ['https://example.com/web']
+    assert stored._df is None
+
+def test_store_portfolio_add_project(stored):
+    stored.add_project("CLI", "Command line tool", ["Go"], "https://example.com/cli")
+
+    assert stored.query_links(['golang']) == ['https://example.com/cli']
+    assert 'go' in stored.skill_vocabulary()
+    assert len(stored) == 4
+    assert list(stored.df['link'])[-1] == 'https://example.com/cli'
+
+def test_store_portfolio_updates_existing_link_in_place(stored):
+    loaded = stored.df
+    project_id = stored.add_project("API v2", "Rewritten API", ["FastAPI"], "https://example.com/api")
+
+    assert stored.df is loaded
+    assert len(stored.df) == 3
+    row = stored.df[stored.df['link'] == 'https://example.com/api'].iloc[0]
+    assert (row['id'], row['name'], row['skills']) == (project_id, "API v2", "FastAPI")
+    assert stored.query_links(['fastapi']) == ['https://example.com/api']
+    assert stored.query_links(['flask']) == []
+
+def test_store_portfolio_updates_pending_project(stored):
+    stored.df
+    stored.add_project("CLI", "Command line tool", ["Go"], "https://example.com/cli")
+    stored.add_project("CLI", "Faster command line tool", ["Rust"], "https://example.com/cli")
+
+    assert list(stored.df['description'])[-1] == "Faster command line tool"
+    assert len(stored.df) == 4
+
+def test_store_is_reused_across_portfolios(tmp_path, csv_path):
+    path = str(tmp_path / "portfolio.sqlite3")
+    Portfolio(file_path=csv_path, store=path).add_project("CLI", "Tool", ["Go"], "https://example.com/cli")
+
+    reopened = Portfolio(file_path=csv_path, store=PortfolioStore(path))
+
+    assert len(reopened) == 4
+    assert reopened.query_links(['go']) == ['https://example.com/cli']
+
+def test_csv_portfolio_indexes_added_projects(tmp_path, csv_path, monkeypatch):
+    monkeypatch.delenv("PORTFOLIO_STORE", raising=False)
+    monkeypatch.chdir(tmp_path)
+    portfolio = Portfolio(file_path=csv_path)
+
+    portfolio.add_project("CLI", "Tool", ["Go", "Python"], "https://example.com/cli")
+
+    assert portfolio.query_links(['python']) == [
+        'https://example.com/api', 'https://example.com/etl', 'https://example.com/cli'
+    ]
+    assert len(portfolio) == 4
+
+def test_updated_project_drops_skills_it_no_longer_uses(stored):
+    assert 'flask' in stored.skill_vocabulary()
+
+    stored.add_project("API", "Now on FastAPI", ["Python", "FastAPI"], "https://example.com/api")
+
+    vocabulary = stored.skill_vocabulary()
+    assert 'flask' not in vocabulary
+    assert 'fastapi' in vocabulary
+    assert stored.query_links(['flask']) == []
+
+def test_store_skills_are_sorted(tmp_path, csv_path):
+    store = PortfolioStore(str(tmp_path / "sorted.sqlite3"))
+    store.import_csv(csv_path)
+
+    assert store.skills() == sorted(store.skills())
+
+def test_store_errors_surface_when_loading(stored, tmp_path, monkeypatch):
+    def fail(file_path):
+        raise RuntimeError("database is locked")
+    monkeypatch.setattr(stored.store, 'import_csv', fail)
+
+    with pytest.raises(RuntimeError, match="database is locked"):
+        stored.load_portfolio(str(tmp_path / "other.csv"))
+    assert len(stored) == 3
+
+def test_csv_portfolio_falls_back_to_empty_on_unreadable_file(tmp_path, csv_path, monkeypatch):
+    monkeypatch.delenv("PORTFOLIO_STORE", raising=False)
+    portfolio = Portfolio(file_path=csv_path)
+
+    # A directory in place of the file cannot be read as CSV
+    assert len(portfolio.load_portfolio(str(tmp_path))) == 0
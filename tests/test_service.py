@@ -0,0 +1,119 @@
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+import requests
+
+from conftest import StubChain, StubPortfolio
+from service import GenerationService, ServiceClient, make_handler
+
+@pytest.fixture
+def start_service():
+    started = []
+
+    def start(chain=None, **kwargs):
+        chain = chain or StubChain()
+        service = GenerationService(chain=chain, portfolio=StubPortfolio(), **{'workers': 2, **kwargs})
+        service.start()
+        server = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(service))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        started.append((service, server))
+        return service, chain, f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for service, server in started:
+        server.shutdown()
+        server.server_close()
+        service.stop()
+
+@pytest.fixture
+def service(start_service):
+    return start_service()
+
+def submit(base_url, **request):
+    response = requests.post(f"{base_url}/jobs", json={'job_description': "Backend role", **request}, timeout=5)
+    return response
+
+def wait_for_status(client, job_id, status, timeout=5):
+    deadline = time.monotonic() + timeout
+    while client.status(job_id)['status'] != status:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_job_streams_its_email_in_chunks(service):
+    _, _, base_url = service
+    response = submit(base_url, email_tone="Casual", email_length="Short", skill_extraction='llm')
+    assert response.status_code == 202
+    job_id = response.json()['id']
+
+    with requests.get(f"{base_url}/jobs/{job_id}/stream", stream=True, timeout=5) as stream:
+        assert stream.status_code == 200
+        assert stream.headers['Transfer-Encoding'] == 'chunked'
+        stream.encoding = 'utf-8'
+        chunks = [chunk for chunk in stream.iter_content(chunk_size=None, decode_unicode=True) if chunk]
+
+    assert "".join(chunks) == "Casual Short email for Backend role"
+    client = ServiceClient(base_url)
+    assert "".join(client.stream(job_id)) == "Casual Short email for Backend role"
+    assert client.status(job_id)['status'] == 'done'
+
+def test_stream_of_unknown_job_is_404(service):
+    _, _, base_url = service
+
+    assert requests.get(f"{base_url}/jobs/missing/stream", timeout=5).status_code == 404
+
+def test_full_queue_answers_503(start_service):
+    gate = threading.Event()
+    service, _, base_url = start_service(chain=StubChain(gate=gate), workers=1, max_queue=1)
+    client = ServiceClient(base_url)
+    try:
+        running = submit(base_url, skill_extraction='llm').json()['id']
+        wait_for_status(client, running, 'running')
+        assert submit(base_url, skill_extraction='llm').status_code == 202
+
+        rejected = submit(base_url, skill_extraction='llm')
+
+        assert rejected.status_code == 503
+        assert "already waiting" in rejected.json()['error']
+    finally:
+        gate.set()
+    assert client.result(running, poll_interval=0.01, timeout=5).startswith("Professional Standard email")
+
+def test_variants_run_as_one_job_with_one_analysis(service):
+    service, chain, base_url = service
+    variants = [('Professional', 'Short'), ('Casual', 'Standard'), ('Friendly', 'Detailed')]
+    client = ServiceClient(base_url)
+
+    results = list(client.generate_variants(variants, poll_interval=0.01, timeout=10, resume_text="Python developer",
+                                            job_description="Backend role", skill_extraction='llm'))
+
+    assert sorted((result['index'], result['email']) for result in results) == [
+        (0, "Professional Short email for Backend role"), (1, "Casual Standard email for Backend role"),
+        (2, "Friendly Detailed email for Backend role")
+    ]
+    assert chain.skill_calls == 1
+    assert sorted(chain.emails) == sorted(variants)
+    assert len(service._jobs) == 1
+
+def test_malformed_variants_are_rejected(service):
+    _, _, base_url = service
+
+    response = requests.post(f"{base_url}/jobs", json={'variants': [['Casual']]}, timeout=5)
+
+    assert response.status_code == 400
+    assert 'variants' in response.json()['error']
+
+def test_each_thread_gets_its_own_session(service):
+    _, _, base_url = service
+    client = ServiceClient(base_url)
+    sessions = []
+    threads = [threading.Thread(target=lambda: sessions.append(client.session)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len({id(session) for session in sessions}) == 3
+    assert client.session is client.session
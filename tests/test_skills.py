@@ -0,0 +1,81 @@
+import sqlite3
+
+import pytest
+
+from portfolio import Portfolio, split_skills
+from portfolio_store import PortfolioStore
+from skill_extractor import get_local_extractor
+from skill_matcher import SkillMatcher, canonical_skill
+
+PORTFOLIO_CSV = """name,description,skills,link
+Chatbot,Support bot,"NLP, Python",https://example.com/chatbot
+Churn model,Predicts churn,"sklearn, Pandas",https://example.com/churn
+Orders API,Order service,"Postgres, FastAPI",https://example.com/orders
+Platform,Cluster setup,"K8s, Terraform",https://example.com/platform
+"""
+
+@pytest.fixture
+def portfolio(tmp_path, monkeypatch):
+    monkeypatch.delenv("PORTFOLIO_STORE", raising=False)
+    path = tmp_path / "portfolio.csv"
+    path.write_text(PORTFOLIO_CSV, encoding='utf-8')
+    return Portfolio(file_path=str(path))
+
+def test_canonical_skill_maps_aliases():
+    assert canonical_skill(" K8s ") == 'kubernetes'
+    assert canonical_skill("Natural  Language Processing") == 'natural language processing'
+    assert canonical_skill("Rust") == 'rust'
+    assert split_skills("NLP, sklearn, postgres") == ['natural language processing', 'scikit-learn', 'postgresql']
+
+@pytest.mark.parametrize('skill, link', [
+    ('Natural Language Processing', 'https://example.com/chatbot'),
+    ('scikit-learn', 'https://example.com/churn'),
+    ('PostgreSQL', 'https://example.com/orders'),
+    ('Kubernetes', 'https://example.com/platform'),
+    ('nlp', 'https://example.com/chatbot'),
+])
+def test_query_links_resolves_aliases_on_both_sides(portfolio, skill, link):
+    assert portfolio.query_links([skill]) == [link]
+
+def test_local_extraction_round_trip(portfolio):
+    extractor = get_local_extractor(portfolio)
+    skills = extractor.extract_skills("We run PostgreSQL on Kubernetes and build NLP features with scikit-learn.")
+
+    assert skills == ['postgresql', 'kubernetes', 'natural language processing', 'scikit-learn']
+    assert set(portfolio.query_links(skills)) == {
+        'https://example.com/chatbot', 'https://example.com/churn', 'https://example.com/orders',
+        'https://example.com/platform'
+    }
+
+def test_vocabulary_spelled_as_alias_reports_canonical_skill():
+    assert SkillMatcher(['NLP'], aliases={'natural language processing': ['nlp']}).match("NLP") == [
+        'natural language processing'
+    ]
+
+def test_extractor_cache_follows_vocabulary_content(portfolio):
+    first = get_local_extractor(portfolio)
+    assert get_local_extractor(portfolio) is first
+
+    # Same vocabulary size, different content
+    portfolio._postings['rust'] = portfolio._postings.pop('terraform')
+    second = get_local_extractor(portfolio)
+
+    assert second is not first
+    assert second.match("Rust services") == ['rust']
+
+def test_store_reindexes_raw_skills_on_open(tmp_path):
+    path = str(tmp_path / "portfolio.sqlite3")
+    store = PortfolioStore(path)
+    store.add({'name': 'Platform', 'skills': 'K8s', 'link': 'https://example.com/platform'})
+    store._conn.close()
+
+    # A store written before skills were canonicalized
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE project_skills SET skill = 'k8s'")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    assert [project['link'] for project in PortfolioStore(path).find_by_skills(['Kubernetes'])] == [
+        'https://example.com/platform'
+    ]
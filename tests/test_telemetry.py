@@ -0,0 +1,97 @@
+import pytest
+
+import telemetry
+from telemetry import Metrics
+
+@pytest.fixture
+def metrics(monkeypatch):
+    metrics = Metrics(buckets=(0.1, 1.0))
+    monkeypatch.setattr(telemetry, 'metrics', metrics)
+    return metrics
+
+def counter(metrics, name, **labels):
+    return sum(item['value'] for item in metrics.snapshot()['counters']
+               if item['name'] == name and item['labels'] == labels)
+
+def histogram(metrics, name, **labels):
+    return next(item for item in metrics.snapshot()['histograms'] if item['name'] == name and item['labels'] == labels)
+
+def test_span_records_duration_and_errors(metrics):
+    with telemetry.span('fetch_job'):
+        pass
+    with pytest.raises(ValueError):
+        with telemetry.span('fetch_job'):
+            raise ValueError("bad page")
+
+    assert histogram(metrics, 'stage_duration_seconds', stage='fetch_job')['count'] == 2
+    assert counter(metrics, 'stage_errors_total', stage='fetch_job') == 1
+
+def test_traced_generator_closed_early_is_not_an_error(metrics):
+    @telemetry.traced('stream_email')
+    def stream():
+        yield "Dear"
+        yield " team"
+
+    chunks = stream()
+    assert next(chunks) == "Dear"
+    chunks.close()
+
+    assert histogram(metrics, 'stage_duration_seconds', stage='stream_email')['count'] == 1
+    assert counter(metrics, 'stage_errors_total', stage='stream_email') == 0
+
+def test_traced_function_keeps_its_name_and_result(metrics):
+    @telemetry.traced('extract_skills')
+    def extract(text):
+        return text.split()
+
+    assert extract("python sql") == ['python', 'sql']
+    assert extract.__name__ == 'extract'
+    assert histogram(metrics, 'stage_duration_seconds', stage='extract_skills')['count'] == 1
+
+def test_llm_calls_count_requests_and_tokens(metrics):
+    telemetry.record_llm_call('model-a', 120, 30, 0.5)
+    telemetry.record_llm_call('model-a', 80, 0, 0.1, status='error')
+
+    assert counter(metrics, 'llm_requests_total', model='model-a', status='ok') == 1
+    assert counter(metrics, 'llm_requests_total', model='model-a', status='error') == 1
+    assert counter(metrics, 'llm_prompt_tokens_total', model='model-a') == 200
+    assert counter(metrics, 'llm_completion_tokens_total', model='model-a') == 30
+
+def test_prometheus_text_format(metrics):
+    metrics.increment('llm_cache_requests_total', result='hit')
+    metrics.increment('llm_cache_requests_total', 2, result='miss')
+    metrics.increment('custom_total', path='a"b\\c\nd')
+    for seconds in (0.05, 0.5, 5.0):
+        metrics.observe('stage_duration_seconds', seconds, stage='build_context')
+
+    lines = telemetry.prometheus_snapshot().splitlines()
+
+    assert lines[:4] == [
+        "# HELP custom_total custom_total",
+        "# TYPE custom_total counter",
+        'custom_total{path="a\\"b\\\\c\\nd"} 1',
+        "# HELP llm_cache_requests_total LLM response cache lookups by result",
+    ]
+    assert "# TYPE llm_cache_requests_total counter" in lines
+    assert 'llm_cache_requests_total{result="hit"} 1' in lines
+    assert 'llm_cache_requests_total{result="miss"} 2' in lines
+    # Each type line appears once per metric, not once per label set
+    assert lines.count("# TYPE llm_cache_requests_total counter") == 1
+    start = lines.index("# TYPE stage_duration_seconds histogram")
+    assert lines[start + 1:] == [
+        'stage_duration_seconds_bucket{stage="build_context",le="0.1"} 1',
+        'stage_duration_seconds_bucket{stage="build_context",le="1.0"} 2',
+        'stage_duration_seconds_bucket{stage="build_context",le="+Inf"} 3',
+        'stage_duration_seconds_sum{stage="build_context"} 5.55',
+        'stage_duration_seconds_count{stage="build_context"} 3',
+    ]
+
+def test_snapshot_file_is_replaced_atomically(metrics, tmp_path):
+    metrics.increment('service_jobs_total', status='done')
+    path = tmp_path / "proconnectx.prom"
+    path.write_text("stale", encoding='utf-8')
+
+    telemetry.write_prometheus_snapshot(str(path))
+
+    assert 'service_jobs_total{status="done"} 1' in path.read_text(encoding='utf-8')
+    assert not (tmp_path / "proconnectx.prom.tmp").exists()
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_fetcher import JobFetcher
+from portfolio_store import PortfolioStore
+from skill_matcher import SKILL_LEXICON, SkillMatcher
+from update_portfolio import EXTRA_TECHNOLOGIES, parse_repositories, scrape_github_repos, sync
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'github')
+USERNAME = 'DadvaiahPavan'
+
+def read_fixture(page):
+    with open(os.path.join(FIXTURES, f'repositories_page{page}.html'), 'r', encoding='utf-8') as file:
+        return file.read()
+
+@pytest.fixture
+def github(page_server, tmp_path, monkeypatch):
+    # The sync caches pages under .cache in the working directory
+    monkeypatch.chdir(tmp_path)
+    for page in (1, 2, 3):
+        page_server.pages[f'/{USERNAME}?tab=repositories&page={page}'] = read_fixture(page)
+    return page_server
+
+def run_sync(github, tmp_path, **kwargs):
+    return sync(USERNAME, db_path=str(tmp_path / "portfolio.sqlite3"), base_url=github.base_url, **kwargs)
+
+def test_parse_repositories_reads_repos_and_pagination():
+    matcher = SkillMatcher(SKILL_LEXICON + EXTRA_TECHNOLOGIES)
+
+    repos, pages = parse_repositories(read_fixture(1), 'https://github.com', USERNAME, matcher)
+
+    assert [repo['name'] for repo in repos] == ['ProConnectX', 'Resume-Parser', 'portfolio-site']
+    assert repos[0] == {
+        'name': 'ProConnectX',
+        'description': 'AI-powered cold email creator built with Streamlit and LangChain',
+        'skills': 'python, artificial intelligence, streamlit, langchain',
+        'link': 'https://github.com/DadvaiahPavan/ProConnectX'
+    }
+    assert repos[1]['skills'] == 'python, natural language processing, pandas'
+    assert pages == {2}
+
+def test_scrape_follows_pagination(github, tmp_path):
+    fetcher = JobFetcher(cache_dir=str(tmp_path / "pages"), max_age=0)
+
+    repos = scrape_github_repos(USERNAME, base_url=github.base_url, fetcher=fetcher)
+
+    assert [repo['name'] for repo in repos] == [
+        'ProConnectX', 'Resume-Parser', 'portfolio-site', 'Chat-App', 'Stock-Predictor', 'Todo-CLI'
+    ]
+    assert all(repo['link'].startswith(github.base_url + f'/{USERNAME}/') for repo in repos)
+
+def test_scrape_stops_at_max_pages(github, tmp_path):
+    fetcher = JobFetcher(cache_dir=str(tmp_path / "pages"), max_age=0)
+
+    repos = scrape_github_repos(USERNAME, base_url=github.base_url, fetcher=fetcher, max_pages=2)
+
+    assert len(repos) == 5
+    assert not any('page=3' in request['path'] for request in github.requests)
+
+def test_sync_inserts_then_reports_unchanged(github, tmp_path):
+    assert run_sync(github, tmp_path) == {'inserted': 6, 'updated': 0, 'unchanged': 0}
+
+    assert run_sync(github, tmp_path) == {'inserted': 0, 'updated': 0, 'unchanged': 6}
+    # The second run revalidated every page with its ETag instead of downloading it again
+    assert all(request['if_none_match'] for request in github.requests[3:])
+
+    store = PortfolioStore(str(tmp_path / "portfolio.sqlite3"))
+    assert len(store) == 6
+    assert [project['name'] for project in store.find_by_skills(['keras'])] == ['Stock-Predictor']
+
+def test_sync_updates_changed_and_adds_new_repositories(github, tmp_path):
+    run_sync(github, tmp_path)
+
+    path = f'/{USERNAME}?tab=repositories&page=2'
+    github.pages[path] = github.pages[path].replace('Realtime chat with Node.js, Express and MongoDB',
+                                                    'Realtime chat with Node.js, Express and Redis')
+    path = f'/{USERNAME}?tab=repositories&page=3'
+    page = github.pages[path]
+    repo = page[page.index('<li'):page.index('</li>') + len('</li>')]
+    github.pages[path] = page.replace('</ul>', repo.replace('Todo-CLI', 'Url-Shortener') + '</ul>')
+
+    assert run_sync(github, tmp_path) == {'inserted': 1, 'updated': 1, 'unchanged': 5}
+
+    store = PortfolioStore(str(tmp_path / "portfolio.sqlite3"))
+    assert [project['name'] for project in store.find_by_skills(['redis'])] == ['Chat-App']
+    assert store.find_by_skills(['mongodb']) == []
+    assert len(store) == 7
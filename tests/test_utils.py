@@ -0,0 +1,19 @@
+from utils import html_to_text, iter_text_lines
+
+def test_html_to_text_strips_markup_scripts_and_urls():
+    html = ("<div><h2>Engineer &amp; Lead</h2><script>var x = {'a': 1};</script><!-- note -->"
+            "<p>See https://example.com/jobs?id=1 for <b>Python</b></p><style>.a{color:red}</style>"
+            "<ul><li>SQL</li><li>Docker</li></ul></div>")
+
+    assert html_to_text(html) == "Engineer & Lead\nSee for Python\nSQL\nDocker"
+
+def test_html_to_text_keeps_block_lines_across_chunks():
+    chunks = ["<h1>Backend Eng", "ineer</h1><p>Python</p><scr", "ipt>x()</script><li>SQL</li>"]
+
+    assert html_to_text(chunks) == "Backend Engineer\nPython\nSQL"
+
+def test_lines_are_yielded_as_blocks_close():
+    lines = iter_text_lines(iter(["<p>First  line</p>", "<p>Second", " line</p>", "trailing text"]))
+
+    assert next(lines) == "First line"
+    assert list(lines) == ["Second line", "trailing text"]
@@ -0,0 +1,16 @@
+import math
+
+from vector_index import HashingEmbeddingFunction
+
+def similarity(left, right):
+    return sum(a * b for a, b in zip(left, right)) / (math.hypot(*left) * math.hypot(*right))
+
+def test_hashing_embedding_is_lexical():
+    embed = HashingEmbeddingFunction()
+    query, variant, synonym = embed(["postgres", "postgresql", "database"])
+
+    assert similarity(query, variant) > 0.5
+    # Synonyms share no words or trigrams, so they do not match
+    ml, spelled_out = embed(["ML", "machine learning"])
+    assert abs(similarity(ml, spelled_out)) < 0.2
+    assert similarity(query, variant) > similarity(query, synonym)
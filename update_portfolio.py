@@ -1,77 +1,148 @@
-import requests
+import os
+import sys
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse, parse_qs
+
 from bs4 import BeautifulSoup
-import csv
-import re
-
-def scrape_github_repos(username):
-    url = f'https://github.com/{username}?tab=repositories'
-    response = requests.get(url)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app'))
+
+from job_fetcher import JobFetcher
+from portfolio_store import PortfolioStore
+from skill_matcher import SKILL_LEXICON, SkillMatcher
+
+# Technologies worth listing for a repository beyond the shared skill lexicon
+EXTRA_TECHNOLOGIES = ['streamlit', 'keras', 'opencv', 'selenium', 'chatgpt', 'openai', 'groq']
+
+def repositories_url(base_url, username, page=1):
+    return f"{base_url.rstrip('/')}/{username}?tab=repositories&page={page}"
+
+def parse_repositories(html, base_url, username, matcher):
+    """
+    Parse one repositories page.
+
+    Args:
+        html (str): Page HTML
+        base_url (str): Site root the page was fetched from
+        username (str): Account the repositories belong to
+        matcher (SkillMatcher): Matcher finding technologies in descriptions
+
+    Returns:
+        tuple: Repository dicts with name, description, skills and link, and the
+            page numbers linked from the pagination
+    """
+    soup = BeautifulSoup(html, 'html.parser')
     repos = []
-    for repo in soup.find_all('article', class_='Box-row'):
-        repo_name = repo.find('h3', class_='wb-break-all').text.strip()
-        repo_link = f'https://github.com/{username}/{repo_name}'
-        
-        # Try to extract technologies from repo name or description
-        tech_stack = []
-        repo_desc = repo.find('p', class_='col-9')
-        if repo_desc:
-            desc_text = repo_desc.text.strip().lower()
-            
-            # Common technology keywords
-            tech_keywords = {
-                'python': 'Python',
-                'react': 'React',
-                'django': 'Django',
-                'flask': 'Flask',
-                'javascript': 'JavaScript',
-                'node': 'Node.js',
-                'machine learning': 'Machine Learning',
-                'ai': 'AI',
-                'tensorflow': 'TensorFlow',
-                'keras': 'Keras',
-                'streamlit': 'Streamlit'
-            }
-            
-            # Find matching technologies
-            found_techs = [tech for keyword, tech in tech_keywords.items() if keyword in desc_text]
-            tech_stack = found_techs if found_techs else ['Various Technologies']
-        
+    for repo in soup.select('#user-repositories-list li, article.Box-row'):
+        heading = repo.find(['h3', 'h2'])
+        anchor = heading.find('a') if heading else None
+        if anchor is None:
+            continue
+        repo_name = anchor.text.strip()
+        link = urljoin(base_url.rstrip('/') + '/', (anchor.get('href') or f"{username}/{repo_name}").lstrip('/'))
+
+        description_tag = repo.find('p')
+        description = ' '.join(description_tag.text.split()) if description_tag else ''
+        language_tag = repo.find(itemprop='programmingLanguage')
+        skills = matcher.match(f"{language_tag.text if language_tag else ''} {description}")
+
         repos.append({
-            'TechStack': ', '.join(tech_stack),
-            'Links': repo_link
+            'name': repo_name,
+            'description': description,
+            'skills': ', '.join(skills) if skills else 'Various Technologies',
+            'link': link
         })
-    
-    return repos
-
-def update_portfolio_csv(repos):
-    csv_path = 'c:/Users/pavan/OneDrive/Desktop/test/ProConnect: AI-Powered Cold Email Creator/my_portfolio.csv'
-    
-    # Read existing CSV
-    with open(csv_path, 'r', newline='', encoding='utf-8') as file:
-        existing_rows = list(csv.DictReader(file))
-    
-    # Combine existing rows with new GitHub repos
-    updated_rows = existing_rows + repos
-    
-    # Write updated CSV
-    with open(csv_path, 'w', newline='', encoding='utf-8') as file:
-        fieldnames = ['Techstack', 'Links']
-        writer = csv.DictWriter(file, fieldnames=fieldnames)
-        
-        writer.writeheader()
-        for row in updated_rows:
-            writer.writerow({
-                'Techstack': row.get('TechStack', ''),
-                'Links': row.get('Links', '')
-            })
+
+    pages = set()
+    for anchor in soup.select('a[href*="page="]'):
+        page = parse_qs(urlparse(anchor['href']).query).get('page', [''])[0]
+        if page.isdigit():
+            pages.add(int(page))
+    return repos, pages
+
+def scrape_github_repos(username, base_url='https://github.com', fetcher=None, max_pages=50, concurrency=4):
+    """
+    Collect every repository of an account, fetching result pages concurrently.
+
+    Page 1 reveals the pagination, the remaining pages are then fetched in
+    parallel over the fetcher's pooled session. Unchanged pages are answered
+    from the fetcher's cache after a conditional request.
+
+    Args:
+        username (str): GitHub account
+        base_url (str, optional): Site root, e.g. a local server with recorded pages
+        fetcher (JobFetcher, optional): Fetcher to use, defaults to one caching under .cache/github_pages
+        max_pages (int, optional): Highest page number fetched
+        concurrency (int, optional): Pages fetched at once
+
+    Returns:
+        list: Repositories in page order, de-duplicated by link
+    """
+    fetcher = fetcher or JobFetcher(cache_dir=os.path.join(".cache", "github_pages"), max_age=0)
+    matcher = SkillMatcher(SKILL_LEXICON + EXTRA_TECHNOLOGIES)
+
+    def fetch(page):
+        html = fetcher.fetch_html(repositories_url(base_url, username, page))
+        return parse_repositories(html, base_url, username, matcher)
+
+    repos, pages = fetch(1)
+    results = [repos]
+    fetched = {1}
+    # Pagination may only link a few pages ahead, so keep going until no new pages show up
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            pending = sorted(page for page in pages if page not in fetched and page <= max_pages)
+            if not pending:
+                break
+            fetched.update(pending)
+            pages = set()
+            for page_repos, page_links in executor.map(fetch, pending):
+                if page_repos:
+                    results.append(page_repos)
+                    pages |= page_links
+
+    unique = {}
+    for page_repos in results:
+        for repo in page_repos:
+            unique.setdefault(repo['link'], repo)
+    return list(unique.values())
+
+def sync(username, db_path=None, base_url='https://github.com', max_pages=50, concurrency=4):
+    """
+    Sync an account's repositories into the portfolio store.
+
+    Args:
+        username (str): GitHub account
+        db_path (str, optional): Portfolio store, defaults to PORTFOLIO_STORE or .cache/portfolio.sqlite3
+        base_url (str, optional): Site root to fetch from
+        max_pages (int, optional): Highest page number fetched
+        concurrency (int, optional): Pages fetched at once
+
+    Returns:
+        dict: Number of 'inserted', 'updated' and 'unchanged' repositories
+    """
+    repos = scrape_github_repos(username, base_url=base_url, max_pages=max_pages, concurrency=concurrency)
+    return PortfolioStore(db_path).add_many(repos)
 
 def main():
-    github_username = 'DadvaiahPavan'
-    repos = scrape_github_repos(github_username)
-    update_portfolio_csv(repos)
-    print(f"Updated portfolio CSV with {len(repos)} GitHub repositories.")
+    parser = argparse.ArgumentParser(description="Maintain the portfolio from GitHub repositories")
+    commands = parser.add_subparsers(dest='command', required=True)
+    sync_parser = commands.add_parser('sync', help="Add new and changed repositories to the portfolio store")
+    sync_parser.add_argument('username', nargs='?', default='DadvaiahPavan', help="GitHub account")
+    sync_parser.add_argument('--db', default=None, help="Portfolio store (default: PORTFOLIO_STORE or .cache/portfolio.sqlite3)")
+    sync_parser.add_argument('--base-url', default=os.getenv('GITHUB_BASE_URL', 'https://github.com'),
+                             help="Site root, e.g. a local server with recorded pages")
+    sync_parser.add_argument('--max-pages', type=int, default=50, help="Highest page number fetched")
+    sync_parser.add_argument('--concurrency', type=int, default=4, help="Pages fetched at once")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    counts = sync(args.username, db_path=args.db, base_url=args.base_url, max_pages=args.max_pages,
+                  concurrency=args.concurrency)
+    print(f"Synced GitHub repositories of {args.username}: {counts['inserted']} new, "
+          f"{counts['updated']} changed, {counts['unchanged']} unchanged.")
 
 if __name__ == '__main__':
     main()